@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import worker_init
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
@@ -8,3 +9,18 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 app.autodiscover_tasks()
 
+
+@worker_init.connect
+def preload_modules(**kwargs):
+    """
+        Импорт тяжёлых модулей в родительском процессе worker до запуска пула.
+        Дочерние процессы создаются через fork и получают уже загруженные pandas/openpyxl/xlsxwriter,
+        включая движки чтения и записи Excel, которые pandas импортирует лениво.
+    """
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import openpyxl  # noqa: F401
+    import xlsxwriter  # noqa: F401
+    import pandas.io.excel._openpyxl  # noqa: F401
+    import pandas.io.excel._xlsxwriter  # noqa: F401
+    import core.excel.registry  # noqa: F401
@@ -133,6 +133,27 @@ STATIC_ROOT = env('STATIC_ROOT')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = env('MEDIA_ROOT')
 
+# Файлы задач Celery (входные и результаты обработки). Передаются между web и celery по ключу,
+# поэтому хранилище должно быть общим для обоих сервисов (media_volume или внешнее хранилище).
+TASK_FILES_ROOT = env('TASK_FILES_ROOT', default=os.path.join(MEDIA_ROOT, 'tasks'))
+# internal location nginx для отдачи результатов через X-Accel-Redirect. Пусто - файл отдаёт Django
+TASK_FILES_ACCEL_REDIRECT = env('TASK_FILES_ACCEL_REDIRECT', default='')
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'tasks': {
+        'BACKEND': env('TASK_FILES_STORAGE', default='django.core.files.storage.FileSystemStorage'),
+        'OPTIONS': {
+            'location': TASK_FILES_ROOT,
+        },
+    },
+}
+
 # DRF
 REST_FRAMEWORK = {
     'DEFAULT_PARSER_CLASSES': [
@@ -158,3 +179,42 @@ CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Europe/Moscow'
+CELERY_TASK_ROUTES = ('core.task.route_task',)
+# Очередь по типу обработки: тяжёлые (большие прайсы, отчёты перемещений) и лёгкие обрабатываются
+# разными worker, чтобы короткие задачи не ждали за длинными
+PROCESSOR_QUEUES = {
+    'price': 'heavy',
+    'goodsmove': 'heavy',
+    'multiplicity': 'light',
+    'universal': 'heavy',
+}
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Перезапуск дочернего процесса после задачи, если он занял больше памяти (КБ)
+CELERY_WORKER_MAX_MEMORY_PER_CHILD = env.int('CELERY_WORKER_MAX_MEMORY_PER_CHILD', default=700_000)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': env('CACHE_REDIS_URL', default=CELERY_BROKER_URL),
+    }
+}
+
+# Время хранения описания пакета загрузки (секунды)
+BATCH_TTL = env.int('BATCH_TTL', default=60 * 60 * 24)
+
+# Время хранения файлов задач вне кэша результатов (секунды): после него описание пакета
+# и результаты задач в result backend уже недоступны
+TASK_FILES_TTL = env.int('TASK_FILES_TTL', default=BATCH_TTL)
+
+CELERY_BEAT_SCHEDULE = {
+    'cleanup-task-files': {
+        'task': 'core.task.cleanup_task_files',
+        'schedule': 60 * 60,
+    },
+}
+
+# Максимальный суммарный размер кэша результатов обработки (байты)
+RESULT_CACHE_MAX_BYTES = env.int('RESULT_CACHE_MAX_BYTES', default=2 * 1024 ** 3)
+
+# Redis для публикации прогресса задач (SSE)
+PROGRESS_REDIS_URL = env('PROGRESS_REDIS_URL', default=CELERY_BROKER_URL)
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import UploadedFile
+from .models import (UploadedFile, ProcessedResult, SupplierLayout, PriceSupplier, PriceColumn, QuantityKey,
+                     UnnecessaryBrand, MultiplicityGroup, AssortmentUpload, AssortmentItem)
+from . import result_cache
 
 
 @admin.register(UploadedFile)
@@ -11,3 +13,99 @@ class UploadedFileAdmin(admin.ModelAdmin):
 
     class Meta:
         model = UploadedFile
+
+
+@admin.register(ProcessedResult)
+class ProcessedResultAdmin(admin.ModelAdmin):
+    list_display = ('processor_type', 'file_key', 'size', 'hits', 'created_at', 'last_used_at')
+    list_filter = ('processor_type',)
+    search_fields = ('input_hash', 'file_key')
+    readonly_fields = ('input_hash', 'processor_type', 'config_version', 'file_key', 'size', 'meta', 'hits',
+                       'created_at', 'last_used_at')
+    actions = ['invalidate_stale']
+
+    def delete_queryset(self, request, queryset):
+        # Удаление по одной записи, чтобы удалить и файлы результатов
+        for entry in queryset:
+            entry.delete()
+
+    @admin.action(description='Удалить результаты устаревших версий правил')
+    def invalidate_stale(self, request, queryset):
+        removed = result_cache.invalidate()
+        self.message_user(request, f'Удалено записей: {removed}')
+
+
+@admin.register(SupplierLayout)
+class SupplierLayoutAdmin(admin.ModelAdmin):
+    list_display = ('supplier', 'fingerprint', 'is_overridden', 'hits', 'created_at', 'last_used_at')
+    list_filter = ('is_overridden', 'supplier')
+    search_fields = ('supplier', 'fingerprint')
+    readonly_fields = ('supplier', 'fingerprint', 'headers', 'hits', 'created_at', 'last_used_at')
+    fields = ('supplier', 'fingerprint', 'headers', 'columns', 'is_overridden', 'hits', 'created_at',
+              'last_used_at')
+
+    def has_add_permission(self, request):
+        # Макеты появляются при обработке прайсов, вручную их можно только исправить
+        return False
+
+    def save_model(self, request, obj, form, change):
+        if 'columns' in form.changed_data:
+            obj.is_overridden = True
+        super().save_model(request, obj, form, change)
+        if 'columns' in form.changed_data:
+            # Прайсы, обработанные по прежнему макету, больше не отдаются из кэша
+            result_cache.clear('price')
+
+
+class PriceColumnInline(admin.TabularInline):
+    model = PriceColumn
+    extra = 1
+
+
+@admin.register(PriceSupplier)
+class PriceSupplierAdmin(admin.ModelAdmin):
+    list_display = ('name', 'file_name_words', 'order')
+    list_editable = ('order',)
+    search_fields = ('name',)
+    inlines = [PriceColumnInline]
+
+
+@admin.register(QuantityKey)
+class QuantityKeyAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+
+
+@admin.register(UnnecessaryBrand)
+class UnnecessaryBrandAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+
+
+@admin.register(MultiplicityGroup)
+class MultiplicityGroupAdmin(admin.ModelAdmin):
+    list_display = ('name', 'multiplicity', 'order')
+    list_editable = ('multiplicity', 'order')
+    search_fields = ('name',)
+
+
+@admin.register(AssortmentUpload)
+class AssortmentUploadAdmin(admin.ModelAdmin):
+    list_display = ('file_name', 'items', 'uploaded_at')
+    readonly_fields = ('file_name', 'items', 'uploaded_at')
+
+    def has_add_permission(self, request):
+        # Справочник загружается файлом через api_upload_assortment
+        return False
+
+
+@admin.register(AssortmentItem)
+class AssortmentItemAdmin(admin.ModelAdmin):
+    list_display = ('brand', 'article')
+    search_fields = ('brand', 'article')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
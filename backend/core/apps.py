@@ -3,3 +3,13 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .excel import assortment, layout_cache, rules
+        from .assortment_store import DatabaseAssortmentSource
+        from .layouts import DatabaseLayoutStore
+        from .rules_store import DatabaseRulesSource
+
+        layout_cache.set_store(DatabaseLayoutStore())
+        rules.set_source(DatabaseRulesSource())
+        assortment.set_source(DatabaseAssortmentSource())
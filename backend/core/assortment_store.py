@@ -0,0 +1,40 @@
+"""
+Справочник ассортимента в базе данных.
+Версия справочника - номер последней загрузки: процессы сверяют её перед обработкой файла
+и загружают справочник заново только после новой загрузки.
+"""
+from django.db import transaction
+
+from .excel import assortment
+from .models import AssortmentItem, AssortmentUpload
+from .utils.logging import logger
+
+BATCH_SIZE = 5000
+
+
+class DatabaseAssortmentSource(assortment.AssortmentSource):
+
+    def version(self) -> str:
+        last = AssortmentUpload.objects.order_by('-pk').values_list('pk', flat=True).first()
+        return str(last or '')
+
+    def load(self) -> assortment.Assortment:
+        version = self.version()
+        pairs = AssortmentItem.objects.values_list('brand', 'article')
+        snapshot = assortment.Assortment(version, pairs.iterator(chunk_size=BATCH_SIZE))
+        logger.info('Загружен справочник ассортимента, версия %s: %s позиций', version, len(snapshot))
+        return snapshot
+
+
+def replace_assortment(file_bytes: bytes, file_name: str) -> AssortmentUpload:
+    """Замена справочника содержимым файла ассортимента. Возвращает запись о загрузке"""
+    pairs = assortment.read_assortment(file_bytes)
+    with transaction.atomic():
+        AssortmentItem.objects.all().delete()
+        AssortmentItem.objects.bulk_create(
+            (AssortmentItem(brand=brand, article=article) for brand, article in pairs.itertuples(index=False)),
+            batch_size=BATCH_SIZE)
+        upload = AssortmentUpload.objects.create(file_name=file_name, items=len(pairs))
+    assortment.invalidate()
+    logger.info('Справочник ассортимента заменён файлом %s: %s позиций', file_name, len(pairs))
+    return upload
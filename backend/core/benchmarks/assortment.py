@@ -0,0 +1,86 @@
+"""
+Исключение товаров ассортимента в data_cleaning: прежний вариант (чтение файла ассортимента при каждом вызове,
+словарь производитель -> список номеров и поиск номера в списке для каждой строки) и снимок справочника
+(хэш-индекс пар, загружается один раз, anti-join по всем строкам сразу).
+Справочник 30 000 позиций, отчёт 50 000 строк, несколько отчётов подряд как в одном воркере.
+
+Запуск из каталога backend:
+    python -m core.benchmarks.assortment
+"""
+import io
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.excel import assortment
+
+ITEMS = 30_000
+ROWS = 50_000
+REPORTS = 5
+BRANDS = ['BOSCH', 'NGK', 'MANN', 'TRW', 'FEBI', 'SACHS', 'LEMFORDER', 'VALEO']
+
+
+class FileSource(assortment.AssortmentSource):
+    """Справочник из файла ассортимента, версия не меняется"""
+
+    def __init__(self, file_bytes: bytes):
+        self.file_bytes = file_bytes
+
+    def version(self) -> str:
+        return '1'
+
+    def load(self) -> assortment.Assortment:
+        pairs = assortment.read_assortment(self.file_bytes)
+        return assortment.Assortment('1', pairs.itertuples(index=False))
+
+
+def make_assortment() -> bytes:
+    rng = random.Random(0)
+    rows = [('', '', rng.choice(BRANDS), f'A{rng.randrange(ROWS):06d}', rng.choice(['Г', 'Г', 'Н']))
+            for _ in range(ITEMS)]
+    stream = io.BytesIO()
+    pd.DataFrame(rows, columns=['Код', 'Наименование', 'Производитель', 'Номер по каталогу', 'Ассортимент']
+                 ).to_excel(stream, index=False, startrow=1)
+    return stream.getvalue()
+
+
+def make_report() -> pd.DataFrame:
+    rng = random.Random(1)
+    return pd.DataFrame({1: [rng.choice(BRANDS) for _ in range(ROWS)],
+                         2: [f'A{rng.randrange(ROWS):06d}' for _ in range(ROWS)]})
+
+
+def legacy_filter(df: pd.DataFrame, file_bytes: bytes) -> np.ndarray:
+    """Прежний вариант open_file"""
+    assort_df = pd.read_excel(io.BytesIO(file_bytes), skiprows=1, usecols=[2, 3, 4])
+    assort_df = assort_df[assort_df['Ассортимент'] == 'Г']
+    brand_number_assort = assort_df.groupby('Производитель')['Номер по каталогу'].apply(list).to_dict()
+    return np.array([bool(brand_number_assort.get(row[1], None)) and row[2] in brand_number_assort[row[1]]
+                     for row in df.to_dict('records')])
+
+
+def main():
+    file_bytes = make_assortment()
+    df = make_report()
+
+    start = time.perf_counter()
+    for _ in range(REPORTS):
+        legacy = legacy_filter(df, file_bytes)
+    legacy_time = time.perf_counter() - start
+
+    assortment.set_source(FileSource(file_bytes))
+    start = time.perf_counter()
+    for _ in range(REPORTS):
+        current = assortment.get_assortment().contains(df[1], df[2])
+    current_time = time.perf_counter() - start
+
+    assert (legacy == current).all()
+    print(f'{REPORTS} отчётов по {ROWS} строк, справочник {ITEMS} позиций ({legacy.sum()} строк в ассортименте)')
+    print(f'файл и поиск в списке:  {legacy_time:6.2f} s')
+    print(f'снимок и anti-join:     {current_time:6.2f} s')
+
+
+if __name__ == '__main__':
+    main()
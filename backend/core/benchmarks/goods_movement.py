@@ -0,0 +1,103 @@
+"""
+Отчёт о перемещении товаров: прежняя обработка (pd.read_excel + load_workbook, правила по строкам,
+сохранение книги через openpyxl) и GoodsMovementReport (один разбор файла, правила по столбцам,
+запись только столбца К перемещению К в XML листа). 100 000 строк.
+
+Запуск из каталога backend:
+    python -m core.benchmarks.goods_movement
+"""
+import contextlib
+import io
+import random
+import time
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from core.excel.goods_movement_report import GoodsMovementReport
+from core.excel.rules import get_rules
+from core.excel.xlsx_patch import patch_column
+
+ROWS = 100_000
+HEADER = ['Код', 'Артикул', 'Наименование', 'Производитель', 'Остаток отпр', 'Дост Ост Отпр', 'Остаток получ',
+          'Продажи', 'Кратность продажи', 'Кол-во к перем.', 'К перемещению К', 'Комментарий']
+
+
+def make_file(rows: int) -> bytes:
+    import xlsxwriter
+
+    rng = random.Random(0)
+    brands = ['BOSCH', 'NGK', 'MANN', 'TRW', *get_rules().unnecessary_brands[:3]]
+    output_stream = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output_stream, {'constant_memory': True})
+    sheet = workbook.add_worksheet()
+    sheet.write_row(0, 0, HEADER)
+    for row in range(1, rows + 1):
+        sheet.write_row(row, 0, [row, f'A{row:06d}', f'Товар {row % 5000}', rng.choice(brands),
+                                 rng.randrange(50), rng.randrange(50), rng.randrange(20), rng.randrange(100),
+                                 rng.choice([1, 1, 2, 4, 10]), rng.choice([None, None, rng.randrange(1, 30)]),
+                                 None, None])
+    workbook.close()
+    return output_stream.getvalue()
+
+
+def legacy_process(file_bytes: bytes, unnecessary_brands: set) -> bytes:
+    df = pd.read_excel(io.BytesIO(file_bytes))
+    workbook = load_workbook(io.BytesIO(file_bytes))
+    worksheet = workbook.active
+    for col in df.columns:
+        df[col] = df[col].fillna(1) if col == 'Кратность продажи' else df[col].fillna('')
+    column = df.columns.tolist().index('К перемещению К') + 1
+    for i, row in enumerate(df.to_dict(orient='records'), start=2):
+        if row['Кол-во к перем.'] != '':
+            row['К перемещению К'] = row['Кол-во к перем.']
+            amount, mult = row['К перемещению К'], row['Кратность продажи']
+            if mult != 1 and amount:
+                remainder = amount % mult
+                if remainder != 0 and amount > mult:
+                    row['К перемещению К'] = amount - remainder
+                elif remainder != 0 and amount < mult:
+                    row['К перемещению К'] = mult
+            stock, available_balance = row['Остаток отпр'], row['Дост Ост Отпр']
+            if stock < mult or available_balance < mult or stock < mult * 2:
+                row['К перемещению К'] = ''
+            if row['Производитель'].lower() in unnecessary_brands:
+                row['К перемещению К'] = ''
+        worksheet.cell(row=i, column=column).value = row['К перемещению К']
+    output_stream = io.BytesIO()
+    workbook.save(output_stream)
+    return output_stream.getvalue()
+
+
+def main():
+    file_bytes = make_file(ROWS)
+    report = GoodsMovementReport(file_bytes, 'report.xlsx')
+
+    start = time.perf_counter()
+    legacy_process(file_bytes, report.unnecessary_brands)
+    legacy_time = time.perf_counter() - start
+
+    stages = {}
+    start = time.perf_counter()
+    df = report.pandas_open_file()
+    stages['чтение'] = time.perf_counter() - start
+    start = time.perf_counter()
+    data = report.get_datafile(df)
+    stages['правила'] = time.perf_counter() - start
+    start = time.perf_counter()
+    patch_column(file_bytes, report.get_headers_index(df) - 1, data)
+    stages['запись'] = time.perf_counter() - start
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        report.process()
+        total = time.perf_counter() - start
+
+    print(f'{ROWS} строк, изменено ячеек: {len(data)}')
+    print(f'прежняя обработка: {legacy_time:8.2f} s')
+    print(f'GoodsMovementReport: {total:6.2f} s (' + ', '.join(f'{name} {value:.2f} s'
+                                                               for name, value in stages.items()) + ')')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Отчёт с заголовком из трёх строк и объединёнными ячейками: прежний вариант (remove_merge - загрузка книги
+в openpyxl, снятие объединений по одному диапазону, перенос заголовка через ws.cell и delete_rows,
+сохранение книги, затем pd.read_excel) и headers.read_table (один потоковый разбор листа,
+заголовок собирается из значений строк и адресов объединённых ячеек). 20 000 строк, 35 столбцов.
+
+Запуск из каталога backend:
+    python -m core.benchmarks.headers
+"""
+import io
+import random
+import time
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from core.excel.headers import read_table
+
+ROWS = 20_000
+MONTHS = ['июль 25', 'авг. 25', 'сент. 25', 'окт. 25', 'нояб. 25', 'дек. 25', 'янв. 26', 'февр. 26',
+          'март 26', 'апр. 26', 'май 26', 'июнь 26', 'июль 26']
+GROUPS = [('Номенклатура', ['Производитель', '№ по каталогу', 'Наименование']),
+          ('Продажи', MONTHS),
+          ('Остатки', ['Св. ост.', 'В пути', 'Резерв']),
+          ('Параметры', ['Склад', 'Кратн.', 'Матрица', 'сумма + покуп.'])]
+
+
+def make_file() -> bytes:
+    import xlsxwriter
+
+    rng = random.Random(0)
+    output_stream = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output_stream)
+    sheet = workbook.add_worksheet()
+    column = 0
+    for group, names in GROUPS:
+        sheet.merge_range(0, column, 0, column + len(names) - 1, group)
+        for name in names:
+            sheet.merge_range(1, column, 2, column, name)
+            column += 1
+    extra = 35 - column
+    for index in range(extra):
+        sheet.write_column(1, column + index, [f'Показатель {index}', 'шт.'])
+    for row in range(3, ROWS + 3):
+        sheet.write_row(row, 0, ['BOSCH', f'A{row:06d}', f'Товар {row % 5000}',
+                                 *[rng.choice([None, rng.randrange(15)]) for _ in MONTHS],
+                                 rng.randrange(60), rng.randrange(5), 0, f'Склад {row % 20}', 1, 'да', 'A',
+                                 *[rng.randrange(100) for _ in range(extra)]])
+    workbook.close()
+    return output_stream.getvalue()
+
+
+def remove_merge(file_bytes: bytes) -> bytes:
+    """Прежний вариант"""
+    wb = load_workbook(io.BytesIO(file_bytes))
+    ws = wb.active
+    for merge in list(ws.merged_cells):
+        ws.unmerge_cells(range_string=str(merge))
+    for col in range(1, ws.max_column + 1):
+        value1 = ws.cell(row=1, column=col).value or ''
+        value2 = ws.cell(row=2, column=col).value or ''
+        value3 = ws.cell(row=3, column=col).value or ''
+        ws.cell(row=1, column=col).value = ''
+        ws.cell(row=2, column=col).value = f'{value1} {value2} {value3}'.strip()
+    ws.delete_rows(3)
+    output_stream = io.BytesIO()
+    wb.save(output_stream)
+    wb.close()
+    return output_stream.getvalue()
+
+
+def main():
+    file_bytes = make_file()
+
+    start = time.perf_counter()
+    legacy = pd.read_excel(io.BytesIO(remove_merge(file_bytes)), header=1)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    current = read_table(file_bytes, header_rows=3)
+    current_time = time.perf_counter() - start
+
+    # Прежний вариант оставлял имя группы только у первого столбца группы
+    assert current['Продажи июль 26'].equals(legacy['июль 26'])
+    assert len(current) == len(legacy) == ROWS
+    print(f'{ROWS} строк, {current.shape[1]} столбцов')
+    print(f'remove_merge + read_excel: {legacy_time:6.2f} s')
+    print(f'read_table:                {current_time:6.2f} s')
+
+
+if __name__ == '__main__':
+    main()
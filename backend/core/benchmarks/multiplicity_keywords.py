@@ -0,0 +1,74 @@
+"""
+Кратность по ключевым словам: перебор групп с проверкой каждого слова (как в исходном MultiplicityReport)
+и автомат KeywordAutomaton, который находит все группы за один проход по названию. 200 000 названий.
+
+Запуск из каталога backend:
+    python -m core.benchmarks.multiplicity_keywords
+"""
+import random
+import time
+
+from core.excel.multiplicity_report import keyword_multiplicity
+from core.excel.rules import from_settings
+
+ROWS = 200_000
+NOISE = ['левый', 'правый', 'передний', 'задний', 'в сборе', 'оригинал', 'toyota', 'kia', 'ваз 2110', '(1шт)',
+         'ремкомплект', 'с датчиком', 'hyundai solaris', 'комплект']
+
+
+def make_products(rules):
+    rng = random.Random(0)
+    words = [word for keywords in rules.key_words.values() for word in keywords]
+    anti = [word for keywords in rules.anti_key_words.values() for word in keywords]
+    products = []
+    for _ in range(ROWS):
+        parts = rng.sample(NOISE, 2)
+        if rng.random() < 0.7:
+            parts.insert(0, rng.choice(words))
+        if rng.random() < 0.2:
+            parts.append(rng.choice(anti))
+        products.append(' '.join(parts).lower().strip())
+    return products
+
+
+def legacy_multiplicity(product, key_words, anti_key_words, multiplicity):
+    result = 1
+    for group, keywords in key_words.items():
+        if any(word in product for word in keywords) or any(word == product for word in keywords):
+            anti_key = anti_key_words.get(group, [])
+            normalized_words = product.replace('(', '').replace(')', '').split(' ')
+            if anti_key and any(word in normalized_words for word in anti_key):
+                result = 1
+                break
+            elif anti_key and not any(word in normalized_words for word in anti_key):
+                result = multiplicity[group]
+                break
+            result = multiplicity[group]
+    return result
+
+
+def main():
+    rules = from_settings()
+    products = make_products(rules)
+
+    start = time.perf_counter()
+    legacy = [legacy_multiplicity(product, rules.key_words, rules.anti_key_words, rules.multiplicity)
+              for product in products]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    automaton = rules.key_words_automaton
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    matched = [keyword_multiplicity(product, rules) for product in products]
+    automaton_time = time.perf_counter() - start
+
+    assert legacy == matched
+    print(f'{ROWS} названий, {sum(map(len, rules.key_words.values()))} ключевых слов, '
+          f'{len(automaton.transitions)} состояний автомата')
+    print(f'перебор групп:     {legacy_time * 1000:8.1f} ms')
+    print(f'автомат:           {automaton_time * 1000:8.1f} ms (построение {build_time * 1000:.1f} ms)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Отчёт по кратности: загрузка всей книги (ячейки openpyxl + DataFrame, запись столбца D по ячейкам)
+и MultiplicityReport: чтение в режиме read_only, запись xlsxwriter (constant_memory).
+Каждый вариант запускается в отдельном процессе, чтобы пиковый RSS не смешивался.
+
+Запуск из каталога backend:
+    python -m core.benchmarks.multiplicity_report
+"""
+import contextlib
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROWS = (50_000, 200_000)
+MODES = ('workbook', 'stream')
+NAMES = ['Свеча зажигания', 'Амортизатор передний левый', 'Колодки тормозные', 'Втулка стабилизатора',
+         'Комплект ГРМ', 'Фильтр масляный', 'Стойка стабилизатора']
+
+
+def make_file(path: str, rows: int):
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    sheet = workbook.add_worksheet()
+    sheet.write_row(0, 0, ['Бренд', 'Наименование', 'Номер по каталогу', 'Кратность', 'Остаток', 'Цена'])
+    for row in range(1, rows + 1):
+        sheet.write_row(row, 0, ['BOSCH', f'{NAMES[row % len(NAMES)]} {row % 1000}',
+                                 f'A{row:07d}{"LR" if row % 11 == 0 else ""}', None, row % 50, row * 0.5])
+    workbook.close()
+
+
+def workbook_round_trip(file_bytes: bytes) -> bytes:
+    """Прежняя обработка: вся книга в памяти"""
+    import pandas as pd
+    from openpyxl import load_workbook
+    from core.excel.multiplicity_report import multiplicity_column
+    from core.excel.rules import get_rules
+
+    workbook = load_workbook(io.BytesIO(file_bytes), data_only=True)
+    sheet = workbook.active
+    header = [cell.value for cell in sheet[1]]
+    data = list(sheet.iter_rows(min_row=2, max_row=sheet.max_row, values_only=True))
+    df = pd.DataFrame(data, columns=header).fillna('')
+    for ind, value in enumerate(multiplicity_column(df, get_rules()).tolist(), start=2):
+        sheet[f'D{ind}'] = value
+    output_stream = io.BytesIO()
+    workbook.save(output_stream)
+    return output_stream.getvalue()
+
+
+def run(mode: str, path: str) -> dict:
+    from core.excel.multiplicity_report import MultiplicityReport
+
+    with open(path, 'rb') as f:
+        file_bytes = f.read()
+    start = time.perf_counter()
+    if mode == 'workbook':
+        result = workbook_round_trip(file_bytes)
+    else:
+        # Отладочный вывод процессора не должен попасть в JSON с результатом
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = MultiplicityReport(file_bytes, 'report.xlsx').process()
+    elapsed = time.perf_counter() - start
+    return {'time': elapsed, 'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            'size_kb': len(result) / 1024}
+
+
+def main():
+    print(f'{"rows":>8} {"mode":>10} {"time, s":>8} {"peak RSS, MB":>13} {"size, KB":>9}')
+    for rows in ROWS:
+        with tempfile.NamedTemporaryFile(suffix='.xlsx') as tmp:
+            make_file(tmp.name, rows)
+            for mode in MODES:
+                output = subprocess.check_output([sys.executable, '-m', 'core.benchmarks.multiplicity_report',
+                                                  mode, tmp.name])
+                result = json.loads(output)
+                print(f'{rows:>8} {mode:>10} {result["time"]:>8.2f} {result["rss_mb"]:>13.0f} '
+                      f'{result["size_kb"]:>9.0f}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        print(json.dumps(run(sys.argv[1], sys.argv[2])))
+    else:
+        main()
@@ -0,0 +1,80 @@
+"""
+Чтение широкого прайса (60 столбцов): pd.read_excel(engine='openpyxl'),
+потоковое чтение xlsx_reader.read_xlsx, оно же только по нужным столбцам
+и полная обработка PriceListEdit, которая читает столбцы по PRICE_SETTINGS.
+Каждый вариант запускается в отдельном процессе, чтобы пиковый RSS не смешивался.
+
+Запуск из каталога backend:
+    python -m core.benchmarks.price_list_reader
+"""
+import contextlib
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROWS = (20_000,)
+COLUMNS = 60
+USECOLS = [0, 1, 2, 3, 4]
+MODES = ('read_excel', 'stream', 'stream_usecols', 'price_list')
+# Заголовки совпадают с PRICE_SETTINGS['Спутник']
+HEADER = ['Артикул', 'Бренд', 'Наименование', 'Цена', 'Кол-во']
+
+
+def make_file(path: str, rows: int):
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    sheet = workbook.add_worksheet()
+    sheet.write_row(0, 0, [*HEADER, *(f'Столбец {i}' for i in range(len(HEADER), COLUMNS))])
+    for row in range(1, rows + 1):
+        sheet.write_row(row, 0, [f'A{row:07d}', 'BOSCH', 'Колодки тормозные', row * 0.5, row % 100,
+                                 *(row + i for i in range(COLUMNS - 5))])
+    workbook.close()
+
+
+def run(mode: str, path: str) -> dict:
+    import pandas as pd
+    from core.excel.price_list_edit import PriceListEdit
+    from core.excel.xlsx_reader import read_xlsx
+
+    with open(path, 'rb') as f:
+        file_bytes = f.read()
+    start = time.perf_counter()
+    if mode == 'read_excel':
+        df = pd.read_excel(io.BytesIO(file_bytes), engine='openpyxl')
+    elif mode == 'stream':
+        df = read_xlsx(file_bytes)
+    elif mode == 'stream_usecols':
+        df = read_xlsx(file_bytes, usecols=USECOLS)
+    else:
+        # Отладочный вывод процессора не должен попасть в JSON с результатом
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = PriceListEdit(file_bytes, 'Спутник.xlsx').get_stream
+        df = pd.read_excel(io.BytesIO(result), nrows=0)
+    elapsed = time.perf_counter() - start
+    return {'time': elapsed, 'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            'shape': list(df.shape)}
+
+
+def main():
+    print(f'{"rows":>8} {"mode":>15} {"time, s":>8} {"peak RSS, MB":>13} {"shape":>12}')
+    for rows in ROWS:
+        with tempfile.NamedTemporaryFile(suffix='.xlsx') as tmp:
+            make_file(tmp.name, rows)
+            for mode in MODES:
+                output = subprocess.check_output([sys.executable, '-m', 'core.benchmarks.price_list_reader',
+                                                  mode, tmp.name])
+                result = json.loads(output)
+                print(f'{rows:>8} {mode:>15} {result["time"]:>8.2f} {result["rss_mb"]:>13.0f} '
+                      f'{"x".join(map(str, result["shape"])):>12}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        print(json.dumps(run(sys.argv[1], sys.argv[2])))
+    else:
+        main()
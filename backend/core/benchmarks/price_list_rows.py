@@ -0,0 +1,66 @@
+"""
+Сборка строк прайса в PriceListEdit: построчный iterrows (старый путь)
+и векторная сборка через маску заполненности и reindex.
+
+Запуск из каталога backend:
+    python -m core.benchmarks.price_list_rows
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.excel.price_list_edit import PriceListEdit
+
+ROWS = (10_000, 100_000, 300_000)
+FILE_NAME = 'Спутник.xlsx'
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'Бренд': rng.choice(['NGK', 'BOSCH', 'MANN', 'LEMFORDER'], rows),
+        'Артикул': [f'A{i:07d}' for i in range(rows)],
+        'Наименование': rng.choice(['Свеча', 'Фильтр', 'Колодки'], rows),
+        'Цена': rng.uniform(10, 5000, rows).round(2),
+        'Кол-во': rng.integers(0, 100, rows),
+        'Склад': None,
+    })
+    # Каждая двадцатая строка - разделитель с одним заполненным значением
+    df.loc[::20, ['Бренд', 'Наименование', 'Цена', 'Кол-во']] = None
+    return df
+
+
+def run_rows(df: pd.DataFrame, new_columns: list) -> pd.DataFrame:
+    """Старый путь: словарь на каждую строку"""
+    rows = []
+    for _, row in df.iterrows():
+        if len([col for col in row.tolist() if pd.isna(col) != True]) < 2:
+            continue
+        rows.append({col: row.get(col) for col in new_columns})
+    return pd.DataFrame(rows)
+
+
+def run_vectorized(processor: PriceListEdit, df: pd.DataFrame) -> pd.DataFrame:
+    return processor._PriceListEdit__create_dataframe(df)
+
+
+def main():
+    processor = PriceListEdit(b'', FILE_NAME)
+    print(f'{"rows":>8} {"iterrows, ms":>14} {"vectorized, ms":>16} {"speedup":>8}')
+    for rows in ROWS:
+        df = make_frame(rows)
+        start = time.perf_counter()
+        result = run_vectorized(processor, df)
+        vectorized = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = run_rows(df, result.columns.tolist())
+        legacy = time.perf_counter() - start
+
+        assert len(expected) == len(result)
+        print(f'{rows:>8} {legacy * 1000:>14.1f} {vectorized * 1000:>16.1f} {legacy / vectorized:>7.0f}x')
+
+
+if __name__ == '__main__':
+    main()
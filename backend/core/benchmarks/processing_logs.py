@@ -0,0 +1,81 @@
+"""
+Построчный вывод при обработке: print() в каждой строке (в воркере Celery stdout перенаправлен в лог,
+каждая строка - отдельная запись) и logger.debug с отложенным форматированием, который на уровне INFO
+не форматирует и не пишет сообщение. Построчный расчёт потребности calculate_sales_recipient
+(core.benchmarks.universal_report), 50 000 строк.
+
+Запуск из каталога backend:
+    python -m core.benchmarks.processing_logs
+"""
+import contextlib
+import logging
+import random
+import tempfile
+import time
+
+import pandas as pd
+from celery.utils.log import LoggingProxy
+
+from core.benchmarks.universal_report import MONTHS, calculate_sales, calculate_sales_recipient
+from core.excel import universal_report
+from core.excel.universal_report import DEEP
+
+ROWS = 50_000
+
+
+def make_frame() -> pd.DataFrame:
+    rng = random.Random(0)
+    data = {month: [rng.choice([None, rng.randrange(20)]) for _ in range(ROWS)] for month in MONTHS}
+    data.update({
+        'Матрица': [rng.choice([None, 'да', 'да']) for _ in range(ROWS)],
+        'Кратн.': [rng.choice([1, 2, 4]) for _ in range(ROWS)],
+        'сумма + покуп.': [rng.choice(['A', 'B', 'C', 'D', None]) for _ in range(ROWS)],
+        'Св. ост.': [rng.choice([None, rng.randrange(30)]) for _ in range(ROWS)],
+        'В пути': [rng.choice([None, rng.randrange(5)]) for _ in range(ROWS)],
+        'Номенклатура Производитель': ['BOSCH'] * ROWS,
+        '№ по каталогу': [f'A{i:06d}' for i in range(ROWS)],
+        'Склад': [rng.choice(['Склад 1', 'Склад 2', 'Склад 3']) for _ in range(ROWS)],
+    })
+    return pd.DataFrame(data)
+
+
+def legacy_calculate_sales_recipient(row):
+    """Прежний вариант: print в каждой строке"""
+    if pd.isna(row['Матрица']):
+        return 0
+    avg_sales = calculate_sales(row, row['Кратн.'])
+    print(
+        f'Cредняя продажа: {avg_sales}, Бренд: {row["Номенклатура Производитель"]}, Номенклатура: {row["№ по каталогу"]}, Склад: {row["Склад"]}')
+    deep = DEEP.get(row['сумма + покуп.'], 1) if not pd.isna(row['сумма + покуп.']) else 1
+    werehouse = (0 if pd.isna(row['Св. ост.']) else row['Св. ост.']) + (0 if pd.isna(row['В пути']) else row['В пути'])
+    demand = ((avg_sales * deep - werehouse) // row['Кратн.']) * row['Кратн.']
+    return max(demand, 0)
+
+
+def main():
+    df = make_frame()
+    universal_report.logger.setLevel(logging.INFO)
+    with tempfile.NamedTemporaryFile('w') as log_file:
+        # Как в воркере Celery: stdout перенаправлен в логгер, записи пишутся в файл лога
+        redirected = logging.getLogger('celery.redirected')
+        redirected.propagate = False
+        redirected.addHandler(logging.StreamHandler(log_file))
+        proxy = LoggingProxy(redirected, logging.WARNING)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(proxy):
+            legacy = df.apply(legacy_calculate_sales_recipient, axis=1)
+        print_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    current = df.apply(calculate_sales_recipient, axis=1)
+    logger_time = time.perf_counter() - start
+
+    assert legacy.equals(current)
+    print(f'{ROWS} строк')
+    print(f'print в лог воркера:  {print_time:6.2f} s')
+    print(f'logger.debug:         {logger_time:6.2f} s')
+
+
+if __name__ == '__main__':
+    main()
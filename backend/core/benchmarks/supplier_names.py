@@ -0,0 +1,56 @@
+"""
+Определение поставщика по имени файла: перебор всех PRICE_NAMES с all(word in words)
+и обратный индекс SupplierNameIndex. 500 поставщиков, 10 000 имён файлов.
+
+Запуск из каталога backend:
+    python -m core.benchmarks.supplier_names
+"""
+import random
+import time
+
+from core.excel.supplier_names import SupplierNameIndex
+
+SUPPLIERS = 500
+FILES = 10_000
+
+
+def make_names():
+    rng = random.Random(0)
+    price_names = {f'Поставщик {i}': [f'supplier{i}', rng.choice(['price', 'stock', 'ostatki'])]
+                   for i in range(SUPPLIERS)}
+    files = [f'{rng.choice(["price", "stock", "ostatki"])}_supplier{rng.randrange(SUPPLIERS * 2)}_2024'
+             for _ in range(FILES)]
+    return price_names, files
+
+
+def legacy_resolve(price_names: dict, base_name: str):
+    words_file_name = base_name.split('_')
+    for key, value in price_names.items():
+        if all(word in words_file_name for word in value):
+            return key
+    return None
+
+
+def main():
+    price_names, files = make_names()
+
+    start = time.perf_counter()
+    legacy = [legacy_resolve(price_names, name) for name in files]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = SupplierNameIndex(price_names)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    indexed = [index.resolve(name) for name in files]
+    index_time = time.perf_counter() - start
+
+    matched = [(a, b) for a, b in zip(legacy, indexed) if a]
+    assert all(a == b for a, b in matched)
+    print(f'{SUPPLIERS} поставщиков, {FILES} имён файлов')
+    print(f'перебор:           {legacy_time * 1000:8.1f} ms')
+    print(f'индекс:            {index_time * 1000:8.1f} ms (построение {build_time * 1000:.1f} ms)')
+
+
+if __name__ == '__main__':
+    main()
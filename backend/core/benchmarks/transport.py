@@ -0,0 +1,85 @@
+"""
+Сравнение передачи файла в process_single_file_task:
+base64 в JSON через брокер/result backend и передача ключа файла в хранилище задач.
+
+Запуск из каталога backend:
+    python -m core.benchmarks.transport
+"""
+import base64
+import io
+import os
+import tempfile
+import time
+
+from django.conf import settings
+
+SIZES_MB = (1, 10, 50)
+
+
+def setup_storage(location: str):
+    if not settings.configured:
+        settings.configure(STORAGES={
+            'tasks': {
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': location},
+            },
+        })
+
+
+def dumps(body) -> bytes:
+    from kombu.serialization import dumps as kombu_dumps
+    _, _, payload = kombu_dumps(body, serializer='json')
+    return payload if isinstance(payload, bytes) else payload.encode('utf-8')
+
+
+def loads(payload: bytes):
+    from kombu.serialization import loads as kombu_loads
+    return kombu_loads(payload, 'application/json', 'utf-8')
+
+
+def run_base64(data: bytes, file_name: str):
+    """Старый путь: view -> broker -> worker -> result backend -> view"""
+    start = time.perf_counter()
+    message = dumps(([base64.b64encode(data).decode('utf-8'), file_name, 'price'], {}, {}))
+    args, _, _ = loads(message)
+    file_bytes = base64.b64decode(args[0])
+    result = dumps({'success': True, 'file_content': base64.b64encode(file_bytes).decode('utf-8'), 'meta': {}})
+    base64.b64decode(loads(result)['file_content'])
+    return len(message), len(result), time.perf_counter() - start
+
+
+def run_storage(data: bytes, file_name: str):
+    """Новый путь: файл пишется в хранилище задач, через брокер идёт только ключ"""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from core.utils import task_files
+
+    start = time.perf_counter()
+    upload = SimpleUploadedFile(file_name, data)
+    input_key = task_files.save_upload(upload)
+    message = dumps(([input_key, file_name, 'price'], {}, {}))
+    args, _, _ = loads(message)
+    file_bytes = task_files.read_bytes(args[0])
+    output_key = task_files.save_bytes(file_bytes, file_name)
+    task_files.delete(input_key)
+    result = dumps({'success': True, 'file_key': output_key, 'size': len(file_bytes), 'meta': {}})
+    with task_files.get_storage().open(loads(result)['file_key'], 'rb') as f:
+        for _ in iter(lambda: f.read(io.DEFAULT_BUFFER_SIZE * 64), b''):
+            pass
+    elapsed = time.perf_counter() - start
+    task_files.delete(output_key)
+    return len(message), len(result), elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as location:
+        setup_storage(location)
+        print(f'{"MB":>4} {"mode":>8} {"broker, B":>12} {"result, B":>12} {"time, ms":>10}')
+        for size in SIZES_MB:
+            data = os.urandom(size * 1024 * 1024)
+            for mode, runner in (('base64', run_base64), ('storage', run_storage)):
+                broker, result, elapsed = runner(data, 'price.xlsx')
+                print(f'{size:>4} {mode:>8} {broker:>12} {result:>12} {elapsed * 1000:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
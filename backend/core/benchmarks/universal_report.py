@@ -0,0 +1,194 @@
+"""
+Распределение излишков universal_report: прежний цикл по номенклатуре (два фильтра всего отчёта
+на каждый номер, apply по строкам и iterrows) и distribute (groupby по товарам, потребность и излишки
+по столбцам, распределение через накопленную сумму). Отдельно - средняя продажа и ранг: apply построчных
+функций и sales_statistics по матрице продаж. 13 месяцев продаж, 20 складов.
+
+Запуск из каталога backend:
+    python -m core.benchmarks.universal_report
+"""
+import math
+import random
+import time
+
+import pandas as pd
+
+from core.excel.universal_report import ABC_RANK, DEEP, LAST_MONTHS_RANK, distribute, sales_statistics
+from core.utils.logging import logger
+
+ITEMS = (200, 1000)
+WAREHOUSES = [f'Склад {i}' for i in range(1, 21)]
+SENDER = 'Склад 1'
+DEPTH = 2
+MONTHS = ['июль 25', 'авг. 25', 'сент. 25', 'окт. 25', 'нояб. 25', 'дек. 25', 'янв. 26', 'февр. 26',
+          'март 26', 'апр. 26', 'май 26', 'июнь 26', 'июль 26']
+
+
+def make_report(items: int) -> pd.DataFrame:
+    rng = random.Random(items)
+    rows = []
+    for item in range(items):
+        brand = rng.choice(['BOSCH', 'NGK', 'MANN', 'TRW'])
+        multiplicity = rng.choice([1, 1, 2, 4])
+        for warehouse in WAREHOUSES:
+            row = {'Номенклатура Производитель': brand, '№ по каталогу': f'A{item:06d}', 'Склад': warehouse,
+                   'Матрица': rng.choice([None, 'да', 'да']), 'Кратн.': multiplicity,
+                   'сумма + покуп.': rng.choice(['A', 'B', 'C', 'D', None]),
+                   'Св. ост.': rng.choice([None, 0, rng.randrange(60)]),
+                   'В пути': rng.choice([None, None, rng.randrange(5)])}
+            row.update({month: rng.choice([None, rng.randrange(15)]) for month in MONTHS})
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+# Прежний построчный расчёт по списку месяцев MONTHS
+def get_sales(row):
+    return [row[mount] for mount in MONTHS if not pd.isna(row[mount])]
+
+
+def goods_rank(row):
+    sales = [row[mount] if not pd.isna(row[mount]) else 0 for mount in MONTHS]
+    last_months = sales[-3:]
+    last_months = [x for x in last_months if not pd.isna(x)]
+    mounts = len(get_sales(row))
+    mounts_rank = mounts / 13 if mounts else 0
+    if not pd.isna(row['сумма + покуп.']) and row['сумма + покуп.'] in ABC_RANK.keys():
+        abc_rank = ABC_RANK[row['сумма + покуп.']]
+    else:
+        abc_rank = 0
+    avg_sales = calculate_sales(row, row['Кратн.'])
+    avg_weigth = min(avg_sales / 1000, 2)
+
+    rating = (abc_rank * 0.3 + mounts_rank * 0.4 + avg_weigth * 0.1 + LAST_MONTHS_RANK[len(last_months)] * 0.2) * 100
+    return round(rating, 2)
+
+
+def calculate_sales(row, multiplicity):
+    sales = get_sales(row)
+    if len(sales) == 0:
+        return 0
+    original_sales = [row[mount] if not pd.isna(row[mount]) else 0 for mount in MONTHS]
+    last_months_sales = original_sales[-3:]
+    if not last_months_sales:
+        return 0
+
+    max_sales = max(last_months_sales)
+    # round_sales = math.ceil(((sum(sales) / len(sales)) / multiplicity))
+    # avg_sales = max(max_sales, round_sales * multiplicity)
+    round_sales = math.ceil(sum(sales) / len(sales))
+    avg_sales = max(max_sales, round_sales)
+    return avg_sales
+
+
+def calculate_sales_sender(row, deep=0):
+    avg_sales = calculate_sales(row, row['Кратн.'])
+    werehouse = row['Св. ост.']
+    if werehouse == 0:
+        logger.debug('Нет остатков: %s', row['№ по каталогу'])
+        return 0
+    if werehouse >= avg_sales * deep:
+        excess = werehouse - avg_sales * deep
+        logger.debug('Излишки %s: %s', row['№ по каталогу'], excess)
+    else:
+        excess = 0
+    return excess
+
+
+def calculate_sales_recipient(row):
+    if pd.isna(row['Матрица']):
+        return 0
+
+    avg_sales = calculate_sales(row, row['Кратн.'])
+    logger.debug('Средняя продажа: %s, Бренд: %s, Номенклатура: %s, Склад: %s',
+                 avg_sales, row['Номенклатура Производитель'], row['№ по каталогу'], row['Склад'])
+    if not pd.isna(row['сумма + покуп.']) and row['сумма + покуп.'] in DEEP.keys():
+        deep = DEEP[row['сумма + покуп.']]
+    else:
+        deep = 1
+    if pd.isna(row['Св. ост.']) and pd.isna(row['В пути']):
+        werehouse = 0
+    elif pd.isna(row['Св. ост.']) and not pd.isna(row['В пути']):
+        werehouse = row['В пути']
+    elif not pd.isna(row['Св. ост.']) and pd.isna(row['В пути']):
+        werehouse = row['Св. ост.']
+    else:
+        werehouse = row['Св. ост.'] + row['В пути']
+    demand = ((avg_sales * deep - werehouse) // row['Кратн.']) * row['Кратн.']
+    if demand < 0:
+        return 0
+
+    return demand
+
+
+def legacy_distribute_goods(sender_df, recipient_df):
+    total_surplus = sender_df['Излишки'].iloc[0]
+    result_df = recipient_df.copy()
+    result_df = result_df.sort_values('Ранг', ascending=False, kind='stable').reset_index(drop=True)
+    result_df['Сред. продажа'] = result_df.apply(calculate_sales, axis=1, args=(result_df['Кратн.'].iloc[0],))
+    result_df['Излишки'] = total_surplus
+    result_df['Отправлено'] = False
+    result_df['остаток_потребности'] = result_df['Потребность'].copy()
+    result_df['К перемещению'] = 0
+    remaining_surplus = total_surplus
+    for index, row in result_df.iterrows():
+        if remaining_surplus <= 0:
+            break
+        need = row['остаток_потребности']
+        if need > 0:
+            allocation = min(need, remaining_surplus)
+            result_df.at[index, 'К перемещению'] = allocation
+            result_df.at[index, 'Отправлено'] = allocation > 0
+            result_df.at[index, 'остаток_потребности'] = need - allocation
+            remaining_surplus -= allocation
+    result_df['остаток_излишков'] = remaining_surplus
+    return result_df
+
+
+def legacy_distribute(df: pd.DataFrame, sender: str, werehouse_depth: int) -> pd.DataFrame:
+    """Прежний цикл из read_file"""
+    unique_items = df.drop_duplicates(subset=['№ по каталогу'])[['Номенклатура Производитель', '№ по каталогу']]
+    all_distributed_dfa = []
+    for brand, nomenclature in unique_items.itertuples(index=False):
+        sender_df = df[(df['Номенклатура Производитель'] == brand) & (df['№ по каталогу'] == nomenclature) &
+                       (df['Склад'] == sender)].copy()
+        recipient_df = df[(df['Номенклатура Производитель'] == brand) & (df['№ по каталогу'] == nomenclature) &
+                          (df['Склад'] != sender)].copy()
+        sender_df['Излишки'] = sender_df.apply(calculate_sales_sender, axis=1, args=(werehouse_depth,))
+        recipient_df['Потребность'] = recipient_df.apply(calculate_sales_recipient, axis=1)
+        recipient_df['Ранг'] = recipient_df.apply(goods_rank, axis=1)
+        all_distributed_dfa.append(legacy_distribute_goods(sender_df, recipient_df))
+    return pd.concat(all_distributed_dfa, ignore_index=True)
+
+
+def main():
+    for items in ITEMS:
+        df = make_report(items)
+
+        start = time.perf_counter()
+        legacy_statistics = pd.DataFrame({'Сред. продажа': df.apply(calculate_sales, axis=1, args=(None,)),
+                                          'Ранг': df.apply(goods_rank, axis=1)})
+        legacy_statistics_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        statistics = sales_statistics(df)
+        statistics_time = time.perf_counter() - start
+        pd.testing.assert_frame_equal(statistics, legacy_statistics, check_dtype=False)
+
+        start = time.perf_counter()
+        legacy = legacy_distribute(df, SENDER, DEPTH)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = distribute(df, SENDER, DEPTH)
+        distribute_time = time.perf_counter() - start
+
+        pd.testing.assert_frame_equal(result, legacy, check_dtype=False)
+        print(f'{items} товаров x {len(WAREHOUSES)} складов ({len(df)} строк)')
+        print(f'  цикл по номенклатуре: {legacy_time:8.2f} s')
+        print(f'  groupby:              {distribute_time:8.2f} s')
+        print(f'  средняя продажа и ранг по строкам: {legacy_statistics_time:6.2f} s')
+        print(f'  средняя продажа и ранг матрицей:   {statistics_time:6.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Пропускная способность обработки файлов в двух конфигурациях пула:
+    cold - один процесс, новый интерпретатор на каждую задачу (как --concurrency=1 --max-tasks-per-child=1
+           с полной загрузкой модулей в дочернем процессе);
+    warm - несколько дочерних процессов, созданных fork от родителя с уже загруженными модулями,
+           без перезапуска после каждой задачи.
+
+Запуск из каталога backend:
+    python -m core.benchmarks.worker_pool [количество задач] [процессов в warm пуле]
+"""
+import io
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+
+def make_multiplicity_file(rows: int = 5000) -> bytes:
+    names = ['Свеча зажигания', 'Диск тормозной передний', 'Фильтр масляный', 'Втулка стабилизатора']
+    df = pd.DataFrame({
+        'Номер по каталогу': [f'A{i:06d}' for i in range(rows)],
+        'Наименование': [names[i % len(names)] for i in range(rows)],
+        'Бренд': ['NGK'] * rows,
+        'Кратность': [None] * rows,
+    })
+    stream = io.BytesIO()
+    df.to_excel(stream, index=False)
+    return stream.getvalue()
+
+
+def process_file(file_bytes: bytes) -> int:
+    from core.excel.multiplicity_report import MultiplicityReport
+    return len(MultiplicityReport(file_bytes, 'bench.xlsx').get_stream)
+
+
+def preload():
+    import openpyxl  # noqa: F401
+    import pandas.io.excel._openpyxl  # noqa: F401
+    import core.excel.registry  # noqa: F401
+
+
+def run(executor: ProcessPoolExecutor, file_bytes: bytes, jobs: int) -> float:
+    start = time.perf_counter()
+    list(executor.map(process_file, [file_bytes] * jobs))
+    return time.perf_counter() - start
+
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    file_bytes = make_multiplicity_file()
+
+    cold = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'),
+                               max_tasks_per_child=1)
+    with cold:
+        cold_time = run(cold, file_bytes, jobs)
+
+    preload()
+    warm = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+    with warm:
+        warm_time = run(warm, file_bytes, jobs)
+
+    print(f'{"config":>6} {"jobs":>5} {"time, s":>8} {"jobs/s":>7}')
+    print(f'{"cold":>6} {jobs:>5} {cold_time:>8.2f} {jobs / cold_time:>7.2f}')
+    print(f'{"warm":>6} {jobs:>5} {warm_time:>8.2f} {jobs / warm_time:>7.2f}')
+
+
+if __name__ == '__main__':
+    main()
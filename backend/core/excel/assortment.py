@@ -0,0 +1,107 @@
+"""
+Справочник ассортимента: пары (производитель, номер по каталогу) товаров с отметкой ассортимента "Г".
+Строки отчёта, найденные в справочнике, исключаются из результата data_cleaning.
+Процессоры получают справочник через get_assortment() - снимок с хэш-индексом пар, закэшированный в процессе.
+Снимок загружается заново, только когда меняется версия справочника в источнике.
+Источник подключается через set_source (в приложении - база данных, см. core.assortment_store),
+по умолчанию справочник пуст.
+"""
+import io
+import threading
+from typing import Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+ASSORTMENT_MARK = 'Г'
+BRAND_COLUMN = 'Производитель'
+ARTICLE_COLUMN = 'Номер по каталогу'
+MARK_COLUMN = 'Ассортимент'
+
+
+def _text(value) -> str:
+    return str(int(value)) if isinstance(value, float) and value.is_integer() else str(value)
+
+
+def normalize(values: pd.Series) -> pd.Series:
+    """
+        Производитель или номер по каталогу для сравнения: строка без пробелов по краям в нижнем регистре.
+        Целые номера, прочитанные как float (столбец с пропусками), сравниваются без '.0'
+    """
+    return values.map(_text).str.strip().str.lower().where(values.notna(), '')
+
+
+def read_assortment(file_bytes: bytes) -> pd.DataFrame:
+    """
+        Пары (производитель, номер по каталогу) из файла ассортимента.
+        Заголовок во второй строке, используются столбцы C-E (производитель, номер, отметка ассортимента)
+    """
+    df = pd.read_excel(io.BytesIO(file_bytes), skiprows=1, usecols=[2, 3, 4])
+    missing = {BRAND_COLUMN, ARTICLE_COLUMN, MARK_COLUMN} - set(df.columns)
+    if missing:
+        raise ValueError(f'В файле ассортимента нет столбцов: {", ".join(sorted(missing))}')
+    df = df[df[MARK_COLUMN] == ASSORTMENT_MARK]
+    pairs = pd.DataFrame({'brand': normalize(df[BRAND_COLUMN]), 'article': normalize(df[ARTICLE_COLUMN])})
+    return pairs[(pairs['brand'] != '') & (pairs['article'] != '')].drop_duplicates(ignore_index=True)
+
+
+class Assortment:
+
+    def __init__(self, version: str, pairs: Iterable[Tuple[str, str]]):
+        self.version = version
+        pairs = list(pairs)
+        brands = [brand for brand, _ in pairs]
+        articles = [article for _, article in pairs]
+        # Хэш-таблица индекса строится при первом поиске и хранится вместе со снимком
+        self.index = pd.MultiIndex.from_arrays([brands, articles]).unique()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def contains(self, brands: pd.Series, articles: pd.Series) -> np.ndarray:
+        """Маска строк, пара (производитель, номер по каталогу) которых есть в справочнике"""
+        if not len(self.index):
+            return np.zeros(len(brands), dtype=bool)
+        keys = pd.MultiIndex.from_arrays([normalize(brands), normalize(articles)])
+        return self.index.get_indexer(keys) >= 0
+
+
+class AssortmentSource:
+    """Пустой справочник"""
+
+    def version(self) -> str:
+        return ''
+
+    def load(self) -> Assortment:
+        return Assortment('', [])
+
+
+_source = AssortmentSource()
+_snapshot = None
+_lock = threading.Lock()
+
+
+def set_source(source: AssortmentSource) -> None:
+    global _source
+    _source = source
+    invalidate()
+
+
+def invalidate() -> None:
+    global _snapshot
+    _snapshot = None
+
+
+def get_assortment() -> Assortment:
+    """Снимок справочника. Версия проверяется при каждом вызове, справочник загружается при её изменении"""
+    global _snapshot
+    version = _source.version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _lock:
+        if _snapshot is not None and _snapshot.version == version:
+            return _snapshot
+        snapshot = _source.load()
+        _snapshot = snapshot
+    return snapshot
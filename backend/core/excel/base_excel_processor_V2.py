@@ -1,18 +1,26 @@
+from ..utils.logging import logger
+
+
 class ExcelProcessor:
     @staticmethod
-    def process(file_bytes, file_name, report):
+    def success_meta(file_name: str) -> dict:
+        return {
+            'filename': file_name,
+            'success': True,
+            'message': f'Файл успешно обработан: {file_name}!'
+        }
+
+    @staticmethod
+    def process(file_bytes, file_name, report, params=None):
         try:
-            editor = report(file_bytes, file_name)
+            editor = report(file_bytes, file_name, params)
             processed_stream = editor.get_stream
             new_filename = editor.get_file_name
+            editor.stats.log()
 
-            return processed_stream, {
-                'filename': new_filename,
-                'success': True,
-                'message': f'Файл успешно обработан: {new_filename}!'
-            }
+            return processed_stream, ExcelProcessor.success_meta(new_filename)
         except Exception as e:
-
+            logger.warning('Ошибка обработки файла %s: %s', file_name, e)
             return file_bytes, {
                 'filename': file_name,
                 'success': False,
@@ -1,13 +1,34 @@
 from abc import ABC, abstractmethod
 
+from . import headers
+from ..utils.logging import ProcessingStats
 
-class BaseProcessingFiles(ABC):
 
-    def __init__(self, file_bytes: bytes, file_name: str):
+class BaseProcessingFiles(ABC):
+    # Версия логики обработки. Увеличивается при изменении результата обработки,
+    # входит в версию правил для кэша результатов
+    VERSION = 1
+    # Результат зависит от имени входного файла (а не только имя результата),
+    # имя файла входит в ключ кэша результатов
+    NAME_DEPENDENT = False
+
+    def __init__(self, file_bytes: bytes, file_name: str, params: dict = None):
         self.file_name = file_name
         self.file_bytes = file_bytes
+        # Параметры обработки из запроса загрузки, проверенные parse_params
+        self.params = params or {}
         self._processed_data = None
+        # Этапы и счётчики обработки, итог пишется в лог после обработки файла
+        self.stats = ProcessingStats(file_name)
 
+    @classmethod
+    def parse_params(cls, data) -> dict:
+        """
+            Проверка параметров обработки из запроса загрузки (QueryDict или dict).
+            Возвращает параметры для передачи в задачу, при ошибке выбрасывает ValueError.
+            По умолчанию процессор параметров не принимает
+        """
+        return {}
 
     @abstractmethod
     def process(self) -> tuple[bytes, str]:
@@ -22,6 +43,10 @@ class BaseProcessingFiles(ABC):
             self._processed_data = self.process()
         return self._processed_data
 
+    def read_table(self, header_rows: int = 1, skiprows: int = 0):
+        """Первый лист файла с плоским заголовком из header_rows строк (объединённые ячейки заголовка учитываются)"""
+        return headers.read_table(self.file_bytes, header_rows, skiprows, self.file_name)
+
     @property
     @abstractmethod
     def get_stream(self) -> bytes:
@@ -0,0 +1,77 @@
+"""
+Чтение CSV прайсов: кодировка и разделитель определяются по началу файла,
+после чего файл разбирается один раз.
+Параметры определяются для каждого файла: поставщик может сменить кодировку, а анализ образца
+в SAMPLE_SIZE байт занимает доли миллисекунды.
+"""
+import codecs
+import csv
+import io
+
+import pandas as pd
+
+SAMPLE_SIZE = 64 * 1024
+ENCODINGS = ('utf-8', 'cp1251', 'latin1')
+DELIMITERS = ';,\t|'
+DEFAULT_DELIMITER = ';'
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def _decode_sample(sample: bytes, encoding: str):
+    """Декодирование начала файла, незаконченный многобайтовый символ в конце не считается ошибкой"""
+    try:
+        return codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return None
+
+
+def detect_encoding(sample: bytes) -> str:
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+    for encoding in ENCODINGS:
+        if _decode_sample(sample, encoding) is not None:
+            return encoding
+    return ENCODINGS[-1]
+
+
+def detect_delimiter(text: str) -> str:
+    # Последняя строка образца может быть обрезана
+    lines = text.splitlines()[:-1] or text.splitlines()
+    try:
+        return csv.Sniffer().sniff('\n'.join(lines), delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        return DEFAULT_DELIMITER
+
+
+def sniff(file_bytes: bytes) -> tuple[str, str]:
+    """Кодировка и разделитель по первым SAMPLE_SIZE байтам файла"""
+    sample = file_bytes[:SAMPLE_SIZE]
+    encoding = detect_encoding(sample)
+    text = _decode_sample(sample, encoding) or ''
+    return encoding, detect_delimiter(text)
+
+
+def read_csv(file_bytes: bytes, usecols=None, nrows=None, dtype=None) -> pd.DataFrame:
+    """
+        Чтение CSV за один проход. Если кодировка, найденная по началу файла, не подошла для остальной части,
+        файл перечитывается со следующей кодировкой из ENCODINGS.
+        nrows - число строк данных (0 - только заголовок), dtype - типы столбцов по именам.
+        Ошибки разбора не перехватываются
+    """
+    encoding, delimiter = sniff(file_bytes)
+    candidates = [encoding]
+    if encoding in ENCODINGS:
+        candidates.extend(ENCODINGS[ENCODINGS.index(encoding) + 1:])
+    for encoding in candidates:
+        try:
+            df = pd.read_csv(io.BytesIO(file_bytes), encoding=encoding, delimiter=delimiter, usecols=usecols,
+                             nrows=nrows, dtype=dtype, low_memory=False)
+        except UnicodeDecodeError:
+            continue
+        return df
+    raise ValueError(f'Не удалось определить кодировку файла, проверены: {", ".join(candidates)}')
@@ -1,17 +1,20 @@
 import io
-from io import BytesIO
 
 import pandas as pd
 from openpyxl import load_workbook, Workbook
 from openpyxl.worksheet.worksheet import Worksheet
-from .settings import UNNECESSARY_BRANDS
+from .rules import get_rules
 from .base_processing_files import BaseProcessingFiles
+from .xlsx_patch import XlsxPatchError, patch_column
+from .xlsx_reader import XlsxReadError, read_xlsx
+from ..utils.logging import logger
 
 
 class GoodsMovementReport(BaseProcessingFiles):
-    def __init__(self, file_bytes: bytes, file_name: str):
-        super().__init__(file_bytes, file_name)
+    def __init__(self, file_bytes: bytes, file_name: str, params: dict = None):
+        super().__init__(file_bytes, file_name, params)
         self._processed_data = None
+        self.unnecessary_brands = set(get_rules().unnecessary_brands)
 
     @property
     def get_stream(self):
@@ -28,11 +31,11 @@ class GoodsMovementReport(BaseProcessingFiles):
             self._processed_data = self.process()
         return self._processed_data
 
-    def unnecessary_brand_del(self, row: dict) -> None:
-        brand = row.get('Производитель', '').lower()
-        if brand in UNNECESSARY_BRANDS:
-            print(f'Бренд {brand} не нужен')
-            row['К перемещению К'] = ''
+    def unnecessary_brand_del(self, df: pd.DataFrame) -> pd.Series:
+        """Строки с ненужными брендами"""
+        if 'Производитель' not in df:
+            return pd.Series(False, index=df.index)
+        return df['Производитель'].fillna('').astype(str).str.lower().isin(self.unnecessary_brands)
 
     def openpyxl_open_file(self, stream: io.BytesIO):
         """Открытие файла с помощью openpyxl для сохранения в тот же файл"""
@@ -56,84 +59,80 @@ class GoodsMovementReport(BaseProcessingFiles):
 
         return worksheet
 
-    def pandas_open_file(self, stream: io.BytesIO):
-        """Открытие файла с помощью pandas"""
-        return pd.read_excel(stream)
-
-    def adding_the_amount_of_movement(self, row: dict) -> None:
-        """Добавление кол-ва перемещения в столбец К перемещению К"""
-        if row['Кол-во к перем.'] != '':
-            row['К перемещению К'] = row['Кол-во к перем.']
-
-    def multiplicity_check(self, row: dict) -> None:
-        """Проверка кратности"""
-        amout = row.get('К перемещению К', 0)
-        mult = row.get('Кратность продажи', 1)
-
-        if mult != 1 and amout:
-            remainder = amout % mult
-            if remainder != 0 and amout > mult:
-                print(f'Остаток не кратен кратности, остаток {remainder}')
-                row['К перемещению К'] = amout - remainder
-            elif remainder != 0 and amout < mult:
-                row['К перемещению К'] = mult
-
-    def stock_check(self, row: dict) -> None:
-        """Проверка остатка"""
-        stock = row.get('Остаток отпр', 0)
-        mult = row.get('Кратность продажи', 1)
-        available_balance = row.get('Дост Ост Отпр', 1)
-
-        if stock < mult or available_balance < mult:
-            print(f'Остаток меньше кратности')
-            row['К перемещению К'] = ''
-
-        elif stock < mult * 2:
-            print(f'Остаток меньше кратности * 2')
-            row['К перемещению К'] = ''
-
-    def validate_inventory(self, rows: list) -> dict:
-        """Проверка данных отчёта"""
-        update_rows = {}
-        for i, row in enumerate(rows, start=2):
-            if row['Кол-во к перем.'] != '':
-                self.adding_the_amount_of_movement(row)
-                self.multiplicity_check(row)
-                self.stock_check(row)
-                self.unnecessary_brand_del(row)
-            update_rows[i] = row['К перемещению К']
-
-        return update_rows
+    def pandas_open_file(self) -> pd.DataFrame:
+        """Чтение файла: потоково, если структура файла это позволяет, иначе через pd.read_excel"""
+        try:
+            return read_xlsx(self.file_bytes)
+        except XlsxReadError as e:
+            logger.warning('Файл %s будет прочитан через openpyxl: %s', self.file_name, e)
+        return pd.read_excel(io.BytesIO(self.file_bytes))
+
+    @staticmethod
+    def numeric_column(df: pd.DataFrame, column: str, default) -> pd.Series:
+        """Числовой столбец, пустые и нечисловые значения (и отсутствующий столбец) - default"""
+        if column not in df:
+            return pd.Series(default, index=df.index)
+        return pd.to_numeric(df[column], errors='coerce').fillna(default)
+
+    def adding_the_amount_of_movement(self, df: pd.DataFrame) -> pd.Series:
+        """Кол-во перемещения для столбца К перемещению К, NaN - строка не заполнена"""
+        return pd.to_numeric(df['Кол-во к перем.'], errors='coerce')
+
+    @staticmethod
+    def multiplicity_check(amount: pd.Series, mult: pd.Series) -> pd.Series:
+        """Проверка кратности: больше кратности - округление вниз до кратного, меньше - до кратности"""
+        remainder = amount % mult
+        not_multiple = (mult != 1) & (amount != 0) & remainder.notna() & (remainder != 0)
+        above, below = not_multiple & (amount > mult), not_multiple & (amount < mult)
+        return amount.mask(above, amount - remainder).mask(below, mult)
+
+    def stock_check(self, df: pd.DataFrame, mult: pd.Series) -> pd.Series:
+        """Строки, где остатка не хватает: меньше кратности или меньше двух кратностей"""
+        stock = self.numeric_column(df, 'Остаток отпр', 0)
+        available_balance = self.numeric_column(df, 'Дост Ост Отпр', 1)
+        return (stock < mult) | (available_balance < mult) | (stock < mult * 2)
+
+    def validate_inventory(self, df: pd.DataFrame) -> pd.Series:
+        """Новые значения К перемещению К для строк, где заполнено Кол-во к перем."""
+        amount = self.adding_the_amount_of_movement(df)
+        df = df[amount.notna()]
+        amount = amount[amount.notna()]
+        mult = self.numeric_column(df, 'Кратность продажи', 1)
+
+        checked = self.multiplicity_check(amount, mult)
+        no_stock = self.stock_check(df, mult)
+        unnecessary_brand = self.unnecessary_brand_del(df)
+        self.stats.count('к перемещению', len(amount))
+        self.stats.count('по кратности', (checked != amount).sum())
+        self.stats.count('нет остатка', no_stock.sum())
+        self.stats.count('ненужный бренд', unnecessary_brand.sum())
+        return checked.astype(object).mask(no_stock | unnecessary_brand, '')
 
     def get_datafile(self, df: pd.DataFrame) -> dict:
-        """Получение данных из файла"""
-        rows = df.to_dict(orient='records')
-        result = self.validate_inventory(rows)
-        return result
-
-    def del_nan(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Удаление NaN"""
-        for col in df.columns:
-            if col == 'Кратность продажи':
-                df[col] = df[col].fillna(1)
-            else:
-                df[col] = df[col].fillna('')
-        return df
+        """Изменённые ячейки: {номер строки листа: значение}"""
+        result = self.validate_inventory(df)
+        return dict(zip((result.index + 2).tolist(), result.tolist()))
 
     @staticmethod
     def get_headers_index(df: pd.DataFrame):
         return df.columns.tolist().index('К перемещению К') + 1
 
     def process(self) -> bytes:
-        """Чтение файла"""
-        input_stream = io.BytesIO(self.file_bytes)
-        df = self.pandas_open_file(input_stream)
-        input_stream.seek(0)
-        workbook, worksheet = self.openpyxl_open_file(input_stream)
-        input_stream.seek(0)
-        df = self.del_nan(df)
-        data = self.get_datafile(df)
-        self.openpyxl_update_file(data, worksheet, df)
-        output_stream = self.openpyxl_save_file(workbook)
-
-        return output_stream.getvalue()
+        """
+            Файл разбирается один раз, в исходный файл записывается только столбец К перемещению К.
+            Если лист нельзя изменить напрямую, файл сохраняется через openpyxl
+        """
+        with self.stats.stage('чтение'):
+            df = self.pandas_open_file()
+        self.stats.count('строк', len(df))
+        with self.stats.stage('правила'):
+            data = self.get_datafile(df)
+        try:
+            with self.stats.stage('запись'):
+                return patch_column(self.file_bytes, self.get_headers_index(df) - 1, data)
+        except XlsxPatchError as e:
+            logger.warning('Файл %s будет сохранён через openpyxl: %s', self.file_name, e)
+        with self.stats.stage('запись openpyxl'):
+            workbook, worksheet = self.openpyxl_open_file(io.BytesIO(self.file_bytes))
+            self.openpyxl_update_file(data, worksheet, df)
+            return self.openpyxl_save_file(workbook).getvalue()
@@ -0,0 +1,111 @@
+"""
+Плоский заголовок таблицы из нескольких строк с объединёнными ячейками.
+Лист не изменяется: значения строк и адреса объединённых ячеек берутся при разборе файла,
+значение объединённой ячейки копируется во все ячейки её диапазона в строках заголовка,
+части имени столбца из строк заголовка соединяются через пробел.
+"""
+import io
+import math
+from typing import List, Tuple
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils.cell import range_boundaries
+from pandas.io.parsers import TextParser
+
+from .xlsx_reader import XlsxReadError, _pad, _read_rows
+from ..utils.logging import logger
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == '' or (isinstance(value, float) and math.isnan(value))
+
+
+def _part(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def flatten_header(rows: list, merges: List[str] = (), first_row: int = 1) -> list:
+    """
+        Имена столбцов из строк заголовка.
+        rows - строки заголовка (списки значений), first_row - номер первой из них на листе (с 1),
+        merges - адреса объединённых ячеек листа ('A1:C1').
+        Повторяющиеся подряд части (вертикальное объединение) входят в имя один раз,
+        имя из одной части сохраняет её тип (например, дата), столбец без имени - 'Unnamed: N', как в pandas
+    """
+    last_row = first_row + len(rows) - 1
+    ranges = []
+    for ref in merges:
+        min_col, min_row, max_col, max_row = range_boundaries(ref)
+        # Значение объединённой ячейки хранится в левой верхней ячейке, она должна быть в заголовке
+        if first_row <= min_row <= last_row:
+            ranges.append((min_col, min_row, max_col, min(max_row, last_row)))
+    width = max([len(row) for row in rows] + [max_col for _, _, max_col, _ in ranges] + [0])
+    grid = [list(row) + [''] * (width - len(row)) for row in rows]
+    for min_col, min_row, max_col, max_row in ranges:
+        value = grid[min_row - first_row][min_col - 1]
+        for row in grid[min_row - first_row:max_row - first_row + 1]:
+            row[min_col - 1:max_col] = [value] * (max_col - min_col + 1)
+
+    names = []
+    for index in range(width):
+        parts = []
+        for row in grid:
+            value = _part(row[index])
+            if not _is_empty(value) and (not parts or parts[-1] != value):
+                parts.append(value)
+        if not parts:
+            names.append(f'Unnamed: {index}')
+        elif len(parts) == 1:
+            names.append(parts[0])
+        else:
+            names.append(' '.join(str(part) for part in parts))
+    return names
+
+
+def _unique(names: list) -> list:
+    """Повторяющиеся имена получают суффикс .1, .2 и т.д., как в pd.read_excel"""
+    seen = {}
+    result = []
+    for name in names:
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        result.append(name if not count else f'{name}.{count}')
+    return result
+
+
+def _read_with_openpyxl(file_bytes: bytes) -> Tuple[list, List[str]]:
+    workbook = load_workbook(io.BytesIO(file_bytes), data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        rows = [['' if value is None else value for value in row] for row in sheet.iter_rows(values_only=True)]
+        return rows, [str(merged) for merged in sheet.merged_cells.ranges]
+    finally:
+        workbook.close()
+
+
+def read_table(file_bytes: bytes, header_rows: int = 1, skiprows: int = 0, file_name: str = '') -> pd.DataFrame:
+    """
+        Первый лист xlsx в DataFrame с плоским заголовком.
+        skiprows - строки перед заголовком, header_rows - число строк заголовка.
+        Лист читается потоково, если структура файла это позволяет, иначе через openpyxl
+    """
+    merges = []
+    try:
+        data = _read_rows(file_bytes, merges=merges)
+    except XlsxReadError as e:
+        logger.warning('Файл %s будет прочитан через openpyxl: %s', file_name, e)
+        data, merges = _read_with_openpyxl(file_bytes)
+
+    header = data[skiprows:skiprows + header_rows]
+    names = _unique(flatten_header(header, merges, first_row=skiprows + 1))
+    # Строки до данных удаляются из списка строк, срез не копирует таблицу
+    del data[:skiprows + header_rows]
+    body = data
+    if not body:
+        return pd.DataFrame(columns=names)
+    width = max(len(names), max(len(row) for row in body))
+    names += [f'Unnamed: {index}' for index in range(len(names), width)]
+    _pad(body, width)
+    with TextParser(body, header=None, names=names, skip_blank_lines=False) as parser:
+        return parser.read()
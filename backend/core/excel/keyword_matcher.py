@@ -0,0 +1,61 @@
+"""
+Поиск ключевых слов групп в строке за один проход (автомат Ахо-Корасик).
+Переходы автомата достраиваются заранее, поэтому на каждый символ строки приходится один поиск в словаре.
+Найденные группы возвращаются битовой маской: бит i - группа i в порядке передачи групп.
+"""
+from collections import deque
+from typing import Dict, Iterable, List
+
+
+class KeywordAutomaton:
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        self.groups: List[str] = list(groups)
+        goto = [{}]
+        output = [0]
+        for index, words in enumerate(groups.values()):
+            for word in words:
+                state = 0
+                for char in word:
+                    next_state = goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(goto)
+                        goto[state][char] = next_state
+                        goto.append({})
+                        output.append(0)
+                    state = next_state
+                output[state] |= 1 << index
+
+        transitions = [dict() for _ in goto]
+        transitions[0] = dict(goto[0])
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            transitions[state] = {**transitions[fail[state]], **goto[state]}
+            output[state] |= output[fail[state]]
+            for char, child in goto[state].items():
+                fail[child] = transitions[fail[state]].get(char, 0)
+                queue.append(child)
+        self.transitions = transitions
+        self.output = output
+
+    def find(self, text: str) -> int:
+        """Маска групп, хотя бы одно слово которых входит в text как подстрока"""
+        transitions = self.transitions
+        output = self.output
+        state = 0
+        found = 0
+        for char in text:
+            state = transitions[state].get(char, 0)
+            found |= output[state]
+        return found
+
+    def matched_groups(self, mask: int) -> List[str]:
+        """Группы из маски в исходном порядке"""
+        groups = []
+        while mask:
+            bit = mask & -mask
+            groups.append(self.groups[bit.bit_length() - 1])
+            mask ^= bit
+        return groups
@@ -0,0 +1,48 @@
+"""
+Кэш распознанных макетов прайсов.
+Отпечаток макета - хэш заголовков и типов столбцов. Для известного отпечатка
+столбцы берутся из кэша без запуска SmartColumnDetector.
+Хранилище подключается через set_store (в приложении - база данных, см. core.layouts),
+по умолчанию кэш ничего не хранит.
+"""
+import hashlib
+import json
+from typing import List, Optional
+
+import pandas as pd
+
+
+class LayoutStore:
+    """Хранилище без сохранения: каждый файл распознаётся заново"""
+
+    def get(self, supplier: str, fingerprint: str) -> Optional[List[str]]:
+        return None
+
+    def save(self, supplier: str, fingerprint: str, headers: List[str], columns: List[str]) -> None:
+        pass
+
+
+_store = LayoutStore()
+
+
+def set_store(store: LayoutStore) -> None:
+    global _store
+    _store = store
+
+
+def get_store() -> LayoutStore:
+    return _store
+
+
+def _dtype_kind(dtype) -> str:
+    # Целые и дробные не различаются: один пропуск в столбце делает int64 столбцом float64
+    return 'n' if dtype.kind in 'iuf' else dtype.kind
+
+
+def headers(df: pd.DataFrame) -> List[str]:
+    return [str(col) for col in df.columns]
+
+
+def fingerprint(df: pd.DataFrame) -> str:
+    payload = [[name, _dtype_kind(dtype)] for name, dtype in zip(headers(df), df.dtypes)]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode('utf-8')).hexdigest()
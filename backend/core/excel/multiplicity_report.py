@@ -1,23 +1,82 @@
 import io
+from typing import Tuple
+
+import xlsxwriter
 from openpyxl import load_workbook
-from tqdm import tqdm
 import pandas as pd
-from .settings import key_words, anti_key_words, multiplicity
+from .rules import Rules, get_rules
 from .base_processing_files import BaseProcessingFiles
-
-
-def normalize_text(text):
-    return str(text).lower().strip() if text else ''
-
-
-def find_kit(product: str) -> bool:
-    return any(kw in product for kw in ['комплект', 'набор', 'упаковка'])
+from ..utils.logging import ProcessingStats, logger
+
+
+KIT_WORDS = ['комплект', 'набор', 'упаковка']
+# Значения записываются как есть: строки не превращаются в формулы и ссылки
+WORKBOOK_OPTIONS = {
+    'constant_memory': True,
+    'strings_to_formulas': False,
+    'strings_to_urls': False,
+    'default_date_format': 'yyyy-mm-dd h:mm:ss',
+}
+
+
+def normalize_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """Текст столбца в нижнем регистре без пробелов по краям, пустые и ложные значения (0, '') - ''"""
+    if column not in df:
+        return pd.Series('', index=df.index, dtype=object)
+    values = df[column]
+    return values.astype(str).str.lower().str.strip().where(values.astype(bool), '')
+
+
+def keyword_multiplicity(product: str, rules: Rules) -> int:
+    """
+        Кратность по ключевым словам групп, группы проверяются в порядке key_words.
+        Группа без анти-слов задаёт кратность, и проверка продолжается,
+        группа с анти-словами завершает проверку (1, если в названии есть анти-слово)
+    """
+    automaton = rules.key_words_automaton
+    result = 1
+    for group in automaton.matched_groups(automaton.find(product)):
+        anti_key = rules.anti_key_words.get(group)
+        if anti_key:
+            words = set(product.replace('(', '').replace(')', '').split(' '))
+            return 1 if words.intersection(anti_key) else rules.multiplicity[group]
+        result = rules.multiplicity[group]
+    return result
+
+
+def multiplicity_column(df: pd.DataFrame, rules: Rules, stats: ProcessingStats = None) -> pd.Series:
+    """
+        Кратность для всех строк:
+            наборы и комплекты - 1;
+            номер по каталогу на "l" или "r" - 1, на "lr" - 2;
+            остальные - по ключевым словам, каждое название проверяется один раз
+    """
+    product = normalize_column(df, 'Наименование')
+    number = normalize_column(df, 'Номер по каталогу')
+
+    result = pd.Series(1, index=df.index)
+    kit = product.str.contains('|'.join(KIT_WORDS), regex=True)
+    pair = number.str.endswith('lr')
+    single = number.str.endswith(('l', 'r')) & ~pair
+    result[pair & ~kit] = 2
+
+    rest = ~(kit | single | pair)
+    names = product[rest]
+    by_name = {name: keyword_multiplicity(name, rules) for name in names.unique()}
+    result[rest] = names.map(by_name)
+    if stats is not None:
+        stats.count('наборы', kit.sum())
+        stats.count('номер на l/r', (single & ~kit).sum())
+        stats.count('номер на lr', (pair & ~kit).sum())
+        stats.count('по ключевым словам', (result[rest] > 1).sum())
+    return result
 
 
 class MultiplicityReport(BaseProcessingFiles):
+    VERSION = 2
 
-    def __init__(self, file_bytes: bytes, file_name: str):
-        super().__init__(file_bytes, file_name)
+    def __init__(self, file_bytes: bytes, file_name: str, params: dict = None):
+        super().__init__(file_bytes, file_name, params)
         self._processed_data = None
 
     @property
@@ -35,55 +94,48 @@ class MultiplicityReport(BaseProcessingFiles):
             self._processed_data = self.process()
         return self._processed_data
 
+    def __read_rows(self) -> Tuple[str, list]:
+        """Название и строки активного листа. Лист читается в режиме read_only, строки хранятся как кортежи значений"""
+        workbook = load_workbook(io.BytesIO(self.file_bytes), read_only=True, data_only=True)
+        try:
+            sheet = workbook.active
+            return sheet.title, list(sheet.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def __read_columns(rows: list) -> pd.DataFrame:
+        """Столбцы, нужные для расчёта кратности"""
+        header = list(rows[0]) if rows else []
+        logger.debug('Заголовок: %s', header)
+        positions = {name: index for index, name in enumerate(header)}
+        data = {name: [row[index] if index < len(row) else None for row in rows[1:]]
+                for name, index in positions.items() if name in ('Наименование', 'Номер по каталогу')}
+        return pd.DataFrame(data, index=range(max(len(rows) - 1, 0))).fillna('')
+
     def process(self):
-        input_stream = io.BytesIO(self.file_bytes)
-        workbook = load_workbook(input_stream, data_only=True)
-        sheet = workbook.active
-
-        data = []
-        header = [cell.value for cell in sheet[1]]
-        print(f'Header: {header}')
-        for row in tqdm(sheet.iter_rows(min_row=2, max_row=sheet.max_row, values_only=True),
-                        desc='Processing'):
-            data.append(row)
-
-        df = pd.DataFrame(data, columns=header, index=None)
-        df = df.fillna('')
-        records = df.to_dict(orient='records')
-
-        for record in tqdm(records, desc='Анализ:'):
-            product = normalize_text(record.get('Наименование', ''))
-            number = normalize_text(record.get('Номер по каталогу', ''))
-
-            has_kit = find_kit(product)
-
-            record['Кратность'] = 1
-
-            if has_kit:
-                continue
-
-            if number.endswith(('l', 'r')) and not number.endswith('lr'):
-                continue
-            elif number.endswith('lr'):
-                record['Кратность'] = 2
-                continue
-
-            for group, keywords in key_words.items():
-                if any(word in product for word in keywords) or any(word == product for word in keywords):
-                    anti_key = anti_key_words.get(group, [])
-                    normalized_words = product.replace('(', '').replace(')', '').split(' ')
-                    if anti_key and any(word in normalized_words for word in anti_key):
-                        record['Кратность'] = 1
-                        break
-                    elif anti_key and not any(word in normalized_words for word in anti_key):
-                        record['Кратность'] = multiplicity[group]
-                        break
-                    record['Кратность'] = multiplicity[group]
-
-        for ind, record in enumerate(records, start=2):
-            sheet[f'D{ind}'] = record.get('Кратность', 1)
-
-        output_stream = io.BytesIO()
-        workbook.save(output_stream)
-        output_stream.seek(0)
-        return output_stream.read()
+        """
+            Кратность записывается в столбец D активного листа, остальные столбцы копируются без изменений.
+            Лист читается в режиме read_only, результат пишется xlsxwriter в режиме constant_memory:
+            объекты ячеек openpyxl не создаются, в памяти только значения исходных строк.
+            Оформление и остальные листы исходного файла не переносятся
+        """
+        rules = get_rules()
+        with self.stats.stage('чтение'):
+            title, rows = self.__read_rows()
+            df = self.__read_columns(rows)
+        self.stats.count('строк', len(df))
+        with self.stats.stage('кратность'):
+            values = multiplicity_column(df, rules, self.stats).tolist()
+
+        with self.stats.stage('запись'):
+            output_stream = io.BytesIO()
+            workbook = xlsxwriter.Workbook(output_stream, WORKBOOK_OPTIONS)
+            sheet = workbook.add_worksheet(title)
+            for ind, row in enumerate(rows):
+                if ind:
+                    row = list(row) + [None] * (4 - len(row))
+                    row[3] = values[ind - 1]
+                sheet.write_row(ind, 0, row)
+            workbook.close()
+        return output_stream.getvalue()
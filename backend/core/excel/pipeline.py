@@ -11,11 +11,11 @@ class ProcessingPipeline:
         self.file_processor = desc_processor.get('processor')
         self.type_report = desc_processor.get('type_processor')
 
-    def run(self, file_bytes: bytes, file_name: str) -> tuple:
+    def run(self, file_bytes: bytes, file_name: str, params: dict = None) -> tuple:
         current_bytes = file_bytes
         current_filename = file_name
 
-        processed_bytes, meta = self.file_processor.process(current_bytes, current_filename, self.type_report)
+        processed_bytes, meta = self.file_processor.process(current_bytes, current_filename, self.type_report, params)
 
         if meta.get('success'):
             current_bytes = processed_bytes
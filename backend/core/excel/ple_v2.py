@@ -4,7 +4,8 @@ import re
 from enum import Enum
 from dataclasses import dataclass
 from typing import Optional, List, Any, Dict
-from .settings import QUANTITY_KEYS
+from .rules import get_rules
+from ..utils.logging import logger
 
 
 class ColumnType(Enum):
@@ -29,7 +30,12 @@ class ColumnInfo:
 
 
 class SmartColumnDetector:
-    __QUANTITY_KEYS = QUANTITY_KEYS
+    # Выборка значений столбца: порциями по SAMPLE_BATCH, не больше SAMPLE_MAX значений.
+    # Выборка останавливается, когда доли типов между порциями меняются меньше чем на SAMPLE_TOLERANCE
+    SAMPLE_BATCH = 50
+    SAMPLE_MAX = 500
+    SAMPLE_MIN_BATCHES = 3
+    SAMPLE_TOLERANCE = 0.02
 
     PATTERNS = {
         ColumnType.BRAND:
@@ -59,16 +65,24 @@ class SmartColumnDetector:
         ColumnType.UNDEFINED: []
 
     }
+    # Шаблоны каждого типа, объединённые в одно выражение
+    COMPILED_PATTERNS = {column_type: re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))
+                         for column_type, patterns in PATTERNS.items() if patterns}
 
     def __init__(self):
+        self.__QUANTITY_KEYS = get_rules().quantity_keys
         self.column_infos: List[ColumnInfo] = []
         self.column_types = {}
 
     def analyze_df(self, df: pd.DataFrame):
 
         if df.empty:
-            print('df is empty')
+            logger.warning('Нет данных для распознавания столбцов')
             return None
+        return self.apply_columns(df, self.detect_columns(df))
+
+    def detect_columns(self, df: pd.DataFrame) -> List[str]:
+        """Новые имена столбцов по результатам анализа значений"""
         stat = {}
 
         for i, column in enumerate(df.columns):
@@ -76,9 +90,11 @@ class SmartColumnDetector:
             stat[i] = self.analyze_column(column_data, i, column, stat)
 
         columns_name = {col.index: col.data_type.value for col in self.detect_title(stat)}
-        new_column = [columns_name.get(i) if columns_name.get(i) != 'undefined' else f'Column {i}' for i in
-                      range(len(df.columns))]
-        df.columns = new_column
+        return [columns_name.get(i) if columns_name.get(i) != 'undefined' else f'Column {i}' for i in
+                range(len(df.columns))]
+
+    def apply_columns(self, df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+        df.columns = columns
         match_quantity_columns = [col for col in df.columns if col in self.__QUANTITY_KEYS]
         if len(match_quantity_columns) == 0:
             df['quantity'] = 1
@@ -87,29 +103,60 @@ class SmartColumnDetector:
     def analyze_column(self, column_data: pd.Series, index: int, name: str, stat: dict):
 
         series = self.get_simple_series(column_data)
-        type_res = self.simple_detect_column_type(series, index)
+        if not series:
+            return ColumnInfo(index=index, data_type=ColumnType.UNDEFINED, confidence=0.0)
+        # Типы значений и совпадения с шаблонами считаются за один проход по выборке
+        type_res = self.simple_detect_column_type(series, index, self.COMPILED_PATTERNS)
+        confidence = type_res['confidence']
         if type_res['contain_str']:
-            stat = self.detect_column_str_brand(series, index)
+            stat = self.detect_column_str_brand(series, index, confidence)
         elif type_res['contain_int']:
-            stat = self.detect_column_int_brand(series, index)
+            stat = self.detect_column_int_brand(series, index, confidence)
         elif type_res['contain_float']:
-            stat = self.detect_column_float_brand(series, index)
+            stat = self.detect_column_float_brand(series, index, confidence)
         else:
-            print(type_res)
-            raise ValueError('column type not found')
+            raise ValueError(f'column type not found: {type_res}')
         data = self.select_title(stat)
         return data
 
     def get_simple_series(self, series: pd.Series) -> List[Any]:
-
+        """
+            Детерминированная выборка непустых значений: начало столбца, конец, затем равномерно по середине.
+            Короткие столбцы возвращаются целиком
+        """
         no_nan_series = series.dropna()
-        if len(no_nan_series) == 0:
-            return []
-        simple_series = no_nan_series.sample(500, random_state=42).tolist()
-
+        if len(no_nan_series) <= self.SAMPLE_MAX:
+            return no_nan_series.tolist()
+
+        simple_series = []
+        previous = None
+        for batch_number, positions in enumerate(self.sample_positions(len(no_nan_series)), start=1):
+            simple_series.extend(no_nan_series.iloc[positions].tolist())
+            current = self.simple_detect_column_type(simple_series, None)
+            if previous is not None and batch_number >= self.SAMPLE_MIN_BATCHES and self.is_stable(previous, current):
+                break
+            previous = current
         return simple_series
 
-    def simple_detect_column_type(self, series: List[Any], index):
+    def sample_positions(self, length: int) -> List[np.ndarray]:
+        """Порции позиций выборки: начало, конец и порции середины, каждая из которых покрывает весь диапазон"""
+        batch = self.SAMPLE_BATCH
+        middle = np.linspace(batch, length - batch - 1, self.SAMPLE_MAX - 2 * batch).astype(int)
+        batches_count = len(middle) // batch
+        return [np.arange(batch), np.arange(length - batch, length),
+                *(middle[i::batches_count] for i in range(batches_count))]
+
+    def is_stable(self, previous: dict, current: dict) -> bool:
+        return all(previous[key] == current[key] for key in ('contain_int', 'contain_float', 'contain_str')) and all(
+            abs(previous[key] - current[key]) <= self.SAMPLE_TOLERANCE
+            for key in ('percent_int', 'percent_float', 'percent_str'))
+
+    def simple_detect_column_type(self, series: List[Any], index, column_types=()):
+        """
+            Доли целых, дробных и строковых значений выборки.
+            column_types - типы столбцов, для которых в том же проходе считается доля значений под их шаблоны
+            (stat_series['confidence'])
+        """
         stat_series = {
             'series_len': len(series),
             'contain_int': False,
@@ -124,8 +171,14 @@ class SmartColumnDetector:
             'float_count': 0,
             'str_count': 0,
         }
+        patterns = [(column_type, self.COMPILED_PATTERNS[column_type].match) for column_type in column_types]
+        matches = dict.fromkeys(column_types, 0)
 
         for value in series:
+            text = value if isinstance(value, str) else str(value)
+            for column_type, match in patterns:
+                if match(text):
+                    matches[column_type] += 1
             if isinstance(value, (int, np.integer)):
                 stat_values['int_count'] += 1
             if isinstance(value, (float, np.floating)):
@@ -140,68 +193,60 @@ class SmartColumnDetector:
                     except ValueError:
                         stat_values['str_count'] += 1
 
-        stat_series['contain_int'] = stat_values['int_count'] / stat_series['series_len'] > 0.5
-        stat_series['contain_float'] = stat_values['float_count'] / stat_series['series_len'] > 0.5
-        stat_series['contain_str'] = stat_values['str_count'] / stat_series['series_len'] > 0.7
+        stat_series['percent_int'] = stat_values['int_count'] / stat_series['series_len']
+        stat_series['percent_float'] = stat_values['float_count'] / stat_series['series_len']
+        stat_series['percent_str'] = stat_values['str_count'] / stat_series['series_len']
+        stat_series['contain_int'] = stat_series['percent_int'] > 0.5
+        stat_series['contain_float'] = stat_series['percent_float'] > 0.5
+        stat_series['contain_str'] = stat_series['percent_str'] > 0.7
+        stat_series['confidence'] = {column_type: count / stat_series['series_len']
+                                     for column_type, count in matches.items()}
 
         return stat_series
 
-    def detect_column_str_brand(self, series: List[Any], index: int):
-        result = []
-        article_res = self.is_article(series, index)
-        result.append(article_res)
-        brand_res = self.is_brand(series, index)
-        result.append(brand_res)
-        return result
+    def match_confidence(self, series: List[Any], column_types) -> Dict[ColumnType, float]:
+        """Доля значений выборки, подходящих под шаблоны каждого из типов, строки формируются один раз"""
+        values = pd.Series(series, dtype=object).astype(str)
+        return {column_type: float(values.str.match(self.COMPILED_PATTERNS[column_type]).mean())
+                for column_type in column_types}
+
+    def detect_column_str_brand(self, series: List[Any], index: int, confidence: dict = None):
+        if confidence is None:
+            confidence = self.match_confidence(series, (ColumnType.ARTICLE, ColumnType.BRAND))
+        return [ColumnInfo(index=index, data_type=column_type, confidence=confidence[column_type], data=series)
+                for column_type in (ColumnType.ARTICLE, ColumnType.BRAND)]
 
     def is_article(self, series: List[Any], index: int) -> ColumnInfo:
-        confidence = 0
-        for value in series:
-            for pattern in self.PATTERNS[ColumnType.ARTICLE]:
-                if re.match(pattern, str(value)):
-                    confidence += 1
-                    break
-        return ColumnInfo(index=index, data_type=ColumnType.ARTICLE, confidence=confidence / len(series), data=series)
+        confidence = self.match_confidence(series, (ColumnType.ARTICLE,))[ColumnType.ARTICLE]
+        return ColumnInfo(index=index, data_type=ColumnType.ARTICLE, confidence=confidence, data=series)
 
     def is_brand(self, series: List[Any], index: int) -> ColumnInfo:
-        confidence = 0
-        for value in series:
-            for pattern in self.PATTERNS[ColumnType.BRAND]:
-                if re.match(pattern, str(value)):
-                    confidence += 1
-                    break
-        return ColumnInfo(index=index, data_type=ColumnType.BRAND, confidence=confidence / len(series), data=series)
+        confidence = self.match_confidence(series, (ColumnType.BRAND,))[ColumnType.BRAND]
+        return ColumnInfo(index=index, data_type=ColumnType.BRAND, confidence=confidence, data=series)
 
-    def detect_column_int_brand(self, series: List[Any], index: int) -> List[ColumnInfo]:
+    def detect_column_int_brand(self, series: List[Any], index: int, confidence: dict = None) -> List[ColumnInfo]:
         result = []
-        quantity_res = self.is_quantity(series, index)
+        quantity_res = self.is_quantity(series, index, confidence)
         result.append(quantity_res)
         return result
 
-    def is_quantity(self, series: List[Any], index: int) -> ColumnInfo:
-        confidence = 0
-        for value in series:
-            for pattern in self.PATTERNS[ColumnType.QUANTITY]:
-                if re.match(pattern, str(value)):
-                    confidence += 1
-                    break
-        return ColumnInfo(index=index, data_type=ColumnType.QUANTITY, confidence=confidence / len(series),
+    def is_quantity(self, series: List[Any], index: int, confidence: dict = None) -> ColumnInfo:
+        if confidence is None:
+            confidence = self.match_confidence(series, (ColumnType.QUANTITY,))
+        return ColumnInfo(index=index, data_type=ColumnType.QUANTITY, confidence=confidence[ColumnType.QUANTITY],
                           data=series)
 
-    def detect_column_float_brand(self, series: List[Any], index: int):
+    def detect_column_float_brand(self, series: List[Any], index: int, confidence: dict = None):
         result = []
-        price_res = self.is_price(series, index)
+        price_res = self.is_price(series, index, confidence)
         result.append(price_res)
         return result
 
-    def is_price(self, series: List[Any], index: int) -> ColumnInfo:
-        confidence = 0
-        for value in series:
-            for pattern in self.PATTERNS[ColumnType.PRICE]:
-                if re.match(pattern, str(value)):
-                    confidence += 1
-                    break
-        return ColumnInfo(index=index, data_type=ColumnType.PRICE, confidence=confidence / len(series), data=series)
+    def is_price(self, series: List[Any], index: int, confidence: dict = None) -> ColumnInfo:
+        if confidence is None:
+            confidence = self.match_confidence(series, (ColumnType.PRICE,))
+        return ColumnInfo(index=index, data_type=ColumnType.PRICE, confidence=confidence[ColumnType.PRICE],
+                          data=series)
 
     def select_title(self, stat: List[ColumnInfo]) -> ColumnInfo:
         if len(stat) <= 0:
@@ -1,21 +1,32 @@
 import io
+import re
 
 import pandas as pd
 from pathlib import Path
-from .settings import PRICE_SETTINGS, PRICE_NAMES, QUANTITY_KEYS
+from .rules import get_rules
 from .ple_v2 import SmartColumnDetector
 from .base_processing_files import BaseProcessingFiles
+from .csv_reader import read_csv
+from . import layout_cache
+from .xlsx_reader import XlsxReadError, read_header, read_xlsx
+from ..utils.logging import logger
+
+# Столбцы прайса с кодами (артикул, производитель) читаются как текст: номера не теряют ведущие нули
+TEXT_COLUMN_RE = re.compile(r'артикул|articul|article|номер|№|бренд|brand|произв|изготов|групп', re.I)
 
 
 class PriceListEdit(BaseProcessingFiles):
-    __PRICE_SETTINGS = PRICE_SETTINGS
-    __PRICE_NAMES = PRICE_NAMES
-    __ENCODINGS = ['utf-8', 'cp1251', 'windows-1251', 'iso-8859-1', 'latin1']
-    __QUANTITY_KEYS = QUANTITY_KEYS
+    # Поставщик, его столбцы и формат CSV определяются по имени файла
+    NAME_DEPENDENT = True
 
-    def __init__(self, file_bytes: bytes, file_name: str):
-        super().__init__(file_bytes, file_name)
+    def __init__(self, file_bytes: bytes, file_name: str, params: dict = None):
+        super().__init__(file_bytes, file_name, params)
         self._processed_data = None
+        rules = get_rules()
+        self.__PRICE_SETTINGS = rules.price_settings
+        self.__supplier_names = rules.supplier_names
+        self.__supplier_name = None
+        self.__QUANTITY_KEYS = rules.quantity_keys
         self.__setup()
 
     def __setup(self):
@@ -24,7 +35,9 @@ class PriceListEdit(BaseProcessingFiles):
         self.__columns = self.__PRICE_SETTINGS.get(self.__edit_name(), [])
         self.__required_columns = [col for col in self.__columns.keys()]
         self.__max_count_col = max(self.__columns.values())
-        self.__data = []
+        # Типы задаются по именам столбцов: одинаково при чтении по номерам столбцов и целиком
+        self.__dtypes = {name: str for name in self.__columns if TEXT_COLUMN_RE.search(str(name))}
+        self.__data = pd.DataFrame()
         self.__stream = None
         self.processor_header = SmartColumnDetector()
 
@@ -45,35 +58,62 @@ class PriceListEdit(BaseProcessingFiles):
         return f'{file_name}.xlsx'
 
     def __edit_name(self):
-        words_file_name = self.__base_name.split('_')
-        for key, value in self.__PRICE_NAMES.items():
-            print(f'key: {key}, value: {value}')
-            print(all(word in words_file_name for word in value))
-            if all(word in words_file_name for word in value):
-                print(f'Имя файла {self.file_name} изменено на {key}')
-                return key
-        else:
-            return self.__base_name
+        if self.__supplier_name is None:
+            self.__supplier_name = self.__supplier_names.resolve(self.__base_name) or self.__base_name
+            if self.__supplier_name != self.__base_name:
+                logger.info('Имя файла %s изменено на %s', self.file_name, self.__supplier_name)
+        return self.__supplier_name
 
     def __read_xlsx_xls(self):
+        if self.__extension == '.xlsx':
+            try:
+                return read_xlsx(self.file_bytes, dtype=self.__dtypes)
+            except XlsxReadError as e:
+                logger.warning('Файл %s будет прочитан через openpyxl: %s', self.file_name, e)
         try:
             engine = 'openpyxl' if self.__extension == '.xlsx' else 'xlrd'
-            df = pd.read_excel(io.BytesIO(self.file_bytes), engine=engine)
+            df = pd.read_excel(io.BytesIO(self.file_bytes), engine=engine, dtype=self.__dtypes)
             return df
         except Exception as e:
-            print(f'Ошибка при чтении файла {self.file_name}: {e}')
+            logger.error('Ошибка при чтении файла %s: %s', self.file_name, e)
             raise
 
-    def __read_csv(self):
-        for encoding in self.__ENCODINGS:
-            try:
-                df = pd.read_csv(io.BytesIO(self.file_bytes), encoding=encoding, delimiter=';', low_memory=False)
-                return df
-            except UnicodeDecodeError:
-                continue
-            except Exception:
-                continue
-        raise ValueError(f'Не удалось прочитать файл {self.file_name}')
+    def __read_csv(self, usecols=None, nrows=None):
+        return read_csv(self.file_bytes, usecols=usecols, nrows=nrows, dtype=self.__dtypes)
+
+    def __header_matches(self, usecols: list) -> bool:
+        """Нужные столбцы на своих местах в первой строке. Читается только заголовок"""
+        try:
+            if self.__extension == '.xlsx':
+                headers = read_header(self.file_bytes, usecols=usecols)
+            elif self.__extension == '.csv':
+                headers = self.__read_csv(usecols=usecols, nrows=0).columns.tolist()
+            else:
+                return False
+        except ValueError:
+            return False
+        return all(len(headers) >= col_index and headers[col_index - 1] == col_name
+                   for col_name, col_index in self.__columns.items())
+
+    def __read_projected(self):
+        """
+            Чтение только столбцов до последнего нужного по PRICE_SETTINGS.
+            Столбцы правее последнего нужного в результат не попадают и при чтении целиком (__arrange_columns).
+            None, если заголовок не в первой строке или нужные столбцы не на своих местах
+            (проверяется по первой строке до разбора файла) - тогда файл читается целиком
+        """
+        usecols = list(range(self.__max_count_col))
+        if not self.__header_matches(usecols):
+            return None
+        try:
+            if self.__extension == '.xlsx':
+                df = read_xlsx(self.file_bytes, usecols=usecols, dtype=self.__dtypes)
+            else:
+                df = self.__read_csv(usecols=usecols)
+        except ValueError:
+            return None
+        self.file_bytes = None
+        return df
 
     def __read_file_data(self) -> pd.DataFrame:
         if self.__extension in ['.xls', '.xlsx']:
@@ -93,19 +133,12 @@ class PriceListEdit(BaseProcessingFiles):
         return headrs_names
 
     def __create_data(self, df):
-        print(df.head())
         columns = df.columns.tolist()
 
         new_columns = [''] * max(self.__max_count_col, len(columns))
-        print(f'columns: {len(columns)}, new_columns: {len(new_columns)}, self.__columns: {self.__max_count_col}')
-        rows = []
-
-        first_column = set(df.iloc[:, 0].dropna().to_list())
 
         for i, col_name in enumerate(columns):
-            print(new_columns)
             if col_name in self.__required_columns:
-                print(f'col_name: {self.__columns[col_name]}, i: {i}')
                 target_index = self.__columns[col_name] - 1
                 new_columns[target_index] = col_name
                 if i != target_index:
@@ -116,30 +149,48 @@ class PriceListEdit(BaseProcessingFiles):
                 else:
                     new_columns[i] = col_name
 
-        match_columns = [col for col in new_columns if col in self.__required_columns]
         for i, col in enumerate(new_columns):
             if col in self.__required_columns and self.__columns[col] - 1 != i:
                 new_columns[i] = f'Column_{i}'
         new_columns = [col for col in new_columns if pd.isna(col) != True]
-        print(f'DF: {df.columns.tolist()}:\nnew_columns: {new_columns}\nmatch_columns: {match_columns}')
-
-        for _, row in df.iterrows():
-            if len([col for col in row.tolist() if pd.isna(col) != True]) < 2:
-                continue
-            rows.append({col: row.get(col) for col in new_columns})
 
-        print(f'rows: {rows[:10]}')
-        self.__data = rows
+        # Строки, где заполнено меньше двух ячеек, пропускаются
+        data = df.loc[(df.notna().sum(axis=1) >= 2).to_numpy()]
+        if data.empty:
+            self.__data = pd.DataFrame()
+            return
+        # При повторяющихся заголовках берётся первый столбец с таким именем,
+        # отсутствующие в файле столбцы заполняются пустыми значениями
+        data = data.loc[:, ~data.columns.duplicated()]
+        self.__data = data.reindex(columns=list(dict.fromkeys(new_columns))).reset_index(drop=True)
 
     def process(self):
-        # new_df = None
         file_name = self.__edit_name()
-        print(file_name)
+        logger.debug('Обработка прайса %s', file_name)
         if file_name not in self.__PRICE_SETTINGS:
             raise ValueError(f'Неизвестный файл {file_name}')
-            # self.__stream = None
 
-        df = self.__read_file_data()
+        with self.stats.stage('чтение'):
+            df = self.__read_projected()
+            if df is None:
+                df = self.__read_file_data()
+        self.stats.count('строк в файле', len(df))
+        with self.stats.stage('столбцы'):
+            df = self.__arrange_columns(df)
+        self.stats.count('строк в результате', len(df))
+
+        with self.stats.stage('запись'):
+            output_stream = io.BytesIO()
+            with pd.ExcelWriter(output_stream, engine='xlsxwriter') as writer:
+                df.to_excel(writer, index=False, sheet_name='Лист1')
+            output_stream.seek(0)
+            return output_stream.read()
+
+    def __arrange_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+            Поиск строки заголовка и приведение столбцов к порядку из PRICE_SETTINGS.
+            В результат входят столбцы до последнего нужного, как при чтении по номерам столбцов
+        """
         headers = df.columns.tolist()
         # print(f'Заголовки файла: {df.columns.tolist()}, {[str(col) for col in headers]}')
 
@@ -149,8 +200,8 @@ class PriceListEdit(BaseProcessingFiles):
                 row_values = row.tolist()
                 # print(type(row_values))
                 if len([col for col in row_values if pd.isna(col) != True]) < 3:
-                    print(f'Файл {self.file_name} содержит не нужные столбцы {row}, в строке {i}, '
-                          f'количество {len(['nan' == str(col).lower() for col in row_values])}')
+                    logger.debug('Файл %s: в строке %s меньше трёх заполненных ячеек, строка пропущена',
+                                 self.file_name, i)
                 else:
                     df = df.iloc[i:]
                     df.columns = row_values
@@ -159,12 +210,12 @@ class PriceListEdit(BaseProcessingFiles):
         missing_columns = [col for col in self.__required_columns if col not in df.columns]
 
         if len(missing_columns) == len(self.__required_columns):
-            df = self.processor_header.analyze_df(df)
+            df = self.__analyze_layout(df)
             df = self.__create_dataframe(df)
         elif len(missing_columns) == 1 and missing_columns[0] in self.__QUANTITY_KEYS:
-            print(f'В прайсе {self.file_name} не найден столбец с количество товара {missing_columns[0]}')
+            logger.warning('В прайсе %s не найден столбец с количеством товара %s',
+                           self.file_name, missing_columns[0])
             df[missing_columns[0]] = 1
-            print(df.head())
             df = self.__create_dataframe(df)
         elif missing_columns:
             raise ValueError(f'Отсутствуют необходимые столбцы: {missing_columns}')
@@ -177,20 +228,31 @@ class PriceListEdit(BaseProcessingFiles):
                     col_position[col] = i + 1
 
             if col_position == self.__columns:
-                print(f'Столбцы в файле {self.file_name} в правильном порядке')
+                logger.debug('Столбцы в файле %s в правильном порядке', self.file_name)
                 # new_df = df
             else:
                 df = self.__create_dataframe(df)
 
-        output_stream = io.BytesIO()
-        with pd.ExcelWriter(output_stream, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='Лист1')
-        output_stream.seek(0)
-        return output_stream.read()
+        return df.iloc[:, :self.__max_count_col]
+
+    def __analyze_layout(self, df: pd.DataFrame):
+        """Распознавание столбцов; для уже встречавшегося макета поставщика столбцы берутся из кэша"""
+        if df.empty:
+            return self.processor_header.analyze_df(df)
+        supplier = self.__edit_name()
+        store = layout_cache.get_store()
+        fingerprint = layout_cache.fingerprint(df)
+        columns = store.get(supplier, fingerprint)
+        if columns is None or len(columns) != len(df.columns):
+            self.stats.count('распознавание столбцов')
+            headers = layout_cache.headers(df)
+            columns = self.processor_header.detect_columns(df)
+            store.save(supplier, fingerprint, headers, columns)
+        return self.processor_header.apply_columns(df, columns)
 
     def __create_dataframe(self, df: pd.DataFrame):
         self.__create_data(df)
-        new_df = pd.DataFrame(self.__data)
+        new_df = self.__data
         column_names = self.__get_header_names()
 
         new_df = new_df.rename(columns=column_names)
@@ -1,3 +1,5 @@
+import hashlib
+import json
 from typing import Dict, Union
 
 from .base_excel_processor_V2 import ExcelProcessor
@@ -5,11 +7,14 @@ from .base_excel_processor_V2 import ExcelProcessor
 from .multiplicity_report import MultiplicityReport
 from .price_list_edit import PriceListEdit
 from .goods_movement_report import GoodsMovementReport
+from .universal_report import UniversalReport
+from .rules import get_rules
 
 PROCESSORS_V2 = {
     'price': PriceListEdit,
     'multiplicity': MultiplicityReport,
-    'goodsmove': GoodsMovementReport
+    'goodsmove': GoodsMovementReport,
+    'universal': UniversalReport,
 }
 
 
@@ -18,3 +23,20 @@ def get_processor(processor_type: str) -> Dict[str, Union[ExcelProcessor, str]]:
     if not type_processor:
         raise ValueError(f'Неизвестный тип процессора: {processor_type}')
     return {'processor': ExcelProcessor(), 'type_processor': type_processor}
+
+
+def get_config_version(processor_type: str) -> str:
+    """
+        Версия правил обработки: хэш текущего снимка правил и версии процессора.
+        Меняется при любом изменении правил, что делает недействительными ранее сохранённые результаты
+    """
+    type_processor = PROCESSORS_V2.get(processor_type)
+    if not type_processor:
+        raise ValueError(f'Неизвестный тип процессора: {processor_type}')
+    payload = {
+        'processor': type_processor.__name__,
+        'version': type_processor.VERSION,
+        'rules': get_rules().version,
+    }
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
@@ -0,0 +1,100 @@
+"""
+Правила обработки поставщиков (столбцы прайсов, имена файлов, ключевые слова кратности и т.д.).
+Процессоры получают правила через get_rules() - снимок, закэшированный в процессе.
+Источник правил подключается через set_source (в приложении - база данных, см. core.rules_store),
+по умолчанию правила берутся из settings.py. invalidate() сбрасывает снимок,
+следующий get_rules() загрузит правила заново.
+"""
+import hashlib
+import json
+import threading
+from dataclasses import asdict, dataclass, field
+from functools import cached_property
+from typing import Dict, List, Tuple
+
+from . import settings
+from .keyword_matcher import KeywordAutomaton
+from .supplier_names import SupplierNameIndex
+
+
+@dataclass(frozen=True)
+class Rules:
+    price_settings: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    price_names: Dict[str, List[str]] = field(default_factory=dict)
+    quantity_keys: Tuple[str, ...] = ()
+    unnecessary_brands: List[str] = field(default_factory=list)
+    key_words: Dict[str, List[str]] = field(default_factory=dict)
+    anti_key_words: Dict[str, List[str]] = field(default_factory=dict)
+    multiplicity: Dict[str, int] = field(default_factory=dict)
+
+    @cached_property
+    def version(self) -> str:
+        """Хэш содержимого правил. Порядок записей учитывается: от него зависит порядок проверки"""
+        data = json.dumps(asdict(self), ensure_ascii=False, default=list)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    @cached_property
+    def supplier_names(self) -> SupplierNameIndex:
+        """Индекс для определения поставщика по имени файла, строится один раз на снимок"""
+        return SupplierNameIndex(self.price_names, self.price_settings)
+
+    @cached_property
+    def key_words_automaton(self) -> KeywordAutomaton:
+        """Автомат поиска ключевых слов кратности, строится один раз на снимок"""
+        return KeywordAutomaton(self.key_words)
+
+
+def from_settings() -> Rules:
+    return Rules(
+        price_settings=settings.PRICE_SETTINGS,
+        price_names=settings.PRICE_NAMES,
+        quantity_keys=tuple(settings.QUANTITY_KEYS),
+        unnecessary_brands=settings.UNNECESSARY_BRANDS,
+        key_words=settings.key_words,
+        anti_key_words=settings.anti_key_words,
+        multiplicity=settings.multiplicity,
+    )
+
+
+class RulesSource:
+    """Правила из settings.py"""
+
+    def load(self) -> Rules:
+        return from_settings()
+
+
+_source = RulesSource()
+_snapshot = None
+# Увеличивается при каждом сбросе: снимок, загрузка которого началась до сброса, не сохраняется
+_generation = 0
+_lock = threading.Lock()
+
+
+def set_source(source: RulesSource) -> None:
+    global _source
+    _source = source
+    invalidate()
+
+
+def invalidate(version: str = None) -> None:
+    """Сброс снимка. Если передана версия и снимок уже ей соответствует, снимок сохраняется"""
+    global _snapshot, _generation
+    if version is not None and _snapshot is not None and _snapshot.version == version:
+        return
+    _generation += 1
+    _snapshot = None
+
+
+def get_rules() -> Rules:
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None:
+        return snapshot
+    with _lock:
+        if _snapshot is not None:
+            return _snapshot
+        generation = _generation
+        snapshot = _source.load()
+        if generation == _generation:
+            _snapshot = snapshot
+    return snapshot
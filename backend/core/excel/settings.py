@@ -1,3 +1,5 @@
+# Правила по умолчанию: начальные данные для базы (миграция 0007_seed_supplier_rules)
+# и запасной вариант, если база недоступна. Рабочие правила редактируются в админке.
 key_words = {
     'Свечи зажигания': ['свеча', 'свечи'],
     'Тормозные диски': ['диск тормозной', 'диск торм', 'тормозной диск', 'диск переднего тормоза',
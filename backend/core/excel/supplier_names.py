@@ -0,0 +1,104 @@
+"""
+Определение поставщика по имени файла (PRICE_NAMES).
+Имя файла разбивается на слова по "_", поставщик подходит, если в имени есть все его слова.
+Если слова не подошли, файл может называться именем поставщика из PRICE_SETTINGS.
+Порядок проверки:
+    1. точное совпадение слов по обратному индексу слово -> поставщики,
+       при нескольких подходящих - первый по порядку PRICE_NAMES (как раньше);
+    2. имя файла совпадает с именем поставщика;
+    3. слова без учёта регистра, "ё" и знаков препинания, затем так же имя поставщика
+       (без приписки копии вида " (1)");
+    4. нормализованные слова с одной опечаткой (пропущенная, лишняя или заменённая буква),
+       для слов от FUZZY_MIN_LENGTH символов без цифр.
+В 3 и 4 проходе при нескольких подходящих выбирается поставщик с большим числом слов.
+"""
+import difflib
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+FUZZY_MIN_LENGTH = 5
+
+NON_WORD_RE = re.compile(r'[\W_]+')
+COPY_SUFFIX_RE = re.compile(r'\s*\(\d+\)$')
+
+
+def normalize(word: str) -> str:
+    return NON_WORD_RE.sub('', word.casefold().replace('ё', 'е'))
+
+
+class SupplierNameIndex:
+
+    def __init__(self, price_names: Dict[str, List[str]], supplier_names: Iterable[str] = ()):
+        self.names = set(supplier_names)
+        self.normalized_names = {normalize(name): name for name in self.names}
+        self.suppliers = list(price_names)
+        self.exact_words = [set(words) for words in price_names.values()]
+        self.normalized_words = [{normalize(word) for word in words} for words in price_names.values()]
+        self.exact_index = self.__build_index(self.exact_words)
+        self.normalized_index = self.__build_index(self.normalized_words)
+        # Варианты слов без одной буквы -> слова: опечатка в одну букву находится по совпадению вариантов
+        self.fuzzy_index = defaultdict(set)
+        for word in self.normalized_index:
+            if len(word) >= FUZZY_MIN_LENGTH and not any(char.isdigit() for char in word):
+                for variant in self.__variants(word):
+                    self.fuzzy_index[variant].add(word)
+
+    @staticmethod
+    def __build_index(supplier_words: List[set]) -> Dict[str, set]:
+        index = defaultdict(set)
+        for order, words in enumerate(supplier_words):
+            for word in words:
+                index[word].add(order)
+        return dict(index)
+
+    @staticmethod
+    def __variants(word: str) -> set:
+        return {word, *(word[:i] + word[i + 1:] for i in range(len(word)))}
+
+    @staticmethod
+    def __matches(tokens: set, index: Dict[str, set], supplier_words: List[set]) -> List[int]:
+        candidates = set()
+        for token in tokens:
+            candidates |= index.get(token, set())
+        return [order for order in candidates if supplier_words[order] <= tokens]
+
+    def __best(self, matches: Iterable[int]) -> Optional[str]:
+        matches = list(matches)
+        if not matches:
+            return None
+        order = min(matches, key=lambda i: (-len(self.normalized_words[i]), i))
+        return self.suppliers[order]
+
+    def __correct(self, token: str) -> str:
+        if (token in self.normalized_index or len(token) < FUZZY_MIN_LENGTH
+                or any(char.isdigit() for char in token)):
+            return token
+        candidates = set()
+        for variant in self.__variants(token):
+            candidates |= self.fuzzy_index.get(variant, set())
+        if not candidates:
+            return token
+        return max(sorted(candidates), key=lambda word: difflib.SequenceMatcher(None, token, word).ratio())
+
+    def resolve(self, base_name: str) -> Optional[str]:
+        """Поставщик по имени файла без расширения или None"""
+        tokens = set(base_name.split('_'))
+        matches = self.__matches(tokens, self.exact_index, self.exact_words)
+        if matches:
+            return self.suppliers[min(matches)]
+        if base_name in self.names:
+            return base_name
+
+        normalized = {normalize(token) for token in tokens} - {''}
+        supplier = self.__best(self.__matches(normalized, self.normalized_index, self.normalized_words))
+        if supplier:
+            return supplier
+        supplier = self.normalized_names.get(normalize(COPY_SUFFIX_RE.sub('', base_name)))
+        if supplier:
+            return supplier
+
+        corrected = {self.__correct(token) for token in normalized}
+        if corrected == normalized:
+            return None
+        return self.__best(self.__matches(corrected, self.normalized_index, self.normalized_words))
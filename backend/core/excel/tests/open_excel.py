@@ -6,8 +6,7 @@ from ..goods_movement_report import GoodsMovementReport
 from ..multiplicity_report import MultiplicityReport
 from ..price_list_edit import PriceListEdit
 from ..data_cleaning import open_file
-from ..universal_report import read_file
-from ..remove_merge import remove_merge
+from ..universal_report import UniversalReport
 import io
 
 class MyTestCase(unittest.TestCase):
@@ -24,8 +23,9 @@ class MyTestCase(unittest.TestCase):
             # processor = ProcessingPipeline(processor_type)
             # result = processor.run(file_bytes, file.name)
             # result = GoodsMovementReport(file_bytes, file.name).get_stream
-            data =remove_merge(file_bytes, file.name)
-            result = read_file(data, file.name)
+            params = UniversalReport.parse_params({'senders': input('Введите отправителей через запятую: '),
+                                                   'depth': input('Введите глубину склада в месяцах: ')})
+            result = UniversalReport(file_bytes, file.name, params).get_stream
             file_bytes_io = io.BytesIO(result)
             with open(CURRENT_DIR/f'{file.name}_результат.xlsx' , 'wb') as f:
                 f.write(file_bytes_io.read())
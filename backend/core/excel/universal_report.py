@@ -1,10 +1,34 @@
-import math
+import datetime
+import re
 
+import numpy as np
 import pandas as pd
 import io
 
-mounts_name = ['июль 25', 'авг. 25', 'сент. 25', 'окт. 25', 'нояб. 25', 'дек. 25', 'янв. 26', 'февр. 26',
-               'март 26', 'апр. 26', 'май 26', 'июнь 26', 'июль 26']
+from .base_processing_files import BaseProcessingFiles
+from ..utils.logging import logger
+
+# Названия месяцев в заголовке столбца продаж: полные и сокращённые. Только слова из списка,
+# иначе столбцы вроде 'Маржа 25' или 'Декада 10' считались бы месяцами
+MONTH_NAMES = (
+    'январь января янв',
+    'февраль февраля фев февр',
+    'март марта мар',
+    'апрель апреля апр',
+    'май мая',
+    'июнь июня июн',
+    'июль июля июл',
+    'август августа авг',
+    'сентябрь сентября сен сент',
+    'октябрь октября окт',
+    'ноябрь ноября ноя нояб',
+    'декабрь декабря дек',
+)
+MONTHS = {name: number for number, names in enumerate(MONTH_NAMES, 1) for name in names.split()}
+# Месяц и год в конце имени столбца: над месяцами в заголовке может быть общая объединённая ячейка ('Продажи')
+MONTH_RE = re.compile(r'(?:^|\s)([а-яё]+)\.?\s+(\d{2}|\d{4})\s*$', re.I)
+# Последние месяцы продаж, максимум которых учитывается в средней продаже и ранге
+LAST_MONTHS = 3
 
 DEEP = {
     'A': 2,
@@ -24,151 +48,207 @@ LAST_MONTHS_RANK = {
     1: 0.3,
     0: 0.1,
 }
-
-
-def get_sales(row):
-    return [row[mount] for mount in mounts_name if not pd.isna(row[mount])]
-
-
-def goods_rank(row):
-    sales = [row[mount] if not pd.isna(row[mount]) else 0 for mount in mounts_name]
-    last_months = sales[-3:]
-    last_months = [x for x in last_months if not pd.isna(x)]
-    mounts = len(get_sales(row))
-    mounts_rank = mounts / 13 if mounts else 0
-    if not pd.isna(row['сумма + покуп.']) and row['сумма + покуп.'] in ABC_RANK.keys():
-        abc_rank = ABC_RANK[row['сумма + покуп.']]
-    else:
-        abc_rank = 0
-    avg_sales = calculate_sales(row, row['Кратн.'])
-    avg_weigth = min(avg_sales / 1000, 2)
-
-    rating = (abc_rank * 0.3 + mounts_rank * 0.4 + avg_weigth * 0.1 + LAST_MONTHS_RANK[len(last_months)] * 0.2) * 100
-    return round(rating, 2)
-
-
-def calculate_sales(row, multiplicity):
-    sales = get_sales(row)
-    if len(sales) == 0:
-        return 0
-    original_sales = [row[mount] if not pd.isna(row[mount]) else 0 for mount in mounts_name]
-    last_months_sales = original_sales[-3:]
-    if not last_months_sales:
-        return 0
-
-    max_sales = max(last_months_sales)
-    # round_sales = math.ceil(((sum(sales) / len(sales)) / multiplicity))
-    # avg_sales = max(max_sales, round_sales * multiplicity)
-    round_sales = math.ceil(sum(sales) / len(sales))
-    avg_sales = max(max_sales, round_sales)
-    return avg_sales
-
-
-def calculate_sales_sender(row, deep=0):
-    avg_sales = calculate_sales(row, row['Кратн.'])
-    werehouse = row['Св. ост.']
-    if werehouse == 0:
-        print('Нет остатков')
-        return 0
-    if werehouse >= avg_sales * deep:
-        excess = werehouse - avg_sales * deep
-        print(f'Излишки: {excess}')
-    else:
-        excess = 0
-    return excess
-
-
-def calculate_sales_recipient(row):
-    if pd.isna(row['Матрица']):
-        return 0
-
-    avg_sales = calculate_sales(row, row['Кратн.'])
-    print(
-        f'Cредняя продажа: {avg_sales}, Бренд: {row["Номенклатура Производитель"]}, Номенклатура: {row["№ по каталогу"]}, Склад: {row["Склад"]}')
-    if not pd.isna(row['сумма + покуп.']) and row['сумма + покуп.'] in DEEP.keys():
-        deep = DEEP[row['сумма + покуп.']]
-    else:
-        deep = 1
-    if pd.isna(row['Св. ост.']) and pd.isna(row['В пути']):
-        werehouse = 0
-    elif pd.isna(row['Св. ост.']) and not pd.isna(row['В пути']):
-        werehouse = row['В пути']
-    elif not pd.isna(row['Св. ост.']) and pd.isna(row['В пути']):
-        werehouse = row['Св. ост.']
-    else:
-        werehouse = row['Св. ост.'] + row['В пути']
-    demand = ((avg_sales * deep - werehouse) // row['Кратн.']) * row['Кратн.']
-    if demand < 0:
-        return 0
-
-    return demand
-
-
-def distribute_goods(sender_df, recipient_df):
-    total_surplus = sender_df['Излишки'].iloc[0]
-
-    result_df = recipient_df.copy()
-    result_df = result_df.sort_values('Ранг', ascending=False).reset_index(drop=True)
-
-    result_df['Сред. продажа'] = result_df.apply(calculate_sales, axis=1, args=(result_df['Кратн.'].iloc[0],))
-    result_df['Излишки'] = total_surplus
-    result_df['Отправлено'] = False
-    result_df['остаток_потребности'] = result_df['Потребность'].copy()
-    result_df['К перемещению'] = 0
-
-    remaining_surplus = total_surplus
-
-    for index, row in result_df.iterrows():
-        if remaining_surplus <= 0:
-            break
-
-        need = row['остаток_потребности']
-        if need > 0:
-            allocation = min(need, remaining_surplus)
-            result_df.at[index, 'К перемещению'] = allocation
-            result_df.at[index, 'Отправлено'] = allocation > 0
-            result_df.at[index, 'остаток_потребности'] = need - allocation
-            remaining_surplus -= allocation
-
-    result_df['остаток_излишков'] = remaining_surplus
-
-    return result_df, remaining_surplus
-
-
-def read_file(file_bytes: bytes, file_name: str):
-    df = pd.read_excel(io.BytesIO(file_bytes), header=1, usecols=range(35))  # usecol=range(10) ограничить колонки
-    print(df.head())
-    warehouses = df['Склад'].unique().tolist()
-    sender = input(f'Введите отправителя({', '.join(warehouses)}): ')
-    werehouse_depth = int(input('Введите глубину склада в месяцах: '))
-    unique_items = df.drop_duplicates(subset=['№ по каталогу'])[['Номенклатура Производитель', '№ по каталогу']]
-    nomenclature_list = unique_items.rename(
-        columns={'Номенклатура Производитель': 'brand', '№ по каталогу': 'nomenclature'}
-    ).to_dict('records')
-    nomenclature_list = [{**item, 'sender': sender} for item in nomenclature_list]
-
-    all_distributed_dfa = []
-
-    for item in nomenclature_list:
-        sender_df = df[
-            (df['Номенклатура Производитель'] == (item['brand'])) & (df['№ по каталогу'] == (item['nomenclature'])) &
-            (df['Склад'] == item['sender'])].copy()
-
-        recipient_df = df[
-            (df['Номенклатура Производитель'] == (item['brand'])) & (df['№ по каталогу'] == (item['nomenclature'])) &
-            (df['Склад'] != item['sender'])].copy()
-        sender_df['Излишки'] = sender_df.apply(calculate_sales_sender, axis=1, args=(werehouse_depth,))
-        recipient_df['Потребность'] = recipient_df.apply(calculate_sales_recipient, axis=1)
-        recipient_df['Ранг'] = recipient_df.apply(goods_rank, axis=1)
-        print(recipient_df)
-        distributed_df, remaining_surplus = distribute_goods(sender_df, recipient_df)
-
-        all_distributed_dfa.append(distributed_df)
-
-    fianl_df = pd.concat(all_distributed_dfa, ignore_index=True)
-
-    output_stream = io.BytesIO()
-    with pd.ExcelWriter(output_stream, engine='openpyxl') as writer:
-        fianl_df.to_excel(writer, index=False, sheet_name='Лист1')
-    output_stream.seek(0)
-    return output_stream.read()
+# Строки заголовка отчёта, ячейки групп столбцов объединены
+HEADER_ROWS = 3
+# Символы, недопустимые в имени листа Excel
+SHEET_TITLE_RE = re.compile(r'[\[\]:*?/\\]')
+
+
+def month_key(name):
+    """(год, месяц) для заголовка столбца продаж ('июль 25', 'сент. 25', дата), иначе None"""
+    if isinstance(name, (datetime.date, pd.Timestamp)):
+        return name.year, name.month
+    match = MONTH_RE.search(str(name))
+    month = MONTHS.get(match.group(1).lower()) if match else None
+    if month is None:
+        return None
+    year = int(match.group(2))
+    return (year + 2000 if year < 100 else year), month
+
+
+def month_columns(columns) -> list:
+    """Столбцы продаж по месяцам из заголовка отчёта, от ранних к поздним"""
+    months = [name for name in columns if month_key(name) is not None]
+    if not months:
+        raise ValueError('В отчёте не найдены столбцы продаж по месяцам')
+    return sorted(months, key=month_key)
+
+
+def sender_surplus(df: pd.DataFrame, avg_sales: pd.Series, deep) -> pd.Series:
+    """Излишки склада-отправителя: свободный остаток сверх средней продажи на deep месяцев"""
+    werehouse = df['Св. ост.']
+    reserve = avg_sales * deep
+    return (werehouse - reserve).where(werehouse >= reserve, 0)
+
+
+def recipient_demand(df: pd.DataFrame, avg_sales: pd.Series) -> pd.Series:
+    """Потребность склада-получателя, кратная Кратн.; 0 для товаров вне матрицы и без потребности"""
+    deep = df['сумма + покуп.'].map(DEEP).fillna(1)
+    werehouse = df['Св. ост.'].fillna(0) + df['В пути'].fillna(0)
+    demand = ((avg_sales * deep - werehouse) // df['Кратн.']) * df['Кратн.']
+    return demand.mask(demand < 0, 0).mask(df['Матрица'].isna(), 0)
+
+
+def distribute_goods(result_df: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """
+        Распределение излишков по получателям для всех товаров сразу.
+        Строки товара отсортированы по убыванию ранга, каждый получатель получает свою потребность,
+        пока хватает излишков (жадное заполнение через накопленную сумму потребностей внутри товара)
+    """
+    need = result_df['Потребность'].where(result_df['Потребность'] > 0, 0)
+    need_before = need.groupby([result_df[key] for key in keys], sort=False).cumsum() - need
+    allocation = (result_df['Излишки'] - need_before).clip(lower=0).clip(upper=need)
+
+    result_df['Отправлено'] = allocation > 0
+    result_df['остаток_потребности'] = result_df['Потребность'] - allocation
+    result_df['К перемещению'] = allocation
+    allocated = allocation.groupby([result_df[key] for key in keys], sort=False).transform('sum')
+    result_df['остаток_излишков'] = result_df['Излишки'] - allocated
+    return result_df
+
+
+def sales_statistics(df: pd.DataFrame, months: list = None) -> pd.DataFrame:
+    """
+        Средняя продажа и ранг каждой строки отчёта, один проход по матрице продаж (строки x месяцы).
+        Средняя продажа - большее из округлённого вверх среднего по месяцам с продажами
+        и максимума последних LAST_MONTHS месяцев, 0 для строк без продаж.
+        Ранг учитывает ABC, долю месяцев с продажами, среднюю продажу и число последних месяцев отчёта -
+        это слагаемое одно для всех строк, как в прежнем построчном расчёте.
+        months - столбцы продаж, по умолчанию определяются по заголовку
+    """
+    months = month_columns(df.columns) if months is None else months
+    sales = df[months].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    has_sales = ~np.isnan(sales)
+    sales = np.where(has_sales, sales, 0)
+    counts = has_sales.sum(axis=1)
+    means = np.divide(sales.sum(axis=1), counts, out=np.zeros(len(df)), where=counts > 0)
+    last_max = sales[:, -LAST_MONTHS:].max(axis=1, initial=0)
+    avg_sales = np.where(counts > 0, np.maximum(last_max, np.ceil(means)), 0)
+
+    abc_rank = df['сумма + покуп.'].map(ABC_RANK).fillna(0).to_numpy(dtype=float)
+    months_rank = counts / len(months)
+    avg_weight = np.minimum(avg_sales / 1000, 2)
+    # Прежний расчёт заменял пропуски нулями до отбора последних месяцев, поэтому у каждой строки
+    # учитывались все последние месяцы отчёта, а не месяцы с продажами. Поведение сохранено
+    report_last_months_rank = LAST_MONTHS_RANK[min(len(months), LAST_MONTHS)]
+    rank = (abc_rank * 0.3 + months_rank * 0.4 + avg_weight * 0.1 + report_last_months_rank * 0.2) * 100
+    return pd.DataFrame({'Сред. продажа': avg_sales, 'Ранг': rank}, index=df.index).round({'Ранг': 2})
+
+
+def distribute(df: pd.DataFrame, sender, werehouse_depth: int, statistics: pd.DataFrame = None) -> pd.DataFrame:
+    """
+        Перемещение излишков склада sender на остальные склады.
+        Товар - пара (производитель, номер по каталогу), товары идут в порядке первого появления в отчёте,
+        получатели товара - по убыванию ранга.
+        statistics - заранее посчитанный sales_statistics(df), если отчёт распределяется для нескольких отправителей
+    """
+    keys = ['Номенклатура Производитель', '№ по каталогу']
+    df = df.dropna(subset=keys)
+    statistics = sales_statistics(df) if statistics is None else statistics.loc[df.index]
+    avg_sales = statistics['Сред. продажа']
+    is_sender = df['Склад'] == sender
+
+    surplus = sender_surplus(df[is_sender], avg_sales[is_sender], werehouse_depth)
+    surplus = surplus.groupby([df.loc[is_sender, key] for key in keys], sort=False).first()
+
+    result_df = df[~is_sender].copy()
+    result_df['Потребность'] = recipient_demand(result_df, avg_sales[~is_sender])
+    result_df['Ранг'] = statistics.loc[~is_sender, 'Ранг']
+    result_df['Сред. продажа'] = avg_sales[~is_sender]
+    # Товары без строки отправителя получают нулевые излишки
+    result_df['Излишки'] = surplus.reindex(pd.MultiIndex.from_frame(result_df[keys])).fillna(0).to_numpy()
+
+    result_df['_товар'] = result_df.groupby(keys, sort=False).ngroup()
+    result_df = result_df.sort_values(['_товар', 'Ранг'], ascending=[True, False]).drop(columns='_товар')
+    return distribute_goods(result_df.reset_index(drop=True), keys)
+
+
+def sheet_title(name, used: set) -> str:
+    """Имя листа для склада: без запрещённых символов, не длиннее 31 символа, уникальное в книге"""
+    base = SHEET_TITLE_RE.sub(' ', str(name)).strip()[:31] or 'Лист1'
+    title = base
+    counter = 1
+    while title.lower() in used:
+        suffix = f' ({counter})'
+        title = f'{base[:31 - len(suffix)]}{suffix}'
+        counter += 1
+    used.add(title.lower())
+    return title
+
+
+class UniversalReport(BaseProcessingFiles):
+    """
+        Перемещение излишков складов-отправителей на остальные склады.
+        Параметры: senders - склады-отправители, depth - глубина склада отправителя в месяцах.
+        Отчёт читается и статистика продаж считается один раз, результат каждого отправителя - отдельный лист
+    """
+
+    def __init__(self, file_bytes: bytes, file_name: str, params: dict = None):
+        super().__init__(file_bytes, file_name, params)
+        self._processed_data = None
+
+    @classmethod
+    def parse_params(cls, data) -> dict:
+        """Склады-отправители (несколько полей senders или одно поле через запятую) и глубина склада"""
+        senders = data.getlist('senders') if hasattr(data, 'getlist') else data.get('senders', [])
+        if isinstance(senders, str):
+            senders = [senders]
+        senders = [name.strip() for value in senders for name in str(value).split(',') if name.strip()]
+        if not senders:
+            raise ValueError('Не указаны склады-отправители')
+        try:
+            depth = int(data.get('depth'))
+        except (TypeError, ValueError):
+            raise ValueError('Глубина склада должна быть целым числом месяцев')
+        if depth < 0:
+            raise ValueError('Глубина склада не может быть отрицательной')
+        return {'senders': list(dict.fromkeys(senders)), 'depth': depth}
+
+    @property
+    def get_stream(self) -> bytes:
+        """Возвращает поток байтов файла"""
+        return self._get_processed()
+
+    @property
+    def get_file_name(self) -> str:
+        """Возвращает имя файла"""
+        return f'{self.file_name.split(".")[0]}_перемещение.xlsx'
+
+    def __read_report(self) -> pd.DataFrame:
+        """Отчёт без строк, где не указан товар. Заголовок в HEADER_ROWS строках, используются первые 35 столбцов"""
+        df = self.read_table(HEADER_ROWS).iloc[:, :35]
+        logger.debug('Отчёт %s: %s строк', self.file_name, len(df))
+        return df.dropna(subset=['Номенклатура Производитель', '№ по каталогу'])
+
+    @staticmethod
+    def __find_senders(df: pd.DataFrame, senders: list) -> list:
+        """Значения столбца Склад для переданных имён складов"""
+        warehouses = {str(name).strip(): name for name in df['Склад'].dropna().unique()}
+        missing = [name for name in senders if name not in warehouses]
+        if missing:
+            raise ValueError(f'Склады {", ".join(missing)} не найдены в отчёте, склады в отчёте: '
+                             f'{", ".join(warehouses)}')
+        return [warehouses[name] for name in senders]
+
+    def process(self) -> bytes:
+        params = self.parse_params(self.params)
+        with self.stats.stage('чтение'):
+            df = self.__read_report()
+        self.stats.count('строк', len(df))
+        senders = self.__find_senders(df, params['senders'])
+        with self.stats.stage('статистика продаж'):
+            statistics = sales_statistics(df)
+        results = []
+        with self.stats.stage('распределение'):
+            for sender in senders:
+                result_df = distribute(df, sender, params['depth'], statistics)
+                self.stats.count('к перемещению', (result_df['К перемещению'] > 0).sum())
+                results.append((sender, result_df))
+
+        with self.stats.stage('запись'):
+            output_stream = io.BytesIO()
+            used = set()
+            with pd.ExcelWriter(output_stream, engine='openpyxl') as writer:
+                for sender, result_df in results:
+                    result_df.to_excel(writer, index=False, sheet_name=sheet_title(sender, used))
+        return output_stream.getvalue()
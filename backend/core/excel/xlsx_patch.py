@@ -0,0 +1,114 @@
+"""
+Запись значений одного столбца в первый лист xlsx без загрузки книги в openpyxl.
+Меняется только XML листа: ячейки столбца в нужных строках заменяются (стиль ячейки сохраняется),
+остальные файлы архива копируются без изменений.
+Если лист записан так, что заменить ячейки нельзя (нет номера строки или адреса ячейки, формула в заменяемой ячейке,
+префикс пространства имён), выбрасывается XlsxPatchError - файл нужно записать через openpyxl.
+"""
+import io
+import math
+import numbers
+import re
+import zipfile
+from typing import Dict
+from xml.sax.saxutils import escape
+
+from openpyxl.utils.cell import get_column_letter
+
+from .xlsx_reader import _first_sheet_path
+
+ROW_START_RE = re.compile(rb'<row\b([^>]*?)(/?)>')
+CELL_RE = re.compile(rb'<c\b([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+CELL_REF_RE = re.compile(rb'<c\b[^>]*?\br="([A-Z]+)\d+"')
+STYLE_RE = re.compile(rb'\bs="\d+"')
+SPANS_RE = re.compile(rb'\s+spans="[^"]*"')
+PREFIXED_SHEET_DATA_RE = re.compile(rb'<\w+:sheetData\b')
+# Сжатие записываемого архива: быстрее уровня по умолчанию, размер файла почти не отличается
+COMPRESS_LEVEL = 1
+
+
+class XlsxPatchError(ValueError):
+    """Лист нельзя изменить без openpyxl"""
+
+
+def _cell(ref: bytes, style: bytes, value) -> bytes:
+    if value is None or value == '' or (isinstance(value, float) and math.isnan(value)):
+        return b'<c r="%s"%s/>' % (ref, style)
+    if isinstance(value, numbers.Integral) and not isinstance(value, bool):
+        return b'<c r="%s"%s><v>%d</v></c>' % (ref, style, int(value))
+    if isinstance(value, numbers.Real) and not isinstance(value, bool):
+        number = float(value)
+        text = str(int(number)) if number.is_integer() else repr(number)
+        return b'<c r="%s"%s><v>%s</v></c>' % (ref, style, text.encode())
+    text = escape(str(value)).encode('utf-8')
+    return b'<c r="%s"%s t="inlineStr"><is><t xml:space="preserve">%s</t></is></c>' % (ref, style, text)
+
+
+def _patch_row(attrs: bytes, content: bytes, letters: bytes, row_number: int, value) -> bytes:
+    ref = letters + str(row_number).encode()
+    position = content.find(b' r="%s"' % ref)
+    if position >= 0:
+        cell = CELL_RE.match(content, content.rfind(b'<c', 0, position))
+        if cell is None:
+            raise XlsxPatchError(f'Не удалось разобрать ячейку {ref.decode()}')
+        if cell.group(2) and b'<f' in cell.group(2):
+            raise XlsxPatchError(f'В ячейке {ref.decode()} формула')
+        style = STYLE_RE.search(cell.group(1))
+        new_cell = _cell(ref, b' ' + style.group(0) if style else b'', value)
+        return b'<row%s>%s%s%s</row>' % (attrs, content[:cell.start()], new_cell, content[cell.end():])
+
+    cells = CELL_REF_RE.findall(content)
+    if content.count(b'<c') != len(cells) or letters in cells:
+        raise XlsxPatchError(f'Не удалось найти ячейку {ref.decode()} в строке {row_number}')
+    # Ячейка вставляется перед первой ячейкой правее: столбцы сравниваются по длине адреса, затем по буквам
+    insert_at = len(content)
+    for cell_letters in cells:
+        if (len(cell_letters), cell_letters) > (len(letters), letters):
+            insert_at = content.rfind(b'<c', 0, content.find(b'r="%s%d"' % (cell_letters, row_number)))
+            break
+    # Ячейки в строке не было: spans (необязательная подсказка о границах строки) может стать неверным
+    attrs = SPANS_RE.sub(b'', attrs)
+    return b'<row%s>%s%s%s</row>' % (attrs, content[:insert_at], _cell(ref, b'', value), content[insert_at:])
+
+
+def _patch_sheet(sheet: bytes, column: int, values: Dict[int, object]) -> bytes:
+    """Строки ищутся по началу тега <row r="N" - номер строки записывается первым атрибутом"""
+    if PREFIXED_SHEET_DATA_RE.search(sheet):
+        raise XlsxPatchError('XML листа с префиксом пространства имён')
+    letters = get_column_letter(column + 1).encode()
+    parts = []
+    last = 0
+    for row_number in sorted(values):
+        start = sheet.find(b'<row r="%d"' % row_number, last)
+        row = ROW_START_RE.match(sheet, start) if start >= 0 else None
+        if row is None:
+            raise XlsxPatchError(f'На листе нет строки {row_number}')
+        if row.group(2):
+            end = content_end = row.end()
+        else:
+            content_end = sheet.find(b'</row>', row.end())
+            end = content_end + len(b'</row>')
+        parts.append(sheet[last:start])
+        parts.append(_patch_row(row.group(1), sheet[row.end():content_end], letters, row_number, values[row_number]))
+        last = end
+    parts.append(sheet[last:])
+    return b''.join(parts)
+
+
+def patch_column(file_bytes: bytes, column: int, values: Dict[int, object]) -> bytes:
+    """
+        Запись значений в столбец первого листа.
+        column - номер столбца (с 0), values - {номер строки листа (с 1): значение}, '' и None очищают ячейку
+    """
+    try:
+        with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+            sheet_path = _first_sheet_path(archive)
+            patched = _patch_sheet(archive.read(sheet_path), column, values)
+            output_stream = io.BytesIO()
+            with zipfile.ZipFile(output_stream, 'w') as output:
+                for info in archive.infolist():
+                    output.writestr(info, patched if info.filename == sheet_path else archive.read(info),
+                                   compresslevel=COMPRESS_LEVEL)
+    except (KeyError, AttributeError, zipfile.BadZipFile) as e:
+        raise XlsxPatchError(f'Не удалось прочитать структуру xlsx: {e}') from e
+    return output_stream.getvalue()
@@ -0,0 +1,227 @@
+"""
+Потоковое чтение первого листа xlsx без создания объектов ячеек openpyxl.
+XML листа разбирается построчно (iterparse), обработанные строки сразу освобождаются.
+Значения приводятся так же, как в pd.read_excel(engine='openpyxl'),
+итоговый DataFrame строится тем же TextParser, поэтому результат совпадает с pd.read_excel.
+"""
+import io
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.cell import column_index_from_string
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel
+from pandas.io.parsers import TextParser
+
+NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+DOC_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+ROW = f'{NS}row'
+CELL = f'{NS}c'
+VALUE = f'{NS}v'
+INLINE = f'{NS}is'
+TEXT = f'{NS}t'
+RUN = f'{NS}r'
+MERGE_CELL = f'{NS}mergeCell'
+
+CELL_REF_RE = re.compile(r'^([A-Z]+)')
+
+
+class XlsxReadError(ValueError):
+    """Структура файла не поддерживается потоковым чтением, нужно читать через pd.read_excel"""
+
+
+def _text(element) -> str:
+    """Текст строки sharedStrings/inlineStr без фонетических подсказок (rPh)"""
+    parts = [t.text or '' for t in element.findall(TEXT)]
+    parts.extend(t.text or '' for run in element.findall(RUN) for t in run.findall(TEXT))
+    return ''.join(parts)
+
+
+def _first_sheet_path(archive: zipfile.ZipFile) -> str:
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    sheet = workbook.find(f'{NS}sheets/{NS}sheet')
+    rel_id = sheet.get(f'{DOC_REL_NS}id')
+    rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels.iter(f'{REL_NS}Relationship'):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            if target.startswith('/'):
+                return target.lstrip('/')
+            return posixpath.normpath(posixpath.join('xl', target))
+    raise KeyError(rel_id)
+
+
+def _epoch(archive: zipfile.ZipFile):
+    workbook_pr = ET.fromstring(archive.read('xl/workbook.xml')).find(f'{NS}workbookPr')
+    if workbook_pr is not None and workbook_pr.get('date1904') in ('1', 'true'):
+        return CALENDAR_MAC_1904
+    return CALENDAR_WINDOWS_1900
+
+
+def _shared_strings(archive: zipfile.ZipFile) -> list:
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as stream:
+        for _, element in ET.iterparse(stream):
+            if element.tag == f'{NS}si':
+                strings.append(_text(element))
+                element.clear()
+    return strings
+
+
+def _date_styles(archive: zipfile.ZipFile) -> dict:
+    """Индексы стилей ячеек с форматом даты/времени: {индекс стиля: формат длительности}"""
+    if 'xl/styles.xml' not in archive.namelist():
+        return {}
+    styles = ET.fromstring(archive.read('xl/styles.xml'))
+    formats = dict(BUILTIN_FORMATS)
+    for num_fmt in styles.iter(f'{NS}numFmt'):
+        formats[int(num_fmt.get('numFmtId'))] = num_fmt.get('formatCode')
+    date_styles = {}
+    cell_xfs = styles.find(f'{NS}cellXfs')
+    for index, xf in enumerate(cell_xfs if cell_xfs is not None else []):
+        fmt = formats.get(int(xf.get('numFmtId', 0)))
+        if fmt and is_date_format(fmt):
+            date_styles[index] = is_timedelta_format(fmt)
+    return date_styles
+
+
+def _number(value: str):
+    if '.' in value or 'E' in value or 'e' in value:
+        number = float(value)
+        return int(number) if number.is_integer() else number
+    return int(value)
+
+
+def _iter_rows(file_bytes: bytes, usecols=None, merges: list = None):
+    """
+        Строки первого листа: пары (список значений, есть ли в строке данные).
+        usecols - номера нужных столбцов (с 0), остальные ячейки пропускаются без разбора значения
+        и остаются пустыми. Пропущенные в XML строки возвращаются пустыми, пустые ячейки - пустой строкой.
+        В merges, если передан, добавляются адреса объединённых ячеек (mergeCells идут в XML после строк)
+    """
+    wanted = set(usecols) if usecols is not None else None
+    columns_cache = {}
+
+    with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+        shared_strings = _shared_strings(archive)
+        date_styles = _date_styles(archive)
+        epoch = _epoch(archive)
+        row_number = 0
+        with archive.open(_first_sheet_path(archive)) as stream:
+            for _, element in ET.iterparse(stream):
+                if element.tag != ROW:
+                    if element.tag == MERGE_CELL and merges is not None:
+                        merges.append(element.get('ref'))
+                    continue
+                index = int(element.get('r', row_number + 1))
+                while row_number + 1 < index:
+                    row_number += 1
+                    yield [], False
+                row_number = index
+
+                values = {}
+                skipped_data = False
+                col_index = -1
+                for cell in element.iter(CELL):
+                    ref = cell.get('r')
+                    if ref:
+                        letters = CELL_REF_RE.match(ref).group(1)
+                        col_index = columns_cache.get(letters)
+                        if col_index is None:
+                            col_index = columns_cache[letters] = column_index_from_string(letters) - 1
+                    else:
+                        col_index += 1
+                    if wanted is not None and col_index not in wanted:
+                        skipped_data = skipped_data or bool(cell.findtext(VALUE) or cell.find(INLINE) is not None)
+                        continue
+                    position = col_index
+
+                    cell_type = cell.get('t', 'n')
+                    if cell_type == 'inlineStr':
+                        inline = cell.find(INLINE)
+                        values[position] = _text(inline) if inline is not None else ''
+                        continue
+                    raw = cell.findtext(VALUE)
+                    if not raw:
+                        continue
+                    if cell_type == 'n':
+                        style = int(cell.get('s', 0))
+                        if style in date_styles:
+                            values[position] = from_excel(float(raw), epoch, timedelta=date_styles[style])
+                        else:
+                            values[position] = _number(raw)
+                    elif cell_type == 's':
+                        values[position] = shared_strings[int(raw)]
+                    elif cell_type == 'b':
+                        values[position] = raw == '1'
+                    elif cell_type == 'e':
+                        values[position] = float('nan')
+                    else:
+                        values[position] = raw
+                element.clear()
+
+                if not values:
+                    yield [], skipped_data
+                    continue
+                row = [''] * (max(values) + 1)
+                for position, value in values.items():
+                    row[position] = value
+                yield row, skipped_data
+
+
+def read_header(file_bytes: bytes, usecols=None) -> list:
+    """Значения первой строки первого листа, остальные строки не разбираются"""
+    try:
+        rows = _iter_rows(file_bytes, usecols)
+        row, _ = next(rows, ([], False))
+        rows.close()
+    except (KeyError, AttributeError, IndexError, ET.ParseError, zipfile.BadZipFile) as e:
+        raise XlsxReadError(f'Не удалось прочитать xlsx потоково: {e}') from e
+    return row
+
+
+def _read_rows(file_bytes: bytes, usecols=None, merges: list = None) -> list:
+    """Строки первого листа до последней строки с данными, строка i списка - строка i + 1 листа"""
+    data = []
+    last_row_with_data = -1
+    try:
+        for row_number, (row, has_data) in enumerate(_iter_rows(file_bytes, usecols, merges)):
+            while row and row[-1] == '':
+                row.pop()
+            if row or has_data:
+                last_row_with_data = row_number
+            data.append(row)
+    except (KeyError, AttributeError, IndexError, ET.ParseError, zipfile.BadZipFile) as e:
+        raise XlsxReadError(f'Не удалось прочитать xlsx потоково: {e}') from e
+    return data[:last_row_with_data + 1]
+
+
+def _pad(rows: list, width: int) -> None:
+    """Дополнение строк пустыми ячейками до width на месте, без второй копии таблицы"""
+    for row in rows:
+        row.extend([''] * (width - len(row)))
+
+
+def read_xlsx(file_bytes: bytes, usecols=None, dtype=None) -> pd.DataFrame:
+    """
+        Чтение первого листа xlsx в DataFrame, первая строка - заголовок.
+        usecols - номера столбцов (с 0), которые нужно прочитать
+    """
+    data = _read_rows(file_bytes, usecols)
+    if not data:
+        return pd.DataFrame()
+
+    max_width = max(len(row) for row in data)
+    if usecols is not None:
+        usecols = sorted(set(usecols))
+        max_width = max(max_width, usecols[-1] + 1)
+    _pad(data, max_width)
+    with TextParser(data, header=0, usecols=usecols, dtype=dtype, skip_blank_lines=False) as parser:
+        return parser.read()
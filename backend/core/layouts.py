@@ -0,0 +1,30 @@
+from django.db import DatabaseError
+from django.db.models import F
+from django.utils import timezone
+
+from .excel import layout_cache
+from .models import SupplierLayout
+from .utils.logging import logger
+
+
+class DatabaseLayoutStore(layout_cache.LayoutStore):
+    """Макеты прайсов в базе данных. Недоступность базы не прерывает обработку - файл распознаётся заново"""
+
+    def get(self, supplier, fingerprint):
+        try:
+            layout = SupplierLayout.objects.filter(supplier=supplier, fingerprint=fingerprint).first()
+            if layout is None:
+                return None
+            SupplierLayout.objects.filter(pk=layout.pk).update(hits=F('hits') + 1, last_used_at=timezone.now())
+        except DatabaseError as e:
+            logger.warning('Не удалось получить макет %s: %s', supplier, e)
+            return None
+        return layout.columns
+
+    def save(self, supplier, fingerprint, headers, columns):
+        try:
+            # Макет, заданный вручную, не перезаписывается
+            SupplierLayout.objects.get_or_create(supplier=supplier, fingerprint=fingerprint,
+                                                 defaults={'headers': headers, 'columns': columns})
+        except DatabaseError as e:
+            logger.warning('Не удалось сохранить макет %s: %s', supplier, e)
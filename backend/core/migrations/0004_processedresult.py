@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_alter_uploadedfile_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessedResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('input_hash', models.CharField(max_length=64, verbose_name='SHA-256 входного файла')),
+                ('processor_type', models.CharField(max_length=50, verbose_name='Тип обработки')),
+                ('config_version', models.CharField(max_length=64, verbose_name='Версия правил')),
+                ('file_key', models.CharField(max_length=255, verbose_name='Ключ результата')),
+                ('size', models.BigIntegerField(default=0, verbose_name='Размер')),
+                ('meta', models.JSONField(default=dict, verbose_name='Метаданные')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='Попаданий')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Последнее использование')),
+            ],
+            options={
+                'verbose_name': 'Кэшированный результат',
+                'verbose_name_plural': 'Кэшированные результаты',
+                'ordering': ['-last_used_at'],
+                'constraints': [models.UniqueConstraint(fields=('input_hash', 'processor_type', 'config_version'), name='unique_processed_result')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-18 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_processedresult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierLayout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('supplier', models.CharField(max_length=255, verbose_name='Поставщик')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='Отпечаток макета')),
+                ('headers', models.JSONField(default=list, verbose_name='Заголовки файла')),
+                ('columns', models.JSONField(default=list, help_text='Имена столбцов по порядку, как после распознавания', verbose_name='Столбцы')),
+                ('is_overridden', models.BooleanField(default=False, verbose_name='Задано вручную')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='Использований')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, verbose_name='Последнее использование')),
+            ],
+            options={
+                'verbose_name': 'Макет прайса',
+                'verbose_name_plural': 'Макеты прайсов',
+                'ordering': ['supplier', '-last_used_at'],
+                'constraints': [models.UniqueConstraint(fields=('supplier', 'fingerprint'), name='unique_supplier_layout')],
+            },
+        ),
+    ]
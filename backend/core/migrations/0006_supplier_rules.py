@@ -0,0 +1,83 @@
+# Generated by Django 6.0 on 2026-10-18 14:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_supplierlayout'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MultiplicityGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Группа')),
+                ('key_words', models.JSONField(default=list, verbose_name='Ключевые слова')),
+                ('anti_key_words', models.JSONField(blank=True, default=list, verbose_name='Исключающие слова')),
+                ('multiplicity', models.PositiveIntegerField(verbose_name='Кратность')),
+                ('order', models.PositiveIntegerField(default=0, verbose_name='Порядок проверки')),
+            ],
+            options={
+                'verbose_name': 'Группа кратности',
+                'verbose_name_plural': 'Группы кратности',
+                'ordering': ['order', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceSupplier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Поставщик')),
+                ('file_name_words', models.JSONField(blank=True, default=list, help_text='Файл относится к поставщику, если в имени есть все слова (имя разбивается по "_")', verbose_name='Слова в имени файла')),
+                ('order', models.PositiveIntegerField(default=0, verbose_name='Порядок проверки имени файла')),
+            ],
+            options={
+                'verbose_name': 'Поставщик прайса',
+                'verbose_name_plural': 'Поставщики прайсов',
+                'ordering': ['order', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuantityKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Название столбца')),
+            ],
+            options={
+                'verbose_name': 'Столбец количества',
+                'verbose_name_plural': 'Столбцы количества',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UnnecessaryBrand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Сравнивается без учёта регистра', max_length=255, unique=True, verbose_name='Бренд')),
+            ],
+            options={
+                'verbose_name': 'Исключённый бренд',
+                'verbose_name_plural': 'Исключённые бренды',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceColumn',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Столбец')),
+                ('position', models.PositiveSmallIntegerField(verbose_name='Позиция (с 1)')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='columns', to='core.pricesupplier', verbose_name='Поставщик')),
+            ],
+            options={
+                'verbose_name': 'Столбец прайса',
+                'verbose_name_plural': 'Столбцы прайса',
+                'ordering': ['supplier', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('supplier', 'name'), name='unique_price_column')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+
+def seed_rules(apps, schema_editor):
+    """Перенос правил из core/excel/settings.py в базу"""
+    from core.excel import settings as rules
+
+    PriceSupplier = apps.get_model('core', 'PriceSupplier')
+    PriceColumn = apps.get_model('core', 'PriceColumn')
+    QuantityKey = apps.get_model('core', 'QuantityKey')
+    UnnecessaryBrand = apps.get_model('core', 'UnnecessaryBrand')
+    MultiplicityGroup = apps.get_model('core', 'MultiplicityGroup')
+
+    # Поставщики с PRICE_NAMES проверяются первыми в том же порядке, что и в settings.py
+    names_order = list(rules.PRICE_NAMES)
+    for index, (name, columns) in enumerate(rules.PRICE_SETTINGS.items()):
+        order = names_order.index(name) if name in names_order else len(names_order) + index
+        supplier = PriceSupplier.objects.create(name=name, file_name_words=rules.PRICE_NAMES.get(name, []),
+                                                order=order)
+        PriceColumn.objects.bulk_create([PriceColumn(supplier=supplier, name=column, position=position)
+                                         for column, position in columns.items()])
+
+    QuantityKey.objects.bulk_create([QuantityKey(name=name) for name in rules.QUANTITY_KEYS])
+    UnnecessaryBrand.objects.bulk_create([UnnecessaryBrand(name=name) for name in rules.UNNECESSARY_BRANDS])
+    MultiplicityGroup.objects.bulk_create([
+        MultiplicityGroup(name=name, key_words=key_words, anti_key_words=rules.anti_key_words.get(name, []),
+                          multiplicity=rules.multiplicity[name], order=index)
+        for index, (name, key_words) in enumerate(rules.key_words.items())
+    ])
+
+
+def unseed_rules(apps, schema_editor):
+    for model in ('PriceSupplier', 'QuantityKey', 'UnnecessaryBrand', 'MultiplicityGroup'):
+        apps.get_model('core', model).objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_supplier_rules'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_rules, unseed_rules),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_seed_supplier_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssortmentUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, verbose_name='Файл')),
+                ('items', models.PositiveIntegerField(default=0, verbose_name='Позиций')),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True, verbose_name='Загружен')),
+            ],
+            options={
+                'verbose_name': 'Загрузка ассортимента',
+                'verbose_name_plural': 'Загрузки ассортимента',
+                'ordering': ['-uploaded_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AssortmentItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('brand', models.CharField(max_length=255, verbose_name='Производитель')),
+                ('article', models.CharField(max_length=255, verbose_name='Номер по каталогу')),
+            ],
+            options={
+                'verbose_name': 'Позиция ассортимента',
+                'verbose_name_plural': 'Ассортимент',
+                'ordering': ['brand', 'article'],
+                'constraints': [models.UniqueConstraint(fields=('brand', 'article'), name='unique_assortment_item')],
+            },
+        ),
+    ]
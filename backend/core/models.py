@@ -3,6 +3,8 @@ import os
 
 from django.contrib.auth import get_user_model
 
+from .utils import task_files
+
 User = get_user_model()
 
 
@@ -75,3 +77,171 @@ class UploadedFile(models.Model):
             return os.path.splitext(self.file.name)[1]
         else:
             return ''
+
+
+class ProcessedResult(models.Model):
+    """Кэш результатов обработки: ключ - хэш входного файла, тип обработки и версия правил"""
+    input_hash = models.CharField(max_length=64, verbose_name='SHA-256 входного файла')
+    processor_type = models.CharField(max_length=50, verbose_name='Тип обработки')
+    config_version = models.CharField(max_length=64, verbose_name='Версия правил')
+    file_key = models.CharField(max_length=255, verbose_name='Ключ результата')
+    size = models.BigIntegerField(default=0, verbose_name='Размер')
+    meta = models.JSONField(default=dict, verbose_name='Метаданные')
+    hits = models.PositiveIntegerField(default=0, verbose_name='Попаданий')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создан')
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Последнее использование')
+
+    class Meta:
+        verbose_name = 'Кэшированный результат'
+        verbose_name_plural = 'Кэшированные результаты'
+        ordering = ['-last_used_at']
+        constraints = [
+            models.UniqueConstraint(fields=['input_hash', 'processor_type', 'config_version'],
+                                    name='unique_processed_result'),
+        ]
+
+    def __str__(self):
+        return f'{self.processor_type}: {self.meta.get("filename", self.file_key)}'
+
+    def delete(self, *args, **kwargs):
+        task_files.delete(self.file_key)
+        super().delete(*args, **kwargs)
+
+
+class SupplierLayout(models.Model):
+    """Распознанный макет прайса поставщика: отпечаток заголовков и типов столбцов -> имена столбцов"""
+    supplier = models.CharField(max_length=255, verbose_name='Поставщик')
+    fingerprint = models.CharField(max_length=64, verbose_name='Отпечаток макета')
+    headers = models.JSONField(default=list, verbose_name='Заголовки файла')
+    columns = models.JSONField(default=list, verbose_name='Столбцы',
+                               help_text='Имена столбцов по порядку, как после распознавания')
+    is_overridden = models.BooleanField(default=False, verbose_name='Задано вручную')
+    hits = models.PositiveIntegerField(default=0, verbose_name='Использований')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создан')
+    last_used_at = models.DateTimeField(auto_now_add=True, verbose_name='Последнее использование')
+
+    class Meta:
+        verbose_name = 'Макет прайса'
+        verbose_name_plural = 'Макеты прайсов'
+        ordering = ['supplier', '-last_used_at']
+        constraints = [
+            models.UniqueConstraint(fields=['supplier', 'fingerprint'], name='unique_supplier_layout'),
+        ]
+
+    def __str__(self):
+        return f'{self.supplier}: {self.fingerprint[:12]}'
+
+
+class PriceSupplier(models.Model):
+    """Поставщик прайса: столбцы (PRICE_SETTINGS) и слова в имени файла (PRICE_NAMES)"""
+    name = models.CharField(max_length=255, unique=True, verbose_name='Поставщик')
+    file_name_words = models.JSONField(default=list, blank=True, verbose_name='Слова в имени файла',
+                                       help_text='Файл относится к поставщику, если в имени есть все слова '
+                                                 '(имя разбивается по "_")')
+    order = models.PositiveIntegerField(default=0, verbose_name='Порядок проверки имени файла')
+
+    class Meta:
+        verbose_name = 'Поставщик прайса'
+        verbose_name_plural = 'Поставщики прайсов'
+        ordering = ['order', 'name']
+
+    def __str__(self):
+        return self.name
+
+
+class PriceColumn(models.Model):
+    supplier = models.ForeignKey(PriceSupplier, on_delete=models.CASCADE, related_name='columns',
+                                 verbose_name='Поставщик')
+    name = models.CharField(max_length=255, verbose_name='Столбец')
+    position = models.PositiveSmallIntegerField(verbose_name='Позиция (с 1)')
+
+    class Meta:
+        verbose_name = 'Столбец прайса'
+        verbose_name_plural = 'Столбцы прайса'
+        ordering = ['supplier', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['supplier', 'name'], name='unique_price_column'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.position})'
+
+
+class QuantityKey(models.Model):
+    """Названия столбца с количеством товара (QUANTITY_KEYS)"""
+    name = models.CharField(max_length=255, unique=True, verbose_name='Название столбца')
+
+    class Meta:
+        verbose_name = 'Столбец количества'
+        verbose_name_plural = 'Столбцы количества'
+        ordering = ['id']
+
+    def __str__(self):
+        return self.name
+
+
+class UnnecessaryBrand(models.Model):
+    """Бренды, исключаемые из отчётов (UNNECESSARY_BRANDS)"""
+    name = models.CharField(max_length=255, unique=True, verbose_name='Бренд',
+                            help_text='Сравнивается без учёта регистра')
+
+    class Meta:
+        verbose_name = 'Исключённый бренд'
+        verbose_name_plural = 'Исключённые бренды'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.name = self.name.strip().lower()
+        super().save(*args, **kwargs)
+
+
+class MultiplicityGroup(models.Model):
+    """Группа товаров для отчёта кратности (key_words, anti_key_words, multiplicity)"""
+    name = models.CharField(max_length=255, unique=True, verbose_name='Группа')
+    key_words = models.JSONField(default=list, verbose_name='Ключевые слова')
+    anti_key_words = models.JSONField(default=list, blank=True, verbose_name='Исключающие слова')
+    multiplicity = models.PositiveIntegerField(verbose_name='Кратность')
+    order = models.PositiveIntegerField(default=0, verbose_name='Порядок проверки')
+
+    class Meta:
+        verbose_name = 'Группа кратности'
+        verbose_name_plural = 'Группы кратности'
+        ordering = ['order', 'name']
+
+    def __str__(self):
+        return self.name
+
+
+class AssortmentUpload(models.Model):
+    """Загрузка справочника ассортимента. Последняя загрузка - текущая версия справочника"""
+    file_name = models.CharField(max_length=255, verbose_name='Файл')
+    items = models.PositiveIntegerField(default=0, verbose_name='Позиций')
+    uploaded_at = models.DateTimeField(auto_now_add=True, verbose_name='Загружен')
+
+    class Meta:
+        verbose_name = 'Загрузка ассортимента'
+        verbose_name_plural = 'Загрузки ассортимента'
+        ordering = ['-uploaded_at']
+
+    def __str__(self):
+        return f'{self.file_name} ({self.items})'
+
+
+class AssortmentItem(models.Model):
+    """Позиция справочника ассортимента, производитель и номер хранятся в нижнем регистре"""
+    brand = models.CharField(max_length=255, verbose_name='Производитель')
+    article = models.CharField(max_length=255, verbose_name='Номер по каталогу')
+
+    class Meta:
+        verbose_name = 'Позиция ассортимента'
+        verbose_name_plural = 'Ассортимент'
+        ordering = ['brand', 'article']
+        constraints = [
+            models.UniqueConstraint(fields=['brand', 'article'], name='unique_assortment_item'),
+        ]
+
+    def __str__(self):
+        return f'{self.brand} {self.article}'
@@ -0,0 +1,92 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .excel.registry import get_config_version
+from .models import ProcessedResult
+from .utils.logging import logger
+
+
+def params_hash(input_hash: str, params: dict) -> str:
+    """
+        Хэш файла с параметрами обработки: результаты одного файла с разными параметрами хранятся отдельно.
+        Для процессоров, результат которых зависит от имени файла, имя передаётся в params
+    """
+    if not params:
+        return input_hash
+    data = json.dumps({'input': input_hash, 'params': params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def lookup(input_hash: str, processor_type: str):
+    """Поиск готового результата для файла. Возвращает ProcessedResult или None"""
+    entry = ProcessedResult.objects.filter(
+        input_hash=input_hash,
+        processor_type=processor_type,
+        config_version=get_config_version(processor_type),
+    ).first()
+    if entry is None:
+        return None
+    ProcessedResult.objects.filter(pk=entry.pk).update(hits=F('hits') + 1, last_used_at=timezone.now())
+    return entry
+
+
+def store(input_hash: str, processor_type: str, file_key: str, size: int, meta: dict) -> None:
+    """Сохранение результата в кэш с последующим вытеснением устаревших и давно не используемых записей"""
+    try:
+        ProcessedResult.objects.create(
+            input_hash=input_hash,
+            processor_type=processor_type,
+            config_version=get_config_version(processor_type),
+            file_key=file_key,
+            size=size,
+            meta=meta,
+        )
+    except IntegrityError:
+        # Тот же файл уже обработан параллельной задачей
+        return
+    evict(processor_type)
+
+
+def invalidate(processor_type: str = None) -> int:
+    """Удаление записей, созданных по устаревшей версии правил. Возвращает количество удалённых"""
+    removed = 0
+    processor_types = [processor_type] if processor_type else (
+        ProcessedResult.objects.values_list('processor_type', flat=True).distinct())
+    for p_type in list(processor_types):
+        try:
+            version = get_config_version(p_type)
+        except ValueError:
+            version = None
+        for entry in ProcessedResult.objects.filter(processor_type=p_type).exclude(config_version=version):
+            entry.delete()
+            removed += 1
+    return removed
+
+
+def clear(processor_type: str) -> int:
+    """Удаление всех результатов типа обработки, например после ручного изменения макета. Возвращает количество"""
+    removed = 0
+    for entry in ProcessedResult.objects.filter(processor_type=processor_type):
+        entry.delete()
+        removed += 1
+    return removed
+
+
+def evict(processor_type: str = None) -> None:
+    """Вытеснение по LRU, пока суммарный размер кэша больше RESULT_CACHE_MAX_BYTES"""
+    invalidate(processor_type)
+    max_bytes = settings.RESULT_CACHE_MAX_BYTES
+    total = ProcessedResult.objects.aggregate(total=Sum('size'))['total'] or 0
+    if total <= max_bytes:
+        return
+    for entry in ProcessedResult.objects.order_by('last_used_at').iterator():
+        if total <= max_bytes:
+            break
+        total -= entry.size
+        entry.delete()
+        logger.info('Результат %s вытеснен из кэша', entry.file_key)
@@ -0,0 +1,122 @@
+"""
+Правила обработки из базы данных.
+Снимок правил кэшируется в каждом процессе (core.excel.rules). После изменения правил
+новая версия публикуется в канал Redis, процессы сбрасывают снимок и загружают правила заново при следующем файле.
+"""
+import os
+import threading
+import time
+
+import redis
+from django.db import DatabaseError, transaction
+from django.db.models.signals import post_delete, post_save
+
+from .excel import rules
+from .models import MultiplicityGroup, PriceColumn, PriceSupplier, QuantityKey, UnnecessaryBrand
+from .utils import progress
+from .utils.logging import logger
+
+CHANNEL = 'rules-version'
+RECONNECT_DELAY = (1, 5, 30)
+RULES_MODELS = (PriceSupplier, PriceColumn, QuantityKey, UnnecessaryBrand, MultiplicityGroup)
+
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+class DatabaseRulesSource(rules.RulesSource):
+    """Правила из базы данных. Если база недоступна, используются правила из settings.py"""
+
+    def load(self) -> rules.Rules:
+        start_listener()
+        try:
+            return load_rules()
+        except DatabaseError as e:
+            logger.warning('Не удалось загрузить правила из базы, используются settings.py: %s', e)
+            return rules.from_settings()
+
+
+def load_rules() -> rules.Rules:
+    suppliers = list(PriceSupplier.objects.prefetch_related('columns'))
+    groups = list(MultiplicityGroup.objects.all())
+    return rules.Rules(
+        price_settings={supplier.name: {column.name: column.position for column in supplier.columns.all()}
+                        for supplier in suppliers},
+        price_names={supplier.name: list(supplier.file_name_words) for supplier in suppliers
+                     if supplier.file_name_words},
+        quantity_keys=tuple(QuantityKey.objects.values_list('name', flat=True)),
+        unnecessary_brands=list(UnnecessaryBrand.objects.values_list('name', flat=True)),
+        key_words={group.name: list(group.key_words) for group in groups},
+        anti_key_words={group.name: list(group.anti_key_words) for group in groups if group.anti_key_words},
+        multiplicity={group.name: group.multiplicity for group in groups},
+    )
+
+
+def publish_version() -> None:
+    """Сброс снимка в текущем процессе и оповещение остальных процессов"""
+    rules.invalidate()
+    try:
+        version = load_rules().version
+        progress.get_client().publish(CHANNEL, version)
+        logger.info('Опубликована версия правил %s', version)
+    except (redis.RedisError, DatabaseError) as e:
+        logger.warning('Не удалось опубликовать версию правил: %s', e)
+
+
+def _listen() -> None:
+    attempt = 0
+    reconnect = False
+    while True:
+        try:
+            pubsub = progress.get_client().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CHANNEL)
+            if reconnect:
+                # Пока подписки не было, изменения могли быть пропущены
+                rules.invalidate()
+            attempt = 0
+            for message in pubsub.listen():
+                data = message['data']
+                rules.invalidate(data.decode() if isinstance(data, bytes) else data)
+        except redis.RedisError as e:
+            delay = RECONNECT_DELAY[min(attempt, len(RECONNECT_DELAY) - 1)]
+            if attempt == 0:
+                logger.warning('Подписка на изменения правил прервана: %s', e)
+            attempt += 1
+            reconnect = True
+            time.sleep(delay)
+
+
+def start_listener() -> None:
+    """Запуск подписки на версии правил в текущем процессе (после fork поток запускается заново)"""
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        _listener_pid = os.getpid()
+        threading.Thread(target=_listen, name='rules-listener', daemon=True).start()
+
+
+def _on_rules_changed(sender, **kwargs):
+    """
+        Одна публикация версии на транзакцию, сколько бы записей правил в ней ни изменилось
+        (массовое редактирование в админке, загрузка). Ожидающая публикация хранится у соединения;
+        при откате транзакции Django удаляет её из run_on_commit, и следующее изменение запланирует новую
+    """
+    connection = transaction.get_connection()
+    pending = getattr(connection, 'rules_publish_callback', None)
+    if pending is not None and any(func is pending for _, func, *_ in connection.run_on_commit):
+        return
+
+    def publish():
+        connection.rules_publish_callback = None
+        publish_version()
+
+    connection.rules_publish_callback = publish
+    transaction.on_commit(publish)
+
+
+for model in RULES_MODELS:
+    post_save.connect(_on_rules_changed, sender=model, dispatch_uid=f'rules_changed_save_{model.__name__}')
+    post_delete.connect(_on_rules_changed, sender=model, dispatch_uid=f'rules_changed_delete_{model.__name__}')
@@ -1,6 +1,27 @@
+import asyncio
 import io
+import json
+import uuid
 
+import redis.asyncio as aioredis
+from asgiref.sync import sync_to_async
+from celery import chord, group
+from celery.result import AsyncResult
+from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.urls import reverse
+from rest_framework import status
+
+from .task import process_single_file_task, zip_batch_results
+from .utils import progress, task_files
+from .excel.base_excel_processor_V2 import ExcelProcessor
+from .excel.registry import get_processor
+from . import result_cache
+
+SSE_HEARTBEAT = 15
+SSE_TIMEOUT = 60 * 60
+NOT_FOUND_EVENT = {'state': 'FAILURE', 'error': 'Пакет не найден'}
 
 
 def create_in_memory_uploaded_file(file):
@@ -34,3 +55,198 @@ def get_file_information(file, request, doc_type_default, contxt=''):
 
 def get_file_name(file):
     return file.name
+
+
+def get_task_state(task_id):
+    """Состояние задачи для ответа API. Возвращает (данные, HTTP статус)"""
+    task = AsyncResult(task_id, app=process_single_file_task.app)
+
+    if task.status == 'PENDING':
+        response = {
+            'state': task.state,
+            'status': 'Ожидание обработки',
+        }
+        return response, status.HTTP_202_ACCEPTED
+
+    elif task.state == 'SUCCESS':
+        result = task.result
+        response = {
+            'state': task.state,
+            'success': result['success'],
+            'meta': result['meta'],
+            'size': result.get('size'),
+            'file_url': reverse('api_get_task_file', args=[task_id])
+        }
+        return response, status.HTTP_200_OK
+    elif task.state == 'FAILURE':
+        response = {
+            'state': task.state,
+            'error': str(task.info)
+        }
+        return response, status.HTTP_500_INTERNAL_SERVER_ERROR
+    else:
+        response = {
+            'state': task.state,
+            'error': str(task.info)
+        }
+        return response, status.HTTP_400_BAD_REQUEST
+
+
+def format_event(data: dict) -> str:
+    return f'data: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+async def event_stream(channel: str, load_state):
+    """
+        Поток SSE событий: текущее состояние, затем события из канала прогресса.
+        При завершении задачи состояние перечитывается через load_state, поток закрывается,
+        когда это состояние итоговое. Если load_state вернул None (пакет истёк), отправляется итоговое
+        событие с ошибкой.
+    """
+    client = aioredis.from_url(settings.PROGRESS_REDIS_URL)
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(channel)
+        # Состояние читается после подписки, чтобы не пропустить завершение задачи между ними
+        data = await sync_to_async(load_state)() or NOT_FOUND_EVENT
+        yield format_event(data)
+        if data['state'] in progress.TERMINAL_STATES:
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SSE_TIMEOUT
+        while loop.time() < deadline:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=SSE_HEARTBEAT)
+            if message is None:
+                yield ': keep-alive\n\n'
+                continue
+            event = json.loads(message['data'])
+            if event['state'] not in progress.TERMINAL_STATES:
+                yield format_event(event)
+                continue
+            data = await sync_to_async(load_state)() or NOT_FOUND_EVENT
+            yield format_event(data)
+            if data['state'] in progress.TERMINAL_STATES:
+                return
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
+
+
+def task_event_stream(task_id):
+    return event_stream(progress.channel_name(task_id), lambda: get_task_state(task_id)[0])
+
+
+def batch_event_stream(batch_id):
+    return event_stream(progress.batch_channel_name(batch_id), lambda: get_batch_state(batch_id))
+
+
+def batch_cache_key(batch_id: str) -> str:
+    return f'batch:{batch_id}'
+
+
+def create_batch(files, upload_type: str, archive: bool = False, data=None) -> dict:
+    """
+        Запуск пакетной обработки файлов одной группой Celery.
+        data - поля запроса загрузки, из них процессор берёт свои параметры (parse_params),
+        параметры одинаковы для всех файлов пакета.
+        Файлы, уже обработанные по текущей версии правил, берутся из кэша результатов
+        и сразу получают состояние SUCCESS, задачи для них не запускаются.
+        При archive=True группа запускается как chord, callback упаковывает результаты в архив.
+        Описание пакета сохраняется в кэше, статус пакета читается по его batch_id.
+    """
+    type_processor = get_processor(upload_type)['type_processor']
+    params = type_processor.parse_params(data or {})
+    cache_params = params
+    batch_id = uuid.uuid4().hex
+    tasks = []
+    signatures = []
+    cached_results = []
+    for file in files:
+        task_id = uuid.uuid4().hex
+        if type_processor.NAME_DEPENDENT:
+            cache_params = {**params, 'file_name': file.name}
+        input_hash = result_cache.params_hash(task_files.file_sha256(file), cache_params)
+        entry = result_cache.lookup(input_hash, upload_type)
+        if entry is not None:
+            # Имя результата строится по имени текущего файла, а не файла, для которого результат сохранён
+            file_name = type_processor(b'', file.name, params).get_file_name
+            result = {'success': True, 'file_key': entry.file_key, 'size': entry.size,
+                      'meta': {**entry.meta, **ExcelProcessor.success_meta(file_name), 'cached': True}}
+            process_single_file_task.backend.store_result(task_id, result, 'SUCCESS')
+            cached_results.append(result)
+        else:
+            input_key = task_files.save_upload(file)
+            signatures.append(process_single_file_task.s(input_key, file.name, upload_type,
+                                                         batch_id=batch_id, input_hash=input_hash,
+                                                         params=params)
+                              .set(task_id=task_id))
+        tasks.append({'filename': file.name, 'task_id': task_id, 'cached': entry is not None})
+
+    archive_task_id = None
+    if archive:
+        archive_task_id = uuid.uuid4().hex
+        callback = zip_batch_results.s(batch_id=batch_id, cached_results=cached_results).set(task_id=archive_task_id)
+        if signatures:
+            chord(group(signatures), callback).apply_async()
+        else:
+            callback.apply_async(args=([],))
+    elif signatures:
+        group(signatures).apply_async()
+
+    batch = {'batch_id': batch_id, 'tasks': tasks, 'archive_task_id': archive_task_id}
+    cache.set(batch_cache_key(batch_id), batch, settings.BATCH_TTL)
+    return batch
+
+
+def is_processed(task_state: dict) -> bool:
+    """
+        Файл обработан. Обработчик перехватывает ошибки файла (ExcelProcessor.process),
+        поэтому задача с ошибкой обработки завершается в состоянии SUCCESS с meta.success = False
+    """
+    return task_state['state'] == 'SUCCESS' and bool(task_state.get('meta', {}).get('success'))
+
+
+def get_batch_state(batch_id: str):
+    """Сводное состояние пакета. None, если пакет не найден"""
+    batch = cache.get(batch_cache_key(batch_id))
+    if batch is None:
+        return None
+
+    tasks = []
+    counters = {'completed': 0, 'failed': 0}
+    task_errors = 0
+    for item in batch['tasks']:
+        task_state, _ = get_task_state(item['task_id'])
+        if task_state['state'] in progress.TERMINAL_STATES:
+            counters['completed'] += 1
+            if not is_processed(task_state):
+                counters['failed'] += 1
+            if task_state['state'] != 'SUCCESS':
+                task_errors += 1
+        tasks.append({**item, **task_state})
+
+    archive = None
+    finished = counters['completed'] == len(tasks)
+    if batch['archive_task_id']:
+        archive_state, _ = get_task_state(batch['archive_task_id'])
+        archive = {'task_id': batch['archive_task_id'], **archive_state}
+        # callback chord не запускается, если задача пакета завершилась с ошибкой
+        finished = finished and (archive['state'] in progress.TERMINAL_STATES or task_errors > 0)
+
+    if not finished:
+        state = 'PROGRESS' if counters['completed'] else 'PENDING'
+    elif counters['failed'] == len(tasks):
+        state = 'FAILURE'
+    else:
+        state = 'SUCCESS'
+
+    return {
+        'batch_id': batch_id,
+        'state': state,
+        'total': len(tasks),
+        'completed': counters['completed'],
+        'failed': counters['failed'],
+        'tasks': tasks,
+        'archive': archive,
+    }
@@ -1,23 +1,104 @@
-import base64
-
-from celery import shared_task
+from celery import shared_task, Task
+from django.conf import settings
 from .excel.pipeline import ProcessingPipeline
 from .excel.registry import get_processor
+from .utils import task_files, progress
+from .models import ProcessedResult
+from .utils.logging import logger
+from . import result_cache
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """Маршрутизация задач обработки в очередь по типу обработки (PROCESSOR_QUEUES)"""
+    if name == 'core.task.process_single_file_task':
+        processing_type = args[2] if len(args) > 2 else kwargs.get('processing_type')
+        return {'queue': settings.PROCESSOR_QUEUES.get(processing_type, 'light')}
+    if name == 'core.task.zip_batch_results':
+        return {'queue': 'light'}
+    return None
+
 
+class ProgressTask(Task):
+    """
+        Публикует итоговое состояние задачи в канал прогресса.
+        on_success/on_failure вызываются после записи результата в result backend,
+        поэтому подписчик может сразу забрать результат.
+    """
 
-@shared_task(max_retries=3)
-def process_single_file_task(file_data_b64, file_name, processing_type):
+    def on_success(self, retval, task_id, args, kwargs):
+        progress.publish(task_id, 'SUCCESS', batch_id=kwargs.get('batch_id'))
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        progress.publish(task_id, 'FAILURE', batch_id=kwargs.get('batch_id'), error=str(exc))
+
+
+@shared_task(bind=True, base=ProgressTask, max_retries=3)
+def process_single_file_task(self, input_key, file_name, processing_type, batch_id=None, input_hash=None,
+                             params=None):
+    """
+        Обработка одного файла.
+        Через брокер передаётся только ключ файла в хранилище задач, результат сохраняется туда же,
+        в result backend попадают ключ результата и метаданные.
+        params - параметры обработки из запроса загрузки (см. BaseProcessingFiles.parse_params).
+        При переданном input_hash успешный результат сохраняется в кэш результатов,
+        остальные результаты удаляет cleanup_task_files. Файл читается целиком: обработчики работают с bytes.
+    """
+    task_id = self.request.id
+    progress.publish(task_id, 'PROGRESS', batch_id=batch_id, stage='reading', percent=0)
     p_type = get_processor(processing_type)
     pipeline = ProcessingPipeline(p_type)
-    file_bytes = base64.b64decode(file_data_b64)
-    processing_result, meta = pipeline.run(file_bytes, file_name)
+    file_bytes = task_files.read_bytes(input_key)
+
+    progress.publish(task_id, 'PROGRESS', batch_id=batch_id, stage='processing', percent=10)
+    processing_result, meta = pipeline.run(file_bytes, file_name, params)
     if not isinstance(processing_result, (bytes, bytearray)):
         raise ValueError(f"processing_result должен быть bytes, получил: {type(processing_result)}")
 
-    print(f'Processing result: {meta}')
-    processing_result_base64 = base64.b64encode(processing_result).decode('utf-8')
+    logger.info('Результат обработки %s: %s', file_name, meta)
+    progress.publish(task_id, 'PROGRESS', batch_id=batch_id, stage='saving', percent=90)
+    output_key = task_files.save_bytes(processing_result, meta.get('filename') or file_name)
+    task_files.delete(input_key)
+    if input_hash and meta.get('success'):
+        result_cache.store(input_hash, processing_type, output_key, len(processing_result), meta)
     return {
         'success': True,
-        'file_content': processing_result_base64,
+        'file_key': output_key,
+        'size': len(processing_result),
         'meta': meta
     }
+
+
+@shared_task(bind=True, base=ProgressTask)
+def zip_batch_results(self, results, batch_id=None, cached_results=()):
+    """
+        Callback chord: упаковка результатов пакета в один архив.
+        cached_results - результаты файлов пакета, взятые из кэша без запуска задач.
+        Файлы с ошибкой обработки (meta.success = False) в архив не попадают
+    """
+    entries = [(result['file_key'], result['meta'].get('filename') or result['file_key'])
+               for result in [*cached_results, *results]
+               if result and result.get('file_key') and result['meta'].get('success')]
+    file_name = f'batch_{batch_id}.zip' if batch_id else 'batch.zip'
+    archive_key, size = task_files.save_archive(entries, file_name)
+    return {
+        'success': True,
+        'file_key': archive_key,
+        'size': size,
+        'meta': {
+            'filename': file_name,
+            'success': True,
+            'message': f'Архив сформирован, файлов: {len(entries)}'
+        }
+    }
+
+
+@shared_task
+def cleanup_task_files():
+    """
+        Периодическая очистка хранилища задач (CELERY_BEAT_SCHEDULE): входные файлы и результаты
+        старше TASK_FILES_TTL. Результаты из кэша не удаляются, их удаляет вытеснение из кэша
+    """
+    keep = ProcessedResult.objects.values_list('file_key', flat=True)
+    removed = task_files.cleanup(settings.TASK_FILES_TTL, keep)
+    logger.info('Удалено файлов задач: %s', removed)
+    return removed
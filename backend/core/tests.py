@@ -1,8 +1,48 @@
-from django.test import TestCase
-from .excel.ple_v2 import SmartColumnDetector
+import asyncio
+import datetime
+import io
+import json
+import os
+import re
+import tempfile
+import zipfile
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from celery.result import AsyncResult
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from .excel.ple_v2 import ColumnType, SmartColumnDetector
 from .excel.pipeline import ProcessingPipeline
-from .excel.registry import get_processor
+from .excel.price_list_edit import PriceListEdit
+from .excel import assortment, csv_reader, rules
+from .excel.data_cleaning import open_file as clean_report
+from .assortment_store import replace_assortment
+from .excel.keyword_matcher import KeywordAutomaton
+from .excel.multiplicity_report import MultiplicityReport, keyword_multiplicity, normalize_column
+from .excel import settings as default_rules
+from .excel.supplier_names import SupplierNameIndex
+from .excel.base_excel_processor_V2 import ExcelProcessor
+from .excel.goods_movement_report import GoodsMovementReport
+from .excel.universal_report import (UniversalReport, distribute, distribute_goods, month_columns, recipient_demand,
+                                     sales_statistics)
+from .excel.xlsx_patch import XlsxPatchError, patch_column
+from .excel.xlsx_reader import XlsxReadError, read_xlsx
+from .excel.headers import flatten_header, read_table
+from .excel.registry import get_config_version, get_processor
+from .models import AssortmentItem, MultiplicityGroup, PriceSupplier, ProcessedResult, SupplierLayout, UnnecessaryBrand
+from .sevices import NOT_FOUND_EVENT, create_batch, event_stream, get_batch_state
+from .task import cleanup_task_files, process_single_file_task, zip_batch_results, route_task
+from .utils import progress, task_files
+from .utils.downloads import task_file_response
+from . import views
+from users.models import CustomUser
 import pandas as pd
+from openpyxl import Workbook, load_workbook
 from pathlib import Path
 
 
@@ -20,6 +60,53 @@ class TestSmartColumnDetector(TestCase):
     #         df = processor.analyze_df(df)
     #         print(df.head())
 
+    def test_compiled_patterns_match_each_pattern(self):
+        series = ['BKR6E', 'ABC-123', '0986452041', 'NGK', 'MANN-FILTER', 'Свеча', '12.5', '1 000,50', '€100',
+                  '>50', '≥ 10', '< 2,5', 42, 17.25, 'oc90\n']
+        detector = SmartColumnDetector()
+        confidence = detector.match_confidence(series, list(detector.COMPILED_PATTERNS))
+        for column_type, patterns in detector.PATTERNS.items():
+            if not patterns:
+                continue
+            expected = sum(any(re.match(pattern, str(value)) for pattern in patterns) for value in series)
+            self.assertEqual(confidence[column_type], expected / len(series), column_type)
+        self.assertEqual(detector.is_quantity(['5', '>10'], 3).confidence, 1.0)
+        # Доли типов значений и совпадения с шаблонами за один проход дают те же оценки
+        self.assertEqual(detector.simple_detect_column_type(series, 0, detector.COMPILED_PATTERNS)['confidence'],
+                         confidence)
+
+    def test_column_analyzed_in_one_pass(self):
+        detector = SmartColumnDetector()
+        with mock.patch.object(detector, 'match_confidence') as match_confidence:
+            info = detector.analyze_column(pd.Series(['NGK SPARK', 'BOSCH AG', 'MANN FILTER', 'TRW']), 1, 'Бренд', {})
+            match_confidence.assert_not_called()
+        self.assertEqual((info.data_type, info.confidence), (ColumnType.BRAND, 1.0))
+
+    def test_sample_short_column(self):
+        detector = SmartColumnDetector()
+        self.assertEqual(detector.get_simple_series(pd.Series(['NGK', None, 'BOSCH'])), ['NGK', 'BOSCH'])
+        self.assertEqual(detector.get_simple_series(pd.Series([None, None])), [])
+
+    def test_sample_stops_when_type_is_stable(self):
+        detector = SmartColumnDetector()
+        series = pd.Series([f'A{i:05d}' for i in range(10_000)])
+        sample = detector.get_simple_series(series)
+        self.assertEqual(len(sample), detector.SAMPLE_BATCH * detector.SAMPLE_MIN_BATCHES)
+        self.assertEqual(sample[:2], ['A00000', 'A00001'])
+        self.assertIn('A09999', sample)
+        self.assertEqual(sample, detector.get_simple_series(series))
+
+    def test_sample_grows_while_type_changes(self):
+        detector = SmartColumnDetector()
+        series = pd.Series([*range(100), *(f'Товар {i}' for i in range(9_800)), *range(100)])
+        sample = detector.get_simple_series(series)
+        self.assertGreater(len(sample), detector.SAMPLE_BATCH * detector.SAMPLE_MIN_BATCHES)
+        self.assertLessEqual(len(sample), detector.SAMPLE_MAX)
+
+    def test_empty_column_is_undefined(self):
+        df = pd.DataFrame({'a': [None] * 3, 'b': ['BKR6E', 'OC90', 'W712'], 'c': [1, 5, 10]})
+        self.assertEqual(SmartColumnDetector().analyze_df(df).columns[0], 'Column 0')
+
     def test_create_df_for_movement(self):
         CURRENT_DIR = Path(__file__).resolve().parent.parent / 'test_data' / 'excel'
         TEST_FILES = [file for file in CURRENT_DIR.glob('*.xlsx')]
@@ -30,3 +117,956 @@ class TestSmartColumnDetector(TestCase):
             file_bytes = file.read_bytes()
             processor = ProcessingPipeline(processor_type)
             result =processor.run(file_bytes, file.name)
+
+
+def legacy_price_list(df, columns):
+    """Построчная сборка PriceListEdit до векторизации, эталон для сравнения"""
+    required_columns = list(columns)
+    new_columns = [''] * max(max(columns.values()), len(df.columns))
+    for i, col_name in enumerate(df.columns):
+        if col_name in required_columns:
+            new_columns[columns[col_name] - 1] = col_name
+            if i != columns[col_name] - 1:
+                new_columns[i] = f'Column_{i}'
+        elif new_columns[i] not in required_columns:
+            new_columns[i] = col_name
+    for i, col in enumerate(new_columns):
+        if col in required_columns and columns[col] - 1 != i:
+            new_columns[i] = f'Column_{i}'
+    rows = []
+    for _, row in df.iterrows():
+        if len([col for col in row.tolist() if pd.isna(col) != True]) < 2:
+            continue
+        rows.append({col: row.get(col) for col in new_columns})
+    return pd.DataFrame(rows).rename(columns={f'Column_{index - 1}': col for col, index in columns.items()})
+
+
+def sheet_xml(file_bytes):
+    with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+        return archive.read('xl/worksheets/sheet1.xml'), archive.read('xl/sharedStrings.xml')
+
+
+class TestPriceListEdit(TestCase):
+
+    def run_processor(self, df, file_name):
+        stream = io.BytesIO()
+        df.to_excel(stream, index=False)
+        return PriceListEdit(stream.getvalue(), file_name).get_stream
+
+    def expected_bytes(self, df, columns):
+        stream = io.BytesIO()
+        with pd.ExcelWriter(stream, engine='xlsxwriter') as writer:
+            # В результат входят столбцы до последнего нужного
+            legacy_price_list(df, columns).iloc[:, :max(columns.values())].to_excel(writer, index=False,
+                                                                                   sheet_name='Лист1')
+        return stream.getvalue()
+
+    def test_reordered_columns_match_row_by_row_output(self):
+        df = pd.DataFrame({
+            'Бренд': ['NGK', 'BOSCH', None, 'MANN', None],
+            'Артикул': ['BKR6E', '0 986 452 041', None, 'W 712/75', 'X1'],
+            'Наименование': ['Свеча', None, 'Итого', 'Фильтр', None],
+            'Цена': [250.5, 410, None, 380, None],
+            'Кол-во': [10, None, None, '>50', None],
+            'Склад': [None, 'МСК', None, None, None],
+        })
+        with mock.patch('core.excel.price_list_edit.read_xlsx', wraps=read_xlsx) as reader:
+            result = self.run_processor(df, 'Спутник.xlsx')
+        # Заголовок не совпал по первой строке - файл разобран один раз, целиком
+        reader.assert_called_once_with(mock.ANY, dtype={'Артикул': str, 'Бренд': str})
+        read_back = pd.read_excel(io.BytesIO(result))
+        self.assertEqual(read_back.columns[:5].tolist(), ['Артикул', 'Бренд', 'Наименование', 'Цена', 'Кол-во'])
+        self.assertEqual(len(read_back), 3)
+        self.assertEqual(sheet_xml(result), sheet_xml(self.expected_bytes(df, {'Артикул': 1, 'Бренд': 2,
+                                                                                 'Цена': 4, 'Кол-во': 5})))
+
+    def test_known_layout_reads_only_needed_columns(self):
+        df = pd.DataFrame({
+            'Артикул': ['BKR6E', '0 986 452 041'],
+            'Бренд': ['NGK', 'BOSCH'],
+            'Наименование': ['Свеча', 'Колодки'],
+            'Цена': [250.5, 410],
+            'Кол-во': [10, 3],
+            'Склад': ['МСК', 'НСК'],
+            'Комментарий': [None, 'под заказ'],
+        })
+        # Столбцы правее последнего нужного в результат не попадают
+        with mock.patch('core.excel.price_list_edit.read_xlsx', wraps=read_xlsx) as reader:
+            result = pd.read_excel(io.BytesIO(self.run_processor(df, 'Спутник.xlsx')))
+        reader.assert_called_once_with(mock.ANY, usecols=[0, 1, 2, 3, 4], dtype={'Артикул': str, 'Бренд': str})
+        pd.testing.assert_frame_equal(result, df.iloc[:, :5])
+
+        stream = io.BytesIO()
+        df.to_csv(stream, sep=';', index=False, encoding='cp1251')
+        result = pd.read_excel(io.BytesIO(PriceListEdit(stream.getvalue(), 'Спутник.csv').get_stream))
+        pd.testing.assert_frame_equal(result, df.iloc[:, :5])
+
+    def test_projected_and_full_read_give_same_output(self):
+        df = pd.DataFrame({
+            'Артикул': ['0986452041', '0451103316'],
+            'Бренд': ['BOSCH', 'BOSCH'],
+            'Наименование': ['Колодки', 'Фильтр'],
+            'Цена': [410.5, 380],
+            'Кол-во': [3, '>50'],
+            'Склад': ['МСК', 'НСК'],
+        })
+        stream = io.BytesIO()
+        df.to_excel(stream, index=False)
+        xlsx_bytes = stream.getvalue()
+        csv_bytes = df.to_csv(sep=';', index=False).encode('cp1251')
+        for file_bytes, file_name in ((xlsx_bytes, 'Спутник.xlsx'), (csv_bytes, 'Спутник.csv')):
+            projected = PriceListEdit(file_bytes, file_name).get_stream
+            with mock.patch.object(PriceListEdit, '_PriceListEdit__header_matches', return_value=False):
+                full = PriceListEdit(file_bytes, file_name).get_stream
+            self.assertEqual(sheet_xml(projected), sheet_xml(full))
+            result = pd.read_excel(io.BytesIO(projected), dtype={'Артикул': str})
+            self.assertEqual(result.columns.tolist(), ['Артикул', 'Бренд', 'Наименование', 'Цена', 'Кол-во'])
+            self.assertEqual(result['Артикул'].tolist(), ['0986452041', '0451103316'])
+
+    def test_detected_layout_reused_and_overridden(self):
+        df = pd.DataFrame({
+            'Производитель': ['NGK', 'BOSCH', 'MANN', 'NGK'],
+            'Код': ['BKR6E-11', '0986452041', 'W712/75', 'BPR6ES'],
+            'Описание': ['Свеча зажигания', 'Фильтр масляный', 'Фильтр', 'Свеча'],
+            'Цена опт': [250.5, 410.25, 380.1, 199.9],
+            'Остаток': [10, 1, 5, 3],
+        })
+        self.run_processor(df, 'Армтек ВИП.xlsx')
+        layout = SupplierLayout.objects.get(supplier='Армтек ВИП')
+        self.assertEqual(layout.headers, df.columns.tolist())
+
+        layout.columns = ['brand', 'article', 'Column 2', 'price', 'quantity']
+        layout.save()
+        with mock.patch.object(SmartColumnDetector, 'detect_columns') as detect_columns:
+            result = pd.read_excel(io.BytesIO(self.run_processor(df, 'Армтек ВИП.xlsx')))
+            detect_columns.assert_not_called()
+        self.assertEqual(result['brand'].tolist(), df['Производитель'].tolist())
+        self.assertEqual(result['article'].tolist(), df['Код'].astype(str).tolist())
+        self.assertEqual(SupplierLayout.objects.get().hits, 1)
+
+    def test_missing_quantity_column_matches_row_by_row_output(self):
+        df = pd.DataFrame({
+            'Бренд': ['NGK', 'BOSCH', 'MANN'],
+            'Артикул': ['BKR6E', '0 986 452 041', 'W 712/75'],
+            'Наименование': ['Свеча', 'Колодки', 'Фильтр'],
+            'Цена': [250.5, 410, 380],
+        })
+        result = self.run_processor(df, 'Спутник.xlsx')
+        df['Кол-во'] = 1
+        self.assertEqual(sheet_xml(result), sheet_xml(self.expected_bytes(df, {'Артикул': 1, 'Бренд': 2,
+                                                                                 'Цена': 4, 'Кол-во': 5})))
+
+
+class TestXlsxReader(TestCase):
+
+    def setUp(self):
+        import datetime
+        import openpyxl
+
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['Прайс-лист', None, None])
+        sheet.append([])
+        sheet.append(['Артикул', 'Бренд', None, 'Цена', 'Кол-во', 'Дата', 'Акция', 'Примечание'])
+        sheet.append(['0001', 'NGK', None, 12.5, 10, datetime.datetime(2024, 1, 5), True, 'NA'])
+        sheet.append([123, 'BOSCH', 'x', 10.0, '>50', datetime.date(2024, 2, 1), False, None])
+        sheet['B7'] = 'итого'
+        sheet['C8'] = '=1+1'
+        sheet['J8'] = 1e20
+        stream = io.BytesIO()
+        workbook.save(stream)
+        self.file_bytes = stream.getvalue()
+
+    def test_same_frame_as_read_excel(self):
+        pd.testing.assert_frame_equal(read_xlsx(self.file_bytes),
+                                      pd.read_excel(io.BytesIO(self.file_bytes), engine='openpyxl'))
+
+    def test_projection(self):
+        pd.testing.assert_frame_equal(read_xlsx(self.file_bytes, usecols=[0, 1, 4]),
+                                      pd.read_excel(io.BytesIO(self.file_bytes), engine='openpyxl',
+                                                    usecols=[0, 1, 4]))
+
+
+class TestGoodsMovementReport(TestCase):
+    HEADER = ['Код', 'Производитель', 'Остаток отпр', 'Дост Ост Отпр', 'Кратность продажи', 'Кол-во к перем.',
+              'К перемещению К', 'Комментарий']
+    ROWS = [
+        # Производитель, Остаток отпр, Дост Ост Отпр, Кратность продажи, Кол-во к перем., К перемещению К
+        ('BOSCH', 10, 10, 1, 5, None),
+        ('BOSCH', 20, 20, 4, 7, None),
+        ('BOSCH', 20, 20, 4, 3, 1),
+        ('BOSCH', 6, 20, 4, 5, None),
+        ('AIRLINE', 10, 10, 1, 5, None),
+        ('BOSCH', 10, 10, 1, None, 9),
+        ('BOSCH', 10, 1, 2, 8, None),
+    ]
+    EXPECTED = [5, 4, 4, None, None, 9, None]
+
+    def make_file(self, formula: bool = False) -> bytes:
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(self.HEADER)
+        for code, row in enumerate(self.ROWS, start=1):
+            sheet.append([code, *row, 'без изменений'])
+        sheet['G2'].number_format = '0.00'
+        if formula:
+            sheet['G3'] = '=1+1'
+        stream = io.BytesIO()
+        workbook.save(stream)
+        return stream.getvalue()
+
+    def check_result(self, result: bytes, source: bytes):
+        sheet = load_workbook(io.BytesIO(result)).active
+        self.assertEqual([row[0] for row in sheet.iter_rows(min_row=2, min_col=7, max_col=7, values_only=True)],
+                         self.EXPECTED)
+        source_sheet = load_workbook(io.BytesIO(source)).active
+        for column in 'ABCDEFH':
+            self.assertEqual([cell.value for cell in sheet[column]], [cell.value for cell in source_sheet[column]])
+        return sheet
+
+    def test_only_movement_column_patched(self):
+        source = self.make_file()
+        sheet = self.check_result(GoodsMovementReport(source, 'a.xlsx').process(), source)
+        self.assertEqual(sheet['G2'].number_format, '0.00')
+
+    def test_summary_logged(self):
+        with self.assertLogs('core', 'INFO') as logs:
+            ExcelProcessor.process(self.make_file(), 'a.xlsx', GoodsMovementReport)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('строк: 7, к перемещению: 6, по кратности: 3, нет остатка: 2, ненужный бренд: 1', logs.output[0])
+
+    def test_openpyxl_fallback(self):
+        source = self.make_file(formula=True)
+        with self.assertRaises(XlsxPatchError):
+            patch_column(source, 6, {3: 4})
+        self.check_result(GoodsMovementReport(source, 'a.xlsx').process(), source)
+
+
+class TestCsvReader(TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({'Артикул': ['0001', 'BKR6E'], 'Бренд': ['NGK', 'Бош'], 'Цена': [1.5, 20]})
+
+    def to_csv(self, sep, encoding):
+        return self.df.to_csv(sep=sep, index=False).encode(encoding)
+
+    def test_sniff(self):
+        self.assertEqual(csv_reader.sniff(self.to_csv(';', 'cp1251')), ('cp1251', ';'))
+        self.assertEqual(csv_reader.sniff(self.to_csv(',', 'utf-8-sig')), ('utf-8-sig', ','))
+        self.assertEqual(csv_reader.sniff(self.to_csv('\t', 'utf-8')), ('utf-8', '\t'))
+
+    def test_encoding_error_after_sample(self):
+        file_bytes = 'article;brand;price\nBKR6E;NGK;1.5\n0001;Бош;20\n'.encode('cp1251')
+        with mock.patch.object(csv_reader, 'SAMPLE_SIZE', 32):
+            df = csv_reader.read_csv(file_bytes)
+        self.assertEqual(df['brand'].tolist(), ['NGK', 'Бош'])
+
+    def test_supplier_changes_encoding(self):
+        for sep, encoding in ((',', 'cp1251'), (';', 'utf-8'), (';', 'cp1251')):
+            stream = io.BytesIO()
+            self.df.to_csv(stream, sep=sep, index=False, encoding=encoding)
+            result = pd.read_excel(io.BytesIO(PriceListEdit(stream.getvalue(), 'Спутник.csv').get_stream))
+            self.assertEqual(result['Бренд'].tolist(), ['NGK', 'Бош'], encoding)
+
+MONTHS = ['июль 25', 'авг. 25', 'сент. 25', 'окт. 25', 'нояб. 25', 'дек. 25', 'янв. 26', 'февр. 26',
+          'март 26', 'апр. 26', 'май 26', 'июнь 26', 'июль 26']
+
+
+def make_universal_report(warehouses=('Склад 1', 'Склад 2', 'Склад 3')) -> bytes:
+    """Отчёт для перемещения излишков: строка заголовка отчёта, затем шапка таблицы"""
+    rows = []
+    for item in range(3):
+        for index, warehouse in enumerate(warehouses):
+            row = {'Склад': warehouse, 'Номенклатура Производитель': 'NGK', '№ по каталогу': str(item),
+                   'Св. ост.': 30 * (index + item % 2), 'В пути': None, 'Матрица': 'да', 'сумма + покуп.': 'A',
+                   'Кратн.': 1}
+            row.update({month: (index + item + position) % 3 + 1 for position, month in enumerate(MONTHS)})
+            rows.append(row)
+    stream = io.BytesIO()
+    pd.DataFrame(rows).to_excel(stream, index=False, startrow=2)
+    return stream.getvalue()
+
+
+class TestHeaders(TestCase):
+
+    def test_flatten_header(self):
+        rows = [['Склад', 'Продажи', '', '', 'Остаток'],
+                ['', 'июль 25', 'авг. 25', 'Итого', ''],
+                ['', '', '', '', ' шт. ']]
+        merges = ['A1:A3', 'B1:D1', 'E1:E2', 'A10:B10']
+        self.assertEqual(flatten_header(rows, merges),
+                         ['Склад', 'Продажи июль 25', 'Продажи авг. 25', 'Продажи Итого', 'Остаток шт.'])
+        # Заголовок не с первой строки листа, дата остаётся датой
+        date = datetime.datetime(2026, 1, 1)
+        self.assertEqual(flatten_header([['Код', date, None]], ['B5:C5'], first_row=5), ['Код', date, date])
+        self.assertEqual(flatten_header([['Код', '']]), ['Код', 'Unnamed: 1'])
+
+    def test_read_table_with_merged_header(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['Отчёт'])
+        sheet.append(['Товар', None, 'Продажи', None, 'Товар'])
+        sheet.append(['Бренд', 'Номер', 'июль 25', 'авг. 25', None])
+        sheet.append(['NGK', 'BP6ES', 3, None, 'x'])
+        sheet.append(['BOSCH', '0123', 1.5, 2, 'y'])
+        sheet.merge_cells('A2:B2')
+        sheet.merge_cells('C2:D2')
+        stream = io.BytesIO()
+        workbook.save(stream)
+
+        df = read_table(stream.getvalue(), header_rows=2, skiprows=1)
+        self.assertEqual(df.columns.tolist(),
+                         ['Товар Бренд', 'Товар Номер', 'Продажи июль 25', 'Продажи авг. 25', 'Товар'])
+        self.assertEqual(df['Товар Номер'].tolist(), ['BP6ES', '0123'])
+        self.assertEqual(df['Продажи июль 25'].tolist(), [3, 1.5])
+        self.assertTrue(pd.isna(df['Продажи авг. 25'].iloc[0]))
+
+        with mock.patch('core.excel.headers._read_rows', side_effect=XlsxReadError('нет')):
+            pd.testing.assert_frame_equal(read_table(stream.getvalue(), header_rows=2, skiprows=1), df)
+
+
+class TestUniversalReport(TestCase):
+
+    def test_greedy_allocation_per_item(self):
+        df = pd.DataFrame({
+            'Производитель': ['NGK', 'NGK', 'NGK', 'NGK', 'BOSCH', 'BOSCH'],
+            'Номер': ['1', '1', '1', '1', '2', '2'],
+            'Потребность': [4, 0, 3, float('nan'), 2, 5],
+            'Излишки': [5, 5, 5, 5, 0, 0],
+        })
+        result = distribute_goods(df, ['Производитель', 'Номер'])
+        self.assertEqual(result['К перемещению'].tolist(), [4, 0, 1, 0, 0, 0])
+        self.assertEqual(result['Отправлено'].tolist(), [True, False, True, False, False, False])
+        self.assertEqual(result['остаток_потребности'].tolist()[:3], [0, 0, 2])
+        self.assertTrue(pd.isna(result['остаток_потребности'].iloc[3]))
+        self.assertEqual(result['остаток_излишков'].tolist(), [0, 0, 0, 0, 0, 0])
+
+    def test_demand(self):
+        df = pd.DataFrame({
+            'Св. ост.': [None, 3, None, 40, 1], 'В пути': [None, None, 2, 1, 1],
+            'Матрица': ['да', 'да', 'да', 'да', None], 'сумма + покуп.': ['A', 'C', None, 'B', 'A'], 'Кратн.': 2,
+        })
+        avg_sales = pd.Series([5, 5, 5, 5, 5])
+        self.assertEqual(recipient_demand(df, avg_sales).tolist(), [10, 2, 2, 0, 0])
+
+    def test_month_columns_from_header(self):
+        columns = ['Склад', 'янв. 26', 'Кратн.', 'Продажи дек. 25', datetime.datetime(2026, 2, 1), 'Май 2026',
+                   'В пути']
+        self.assertEqual(month_columns(columns),
+                         ['Продажи дек. 25', 'янв. 26', datetime.datetime(2026, 2, 1), 'Май 2026'])
+        with self.assertRaises(ValueError):
+            month_columns(['Склад', 'Кратн.'])
+        # Слова, начинающиеся как месяц, месяцами не считаются
+        self.assertEqual(month_columns(['Маржа 25', 'Декада 10', 'Январский 2026', 'Март 2026', 'декабря 25']),
+                         ['декабря 25', 'Март 2026'])
+
+    def test_sales_statistics(self):
+        df = pd.DataFrame({
+            'нояб. 25': [1, None, None, 2], 'дек. 25': [2, None, None, None], 'янв. 26': [4, None, 7, None],
+            'февр. 26': [None, None, 1, None], 'сумма + покуп.': ['A', None, 'C', 'Z'],
+        })
+        statistics = sales_statistics(df)
+        # Среднее 7/3 округляется вверх до 3, максимум последних трёх месяцев - 4
+        self.assertEqual(statistics['Сред. продажа'].tolist(), [4, 0, 7, 2])
+        self.assertEqual(statistics['Ранг'].tolist(), [110.04, 20.0, 70.07, 30.02])
+
+    def test_processor_sheet_per_sender(self):
+        file_bytes = make_universal_report()
+        params = UniversalReport.parse_params({'senders': 'Склад 3, Склад 2', 'depth': '1'})
+        report = UniversalReport(file_bytes, 'остатки.xlsx', params)
+
+        sheets = pd.read_excel(io.BytesIO(report.get_stream), sheet_name=None)
+        self.assertEqual(report.get_file_name, 'остатки_перемещение.xlsx')
+        self.assertEqual(list(sheets), ['Склад 3', 'Склад 2'])
+        df = pd.read_excel(io.BytesIO(file_bytes), header=2)
+        for sender, sheet in sheets.items():
+            expected = distribute(df, sender, 1)
+            self.assertEqual(sheet['Склад'].tolist(), expected['Склад'].tolist())
+            self.assertEqual(sheet['К перемещению'].tolist(), expected['К перемещению'].tolist())
+        self.assertGreater(sheets['Склад 3']['К перемещению'].sum(), 0)
+
+    def test_processor_params(self):
+        self.assertEqual(UniversalReport.parse_params({'senders': ['Склад 1', ' Склад 2,Склад 1'], 'depth': 2}),
+                         {'senders': ['Склад 1', 'Склад 2'], 'depth': 2})
+        for data in ({'depth': '1'}, {'senders': 'Склад 1'}, {'senders': 'Склад 1', 'depth': 'два'},
+                     {'senders': 'Склад 1', 'depth': '-1'}):
+            with self.assertRaises(ValueError):
+                UniversalReport.parse_params(data)
+
+        report = UniversalReport(make_universal_report(), 'остатки.xlsx', {'senders': ['Склад 9'], 'depth': 1})
+        with self.assertRaisesRegex(ValueError, 'Склад 9'):
+            report.process()
+
+
+def make_assortment_file(rows) -> bytes:
+    """Файл ассортимента: строка заголовка отчёта, затем шапка, нужные столбцы C-E"""
+    stream = io.BytesIO()
+    pd.DataFrame([('', '', brand, article, mark) for brand, article, mark in rows],
+                 columns=['Код', 'Наименование', 'Производитель', 'Номер по каталогу', 'Ассортимент']
+                 ).to_excel(stream, index=False, startrow=1)
+    return stream.getvalue()
+
+
+class TestAssortment(TestCase):
+
+    def setUp(self):
+        assortment.invalidate()
+        self.addCleanup(assortment.invalidate)
+
+    def test_upload_replaces_dataset(self):
+        replace_assortment(make_assortment_file([('NGK', 'BP6ES', 'Г'), (' ngk', 'bp6es ', 'Г'),
+                                                 ('BOSCH', '123', 'Н'), ('BOSCH', 456, 'Г')]), 'a.xlsx')
+        self.assertEqual(sorted(AssortmentItem.objects.values_list('brand', 'article')),
+                         [('bosch', '456'), ('ngk', 'bp6es')])
+        snapshot = assortment.get_assortment()
+        # Снимок не перезагружается, пока версия справочника не изменилась
+        with self.assertNumQueries(1):
+            self.assertIs(assortment.get_assortment(), snapshot)
+
+        replace_assortment(make_assortment_file([('TRW', 'GDB1', 'Г')]), 'b.xlsx')
+        self.assertEqual(list(assortment.get_assortment().index), [('trw', 'gdb1')])
+
+        stream = io.BytesIO()
+        pd.DataFrame({'Производитель': ['NGK'], 'Номер': ['1']}).to_excel(stream, index=False, startrow=1)
+        with self.assertRaises(ValueError):
+            replace_assortment(stream.getvalue(), 'c.xlsx')
+
+    def test_report_anti_join(self):
+        replace_assortment(make_assortment_file([('NGK', 'BP6ES', 'Г'), ('BOSCH', '456', 'Г')]), 'a.xlsx')
+        rows = [['', 'NGK', 'BP6ES', 'Свеча', '', '', '', 4], ['', 'ngk', 'BKR6E', 'Свеча', '', '', '', 2],
+                ['', 'BOSCH', 456, 'Фильтр', '', '', '', 1], ['', 'BOSCH', 789, 'Фильтр', '', '', '', None],
+                ['', 'AIRLINE', 'A1', 'Насос', '', '', '', 3]]
+        stream = io.BytesIO()
+        pd.DataFrame([[''] * 8] * 3 + rows).to_excel(stream, index=False, header=False)
+
+        result = pd.read_excel(io.BytesIO(clean_report(stream.getvalue(), 'заказ.xlsx')))
+        self.assertEqual(result['Номер по каталогу'].tolist(), ['BKR6E'])
+        self.assertEqual(result[['Склад', 'Количество', 'Комментарий']].values.tolist(), [[1645, 2, 'заказ']])
+
+    def test_integral_float_articles(self):
+        # Столбец номеров с пропуском читается как float: 456.0 совпадает с '456'
+        articles = pd.Series([456, None, 789.5], dtype=float)
+        self.assertEqual(assortment.normalize(articles).tolist(), ['456', '', '789.5'])
+        replace_assortment(make_assortment_file([('BOSCH', '456', 'Г')]), 'a.xlsx')
+        self.assertEqual(assortment.get_assortment().contains(pd.Series(['BOSCH'] * 3), articles).tolist(),
+                         [True, False, False])
+
+    def test_upload_requires_admin(self):
+        upload = SimpleUploadedFile('a.xlsx', make_assortment_file([('NGK', 'BP6ES', 'Г')]))
+        url = reverse('api_upload_assortment')
+        self.assertEqual(self.client.post(url, {'file': upload}).status_code, 403)
+
+        user = CustomUser.objects.create_user('manager', 'manager@example.com', 'password')
+        self.client.force_login(user)
+        upload.seek(0)
+        self.assertEqual(self.client.post(url, {'file': upload}).status_code, 403)
+        self.assertFalse(AssortmentItem.objects.exists())
+
+        user.is_staff = True
+        user.save()
+        upload.seek(0)
+        self.assertEqual(self.client.post(url, {'file': upload}).status_code, 200)
+        self.assertEqual(list(AssortmentItem.objects.values_list('brand', 'article')), [('ngk', 'bp6es')])
+
+
+class TestRules(TestCase):
+
+    def setUp(self):
+        rules.invalidate()
+        self.addCleanup(rules.invalidate)
+
+    def test_seeded_rules_match_settings(self):
+        snapshot = rules.get_rules()
+        self.assertEqual(snapshot.price_settings, default_rules.PRICE_SETTINGS)
+        self.assertEqual(list(snapshot.price_names.items()), list(default_rules.PRICE_NAMES.items()))
+        self.assertEqual(list(snapshot.key_words.items()), list(default_rules.key_words.items()))
+        self.assertEqual(snapshot.anti_key_words, default_rules.anti_key_words)
+        self.assertEqual(snapshot.multiplicity, default_rules.multiplicity)
+        self.assertEqual(snapshot.quantity_keys, default_rules.QUANTITY_KEYS)
+        self.assertEqual(sorted(snapshot.unnecessary_brands), sorted(default_rules.UNNECESSARY_BRANDS))
+
+    def test_snapshot_cached_until_rules_change(self):
+        snapshot = rules.get_rules()
+        version = get_config_version('multiplicity')
+        with self.assertNumQueries(0):
+            self.assertIs(rules.get_rules(), snapshot)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UnnecessaryBrand.objects.create(name=' NEW BRAND ')
+        self.assertIn('new brand', rules.get_rules().unnecessary_brands)
+        self.assertNotEqual(get_config_version('multiplicity'), version)
+
+    def test_version_published_once_per_transaction(self):
+        with mock.patch('core.rules_store.publish_version') as publish_version:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                with transaction.atomic():
+                    for name in ('brand 1', 'brand 2', 'brand 3'):
+                        UnnecessaryBrand.objects.create(name=name)
+                    MultiplicityGroup.objects.filter(name='Свечи зажигания').get().save()
+            self.assertEqual(len(callbacks), 1)
+            publish_version.assert_called_once_with()
+
+            # Откат транзакции отменяет публикацию, следующее изменение публикуется заново
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                try:
+                    with transaction.atomic():
+                        UnnecessaryBrand.objects.create(name='brand 4')
+                        raise DatabaseError
+                except DatabaseError:
+                    pass
+                UnnecessaryBrand.objects.create(name='brand 5')
+            self.assertEqual(len(callbacks), 1)
+            self.assertEqual(publish_version.call_count, 2)
+
+    def test_same_version_message_keeps_snapshot(self):
+        snapshot = rules.get_rules()
+        rules.invalidate(snapshot.version)
+        self.assertIs(rules.get_rules(), snapshot)
+        rules.invalidate('other')
+        self.assertIsNot(rules.get_rules(), snapshot)
+
+    def test_processors_use_current_rules(self):
+        group = MultiplicityGroup.objects.get(name='Свечи зажигания')
+        group.multiplicity = 6
+        with self.captureOnCommitCallbacks(execute=True):
+            group.save()
+        stream = io.BytesIO()
+        pd.DataFrame({'Номер по каталогу': ['BKR6E'], 'Наименование': ['Свеча зажигания'], 'Бренд': ['NGK'],
+                      'Кратность': [None]}).to_excel(stream, index=False)
+        processor = get_processor('multiplicity')['type_processor'](stream.getvalue(), 'a.xlsx')
+        result = pd.read_excel(io.BytesIO(processor.get_stream))
+        self.assertEqual(result['Кратность'].tolist(), [6])
+
+        supplier = PriceSupplier.objects.get(name='Спутник')
+        supplier.file_name_words = ['sputnik']
+        with self.captureOnCommitCallbacks(execute=True):
+            supplier.save()
+        self.assertEqual(PriceListEdit(b'', 'price_sputnik.xlsx').get_file_name, 'Спутник.xlsx')
+
+
+class TestSupplierNameIndex(TestCase):
+
+    def setUp(self):
+        self.index = SupplierNameIndex(default_rules.PRICE_NAMES, default_rules.PRICE_SETTINGS)
+
+    def legacy_name(self, base_name):
+        words_file_name = base_name.split('_')
+        for key, value in default_rules.PRICE_NAMES.items():
+            if all(word in words_file_name for word in value):
+                return key
+        return base_name
+
+    def test_exact_match_keeps_previous_result(self):
+        for base_name in ('price_all', 'FORUM-AUTO_PRICE_2024', 'export_Ekaterinburg_1', 'BERG_НСК', 'Price',
+                          'БергВИП_10', 'Спутник', 'unknown_file'):
+            self.assertEqual(self.index.resolve(base_name) or base_name, self.legacy_name(base_name), base_name)
+
+    def test_normalized_and_fuzzy_names(self):
+        self.assertEqual(self.index.resolve('export_ekaterinburg'), 'Шате-М')
+        self.assertEqual(self.index.resolve('forum-auto_price'), 'FORUM_AUTO_PRICE_MSK')
+        self.assertEqual(self.index.resolve('Novokuznestk_остатки'), 'Rossko_NSK')
+        self.assertEqual(self.index.resolve('Спутник (2)'), 'Спутник')
+        self.assertIsNone(self.index.resolve('остатки_склад'))
+
+
+class TestMultiplicityKeywords(TestCase):
+
+    def setUp(self):
+        self.rules = rules.from_settings()
+
+    def legacy_multiplicity(self, product):
+        result = 1
+        for group, keywords in self.rules.key_words.items():
+            if any(word in product for word in keywords):
+                anti_key = self.rules.anti_key_words.get(group, [])
+                normalized_words = product.replace('(', '').replace(')', '').split(' ')
+                if anti_key and any(word in normalized_words for word in anti_key):
+                    return 1
+                elif anti_key:
+                    return self.rules.multiplicity[group]
+                result = self.rules.multiplicity[group]
+        return result
+
+    def test_overlapping_keywords(self):
+        automaton = KeywordAutomaton({'a': ['втулка'], 'b': ['втулка клапана', 'лапа'], 'c': ['ка к']})
+        self.assertEqual(automaton.matched_groups(automaton.find('втулка клапана')), ['a', 'b', 'c'])
+        self.assertEqual(automaton.matched_groups(automaton.find('лап')), [])
+
+    def test_same_result_as_group_loop(self):
+        products = ['свеча зажигания', 'свеча зажигания (комплект)', 'амортизатор передний', 'амортизатор левый',
+                    'амортизатор (l)', 'втулка стабилизатора', 'втулка клапана', 'диск тормозной передний',
+                    'колодки тормозные', 'ремень грм', 'опора амортизатора', 'стойка стабилизатора', '']
+        words = [word for keywords in self.rules.key_words.values() for word in keywords]
+        products += words + [f'{word} правый' for word in words]
+        for product in products:
+            self.assertEqual(keyword_multiplicity(product, self.rules), self.legacy_multiplicity(product), product)
+
+
+class TestMultiplicityReport(TestCase):
+    GOLDEN_FILE = Path(__file__).resolve().parent.parent / 'test_data' / 'multiplicity' / 'golden.csv'
+
+    def test_golden_file(self):
+        # Кратность в golden.csv получена построчной обработкой
+        golden = pd.read_csv(self.GOLDEN_FILE, sep=';', dtype=str, keep_default_na=False)
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['Бренд', 'Наименование', 'Номер по каталогу', 'Кратность'])
+        for name, number in zip(golden['Наименование'], golden['Номер по каталогу']):
+            sheet.append(['BRAND', name, number, None])
+        stream = io.BytesIO()
+        workbook.save(stream)
+
+        result = load_workbook(io.BytesIO(MultiplicityReport(stream.getvalue(), 'a.xlsx').process())).active
+        values = [str(row[3]) for row in result.iter_rows(min_row=2, values_only=True)]
+        self.assertEqual(values, golden['Кратность'].tolist())
+
+    def test_only_column_d_changed(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.title = 'Номенклатура'
+        rows = [['Бренд', 'Наименование', 'Номер по каталогу', 'Кратность', 'Дата'],
+                ['NGK', 'Свеча зажигания', 'BKR6E', 5, datetime.datetime(2024, 1, 2)],
+                [None, None, None, None, None],
+                ['TRW', 'Амортизатор', 'JGM1234LR', None, 'x']]
+        for row in rows:
+            sheet.append(row)
+        stream = io.BytesIO()
+        workbook.save(stream)
+
+        result = load_workbook(io.BytesIO(MultiplicityReport(stream.getvalue(), 'a.xlsx').process()))
+        self.assertEqual(result.sheetnames, ['Номенклатура'])
+        values = [list(row) for row in result.active.iter_rows(values_only=True)]
+        rows[1][3], rows[2][3], rows[3][3] = 4, 1, 2
+        self.assertEqual(values, rows)
+
+    def test_normalize_column_matches_normalize_text(self):
+        values = ['  Свеча ', 'BKR6E', 0, 12, 12.5, 0.0, True, False, '', ' ']
+        df = pd.DataFrame({'Номер по каталогу': values})
+        expected = [str(value).lower().strip() if value else '' for value in values]
+        self.assertEqual(normalize_column(df, 'Номер по каталогу').tolist(), expected)
+        self.assertEqual(normalize_column(df, 'Наименование').tolist(), [''] * len(values))
+
+
+class TaskStorageMixin:
+    """Хранилище задач во временном каталоге"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        storages = {**settings.STORAGES,
+                    'tasks': {'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                              'OPTIONS': {'location': self.tmp_dir.name}}}
+        override = override_settings(STORAGES=storages)
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class TestTaskFileTransport(TaskStorageMixin, TestCase):
+
+    def test_task_receives_key_and_returns_key(self):
+        stream = io.BytesIO()
+        pd.DataFrame({'Номер по каталогу': ['123'], 'Наименование': ['Свеча зажигания'],
+                      'Бренд': ['NGK'], 'Кратность': [None]}).to_excel(stream, index=False)
+        input_key = task_files.save_upload(SimpleUploadedFile('report.xlsx', stream.getvalue()))
+
+        result = process_single_file_task.run(input_key, 'report.xlsx', 'multiplicity')
+
+        self.assertNotIn('file_content', result)
+        self.assertTrue(result['meta']['success'])
+        self.assertFalse(task_files.get_storage().exists(input_key))
+        output = pd.read_excel(io.BytesIO(task_files.read_bytes(result['file_key'])))
+        self.assertEqual(output['Кратность'].tolist(), [4])
+
+    def test_cleanup_keeps_cached_and_recent_files(self):
+        storage = task_files.get_storage()
+        input_key = task_files.save_upload(SimpleUploadedFile('a.xlsx', b'input'))
+        output_key = task_files.save_bytes(b'output', 'a.xlsx')
+        cached_key = task_files.save_bytes(b'cached', 'b.xlsx')
+        recent_key = task_files.save_bytes(b'recent', 'c.xlsx')
+        ProcessedResult.objects.create(input_hash='1', processor_type='multiplicity', config_version='1',
+                                       file_key=cached_key, size=6)
+        old = (datetime.datetime.now() - datetime.timedelta(days=2)).timestamp()
+        for key in (input_key, output_key, cached_key):
+            os.utime(storage.path(key), (old, old))
+
+        with override_settings(TASK_FILES_TTL=60 * 60 * 24):
+            self.assertEqual(cleanup_task_files.run(), 2)
+        self.assertEqual([storage.exists(key) for key in (input_key, output_key, cached_key, recent_key)],
+                         [False, False, True, True])
+
+
+class TestTaskFileResponse(TaskStorageMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.factory = RequestFactory()
+        self.data = bytes(range(256)) * 4
+        self.key = task_files.save_bytes(self.data, 'result.xlsx')
+        self.etag = '"task-1024"'
+
+    def get(self, **headers):
+        request = self.factory.get('/api/task/task/file/', headers=headers)
+        return task_file_response(request, self.key, 'result.xlsx', self.etag)
+
+    def test_full_download(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_range_download(self):
+        response = self.get(Range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(b''.join(response.streaming_content), self.data[10:20])
+
+        response = self.get(Range='bytes=-4')
+        self.assertEqual(b''.join(response.streaming_content), self.data[-4:])
+
+        response = self.get(Range='bytes=2000-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_etag_not_modified(self):
+        self.assertEqual(self.get(**{'If-None-Match': self.etag}).status_code, 304)
+        response = self.get(Range='bytes=0-9', **{'If-Range': '"other"'})
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(TASK_FILES_ACCEL_REDIRECT='/protected/tasks/')
+    def test_accel_redirect(self):
+        response = self.get()
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/tasks/{self.key}')
+        self.assertEqual(response.content, b'')
+
+
+class MemoryPubSub:
+    """Каналы Redis в памяти: сообщения progress.publish получают подписки event_stream"""
+
+    def __init__(self):
+        self.queues = {}
+
+    # Синхронный клиент progress.get_client()
+    def publish(self, channel, message):
+        for queue in self.queues.get(channel, []):
+            queue.put_nowait({'type': 'message', 'channel': channel, 'data': message.encode()})
+
+    # Асинхронный клиент event_stream
+    def pubsub(self):
+        return MemorySubscription(self)
+
+    async def aclose(self):
+        pass
+
+
+class MemorySubscription:
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.queue = asyncio.Queue()
+        self.channels = []
+
+    async def subscribe(self, channel):
+        self.broker.queues.setdefault(channel, []).append(self.queue)
+        self.channels.append(channel)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        for channel in self.channels:
+            self.broker.queues[channel].remove(self.queue)
+
+
+class TestEventStream(TestCase):
+
+    def setUp(self):
+        self.broker = MemoryPubSub()
+        for target in ('core.sevices.aioredis.from_url', 'core.utils.progress.get_client'):
+            patcher = mock.patch(target, return_value=self.broker)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def read_events(self, load_state, publish):
+        """События потока; publish(номер события) вызывается перед чтением каждого следующего события"""
+        async def consume():
+            events = []
+            stream = event_stream(progress.channel_name('task-1'), load_state)
+            async for event in stream:
+                events.append(event)
+                publish(len(events))
+            return events
+        return async_to_sync(consume)()
+
+    def parse(self, events):
+        return [json.loads(event[len('data: '):]) for event in events if event.startswith('data: ')]
+
+    def test_published_progress_reaches_stream(self):
+        states = iter([{'state': 'PENDING'}, {'state': 'SUCCESS', 'meta': {'success': True}}])
+        messages = {1: ('PROGRESS', {'stage': 'processing', 'percent': 10}), 2: ('SUCCESS', {})}
+
+        def publish(count):
+            if count in messages:
+                state, data = messages[count]
+                progress.publish('task-1', state, **data)
+
+        events = self.parse(self.read_events(lambda: next(states), publish))
+        self.assertEqual(events, [
+            {'state': 'PENDING'},
+            {'task_id': 'task-1', 'state': 'PROGRESS', 'stage': 'processing', 'percent': 10},
+            # Итоговое событие - состояние, перечитанное после завершения задачи
+            {'state': 'SUCCESS', 'meta': {'success': True}},
+        ])
+        self.assertEqual(self.broker.queues[progress.channel_name('task-1')], [])
+
+    def test_keep_alive_until_terminal_state(self):
+        states = iter([{'state': 'PENDING'}, None])
+        with mock.patch('core.sevices.SSE_HEARTBEAT', 0.01):
+            events = self.read_events(lambda: next(states),
+                                      lambda count: count == 2 and progress.publish('task-1', 'FAILURE'))
+        self.assertEqual(events[1], ': keep-alive\n\n')
+        # Состояние после завершения не найдено - поток закрывается итоговым событием с ошибкой
+        self.assertEqual(self.parse(events), [{'state': 'PENDING'}, NOT_FOUND_EVENT])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TestBatchUpload(TaskStorageMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        conf = process_single_file_task.app.conf
+        previous = conf.task_always_eager
+        conf.task_always_eager = True
+        self.addCleanup(setattr, conf, 'task_always_eager', previous)
+        for task in (process_single_file_task, zip_batch_results):
+            patcher = mock.patch.object(task, 'store_eager_result', True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Книга создаётся один раз на тест: время создания в свойствах книги меняет хэш файла
+        stream = io.BytesIO()
+        pd.DataFrame({'Номер по каталогу': ['123'], 'Наименование': ['Свеча зажигания'],
+                      'Бренд': ['NGK'], 'Кратность': [None]}).to_excel(stream, index=False)
+        self.file_bytes = stream.getvalue()
+
+    def make_file(self, name):
+        return SimpleUploadedFile(name, self.file_bytes)
+
+    def test_batch_with_archive(self):
+        batch = create_batch([self.make_file('a.xlsx'), self.make_file('b.xlsx')], 'multiplicity', archive=True)
+
+        state = get_batch_state(batch['batch_id'])
+        self.assertEqual(state['state'], 'SUCCESS')
+        self.assertEqual((state['total'], state['completed'], state['failed']), (2, 2, 0))
+        self.assertEqual(state['archive']['state'], 'SUCCESS')
+
+        archive_key = AsyncResult(batch['archive_task_id']).result['file_key']
+        with zipfile.ZipFile(io.BytesIO(task_files.read_bytes(archive_key))) as archive:
+            self.assertEqual(sorted(archive.namelist()), ['a_кратность.xlsx', 'b_кратность.xlsx'])
+
+    def test_processor_error_counted_as_failed(self):
+        broken = SimpleUploadedFile('b.xlsx', b'not a workbook')
+        batch = create_batch([self.make_file('a.xlsx'), broken], 'multiplicity', archive=True)
+
+        state = get_batch_state(batch['batch_id'])
+        # Ошибка перехвачена обработчиком: задача в состоянии SUCCESS, файл - с ошибкой
+        self.assertEqual([task['state'] for task in state['tasks']], ['SUCCESS', 'SUCCESS'])
+        self.assertFalse(state['tasks'][1]['meta']['success'])
+        self.assertEqual((state['state'], state['completed'], state['failed']), ('SUCCESS', 2, 1))
+        self.assertEqual(state['archive']['state'], 'SUCCESS')
+        self.assertFalse(ProcessedResult.objects.filter(meta__filename='b.xlsx').exists())
+
+        archive_key = AsyncResult(batch['archive_task_id']).result['file_key']
+        with zipfile.ZipFile(io.BytesIO(task_files.read_bytes(archive_key))) as archive:
+            self.assertEqual(archive.namelist(), ['a_кратность.xlsx'])
+
+    def test_unknown_batch(self):
+        self.assertIsNone(get_batch_state('missing'))
+        response = async_to_sync(views.api_batch_events)(RequestFactory().get('/'), 'missing')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.streaming)
+
+    def test_repeated_upload_served_from_cache(self):
+        first = create_batch([self.make_file('a.xlsx')], 'multiplicity')
+        self.assertFalse(first['tasks'][0]['cached'])
+        self.assertEqual(ProcessedResult.objects.count(), 1)
+
+        with mock.patch.object(process_single_file_task, 'apply_async') as apply_async:
+            second = create_batch([self.make_file('a.xlsx')], 'multiplicity', archive=True)
+            apply_async.assert_not_called()
+        self.assertTrue(second['tasks'][0]['cached'])
+
+        state = get_batch_state(second['batch_id'])
+        self.assertEqual(state['state'], 'SUCCESS')
+        self.assertTrue(state['tasks'][0]['meta']['cached'])
+        self.assertEqual(ProcessedResult.objects.get().hits, 1)
+
+    def test_cache_invalidated_by_rules_version(self):
+        create_batch([self.make_file('a.xlsx')], 'multiplicity')
+        with mock.patch('core.result_cache.get_config_version', return_value='new'):
+            batch = create_batch([self.make_file('a.xlsx')], 'multiplicity')
+        self.assertFalse(batch['tasks'][0]['cached'])
+        self.assertEqual(list(ProcessedResult.objects.values_list('config_version', flat=True)), ['new'])
+
+    def test_processor_params_from_request(self):
+        upload = SimpleUploadedFile('a.xlsx', make_universal_report())
+        batch = create_batch([upload], 'universal', data={'senders': 'Склад 1', 'depth': '1'})
+        result = AsyncResult(batch['tasks'][0]['task_id']).result
+        self.assertTrue(result['meta']['success'])
+        self.assertEqual(pd.ExcelFile(io.BytesIO(task_files.read_bytes(result['file_key']))).sheet_names, ['Склад 1'])
+
+        # Тот же файл с другими параметрами обрабатывается заново
+        upload.seek(0)
+        batch = create_batch([upload], 'universal', data={'senders': 'Склад 1', 'depth': '2'})
+        self.assertFalse(batch['tasks'][0]['cached'])
+        upload.seek(0)
+        batch = create_batch([upload], 'universal', data={'senders': 'Склад 1', 'depth': '2'})
+        self.assertTrue(batch['tasks'][0]['cached'])
+
+        with self.assertRaises(ValueError):
+            create_batch([upload], 'universal', data={'depth': '1'})
+
+    def test_cached_result_named_after_current_file(self):
+        create_batch([self.make_file('a.xlsx')], 'multiplicity')
+        batch = create_batch([self.make_file('c.xlsx')], 'multiplicity')
+        self.assertTrue(batch['tasks'][0]['cached'])
+        meta = get_batch_state(batch['batch_id'])['tasks'][0]['meta']
+        self.assertEqual(meta['filename'], 'c_кратность.xlsx')
+        self.assertEqual(meta['message'], 'Файл успешно обработан: c_кратность.xlsx!')
+
+    def test_same_bytes_under_other_supplier_name(self):
+        stream = io.BytesIO()
+        pd.DataFrame({'Артикул': ['BKR6E'], 'Бренд': ['NGK'], 'Наименование': ['Свеча'], 'Цена': [250.5],
+                      'Кол-во': [10], 'Склад': ['МСК']}).to_excel(stream, index=False)
+        create_batch([SimpleUploadedFile('Спутник.xlsx', stream.getvalue())], 'price')
+        batch = create_batch([SimpleUploadedFile('FORUM-AUTO_PRICE.xlsx', stream.getvalue())], 'price')
+        self.assertFalse(batch['tasks'][0]['cached'])
+        meta = get_batch_state(batch['batch_id'])['tasks'][0]['meta']
+        self.assertEqual(meta['filename'], 'FORUM_AUTO_PRICE_MSK.xlsx')
+
+        batch = create_batch([SimpleUploadedFile('Спутник.xlsx', stream.getvalue())], 'price')
+        self.assertTrue(batch['tasks'][0]['cached'])
+        self.assertEqual(ProcessedResult.objects.filter(processor_type='price').count(), 2)
+
+    @override_settings(RESULT_CACHE_MAX_BYTES=6000)
+    def test_cache_lru_eviction(self):
+        create_batch([self.make_file('a.xlsx')], 'multiplicity')
+        stream = io.BytesIO()
+        pd.DataFrame({'Номер по каталогу': ['456'], 'Наименование': ['Втулка'], 'Бренд': ['LEMFORDER'],
+                      'Кратность': [None]}).to_excel(stream, index=False)
+        create_batch([SimpleUploadedFile('b.xlsx', stream.getvalue())], 'multiplicity')
+
+        entry = ProcessedResult.objects.get()
+        self.assertEqual(entry.meta['filename'], 'b_кратность.xlsx')
+        self.assertEqual(len(os.listdir(os.path.join(self.tmp_dir.name, 'output'))), 1)
+
+
+class TestTaskRouting(TestCase):
+
+    def test_route_by_processing_type(self):
+        self.assertEqual(route_task('core.task.process_single_file_task', ('key', 'a.xlsx', 'price'), {}, {}),
+                         {'queue': 'heavy'})
+        self.assertEqual(route_task('core.task.process_single_file_task', ('key', 'a.xlsx', 'multiplicity'), {}, {}),
+                         {'queue': 'light'})
+        self.assertEqual(route_task('core.task.zip_batch_results', ([],), {}, {}), {'queue': 'light'})
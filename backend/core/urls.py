@@ -11,7 +11,12 @@ urlpatterns = [
     path('api/upload/<str:upload_type>/', views.api_upload_file, name='api_upload'),
     path('api/form/<str:form_type>/', views.api_get_form, name='api_get_form'),
     path('api/archive/search/', views.api_search_files, name='api_search_files'),
+    path('api/assortment/upload/', views.api_upload_assortment, name='api_upload_assortment'),
 
     path('api/task/<str:task_id>/result/', views.api_get_task_result, name='api_get_task_result'),
+    path('api/task/<str:task_id>/file/', views.api_get_task_file, name='api_get_task_file'),
+    path('api/task/<str:task_id>/events/', views.api_task_events, name='api_task_events'),
+    path('api/batch/<str:batch_id>/status/', views.api_get_batch_status, name='api_get_batch_status'),
+    path('api/batch/<str:batch_id>/events/', views.api_batch_events, name='api_batch_events'),
 
 ]
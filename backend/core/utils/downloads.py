@@ -0,0 +1,96 @@
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+from . import task_files
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header: str, size: int):
+    """
+        Разбор заголовка Range (поддерживается один диапазон).
+        Возвращает (start, end) включительно, None если заголовок не применим,
+        или False если диапазон не удовлетворим.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    start, end = match.groups()
+    if start == '' and end == '':
+        return None
+    if start == '':
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _iter_range(file, start: int, length: int):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _content_disposition(file_name: str) -> str:
+    return f"attachment; filename*=UTF-8''{quote(file_name)}"
+
+
+def task_file_response(request, key: str, file_name: str, etag: str):
+    """
+        Ответ с файлом из хранилища задач.
+        Поддерживает ETag/If-None-Match и Range/If-Range. Если задан TASK_FILES_ACCEL_REDIRECT,
+        отдача файла передаётся nginx через X-Accel-Redirect.
+    """
+    storage = task_files.get_storage()
+    content_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponse(status=304)
+        response['ETag'] = etag
+        return response
+
+    accel_prefix = getattr(settings, 'TASK_FILES_ACCEL_REDIRECT', '')
+    if accel_prefix:
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = f'{accel_prefix.rstrip("/")}/{quote(key)}'
+        response['Content-Type'] = content_type
+    else:
+        size = storage.size(key)
+        byte_range = parse_range(request.headers.get('Range', ''), size)
+        if_range = request.headers.get('If-Range')
+        if if_range and if_range != etag:
+            byte_range = None
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        elif byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(_iter_range(storage.open(key, 'rb'), start, length), status=206,
+                                             content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(length)
+        else:
+            response = FileResponse(storage.open(key, 'rb'), content_type=content_type)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = _content_disposition(file_name)
+    response['ETag'] = etag
+    return response
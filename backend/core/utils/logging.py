@@ -1,4 +1,7 @@
 import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
 
 logging.basicConfig(
     level=logging.INFO,
@@ -6,4 +9,35 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()]
 )
 
-logger = logging.getLogger('core')
\ No newline at end of file
+logger = logging.getLogger('core')
+
+
+class ProcessingStats:
+    """
+        Время этапов и счётчики обработки одного файла.
+        Итог пишется в лог одной строкой, строка формируется только если уровень лога её пропускает
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages = {}
+        self.counters = Counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0) + time.perf_counter() - start
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] += int(value)
+
+    def log(self, level: int = logging.INFO) -> None:
+        logger.log(level, 'Обработка %s: %s', self.name, self)
+
+    def __str__(self):
+        stages = ', '.join(f'{name} {seconds:.2f} с' for name, seconds in self.stages.items())
+        counters = ', '.join(f'{name}: {value}' for name, value in self.counters.items())
+        return '; '.join(part for part in (stages, counters) if part)
@@ -0,0 +1,42 @@
+import json
+
+import redis
+from django.conf import settings
+
+from .logging import logger
+
+TERMINAL_STATES = ('SUCCESS', 'FAILURE', 'REVOKED')
+
+_client = None
+
+
+def channel_name(task_id: str) -> str:
+    return f'task-progress:{task_id}'
+
+
+def batch_channel_name(batch_id: str) -> str:
+    return f'batch-progress:{batch_id}'
+
+
+def get_client() -> redis.Redis:
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.PROGRESS_REDIS_URL)
+    return _client
+
+
+def publish(task_id: str, state: str, batch_id: str = None, **data) -> None:
+    """
+        Публикация состояния задачи в канал Redis (и в канал пакета, если задача входит в пакет).
+        Ошибки публикации не прерывают обработку
+    """
+    if not task_id:
+        return
+    message = json.dumps({'task_id': task_id, 'state': state, **data}, ensure_ascii=False)
+    try:
+        client = get_client()
+        client.publish(channel_name(task_id), message)
+        if batch_id:
+            client.publish(batch_channel_name(batch_id), message)
+    except redis.RedisError as e:
+        logger.warning('Не удалось опубликовать состояние задачи %s: %s', task_id, e)
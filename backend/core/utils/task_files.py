@@ -0,0 +1,98 @@
+import hashlib
+import tempfile
+import uuid
+import zipfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.utils import timezone
+
+
+def get_storage():
+    """Хранилище файлов задач (STORAGES['tasks'])"""
+    return storages['tasks']
+
+
+def _new_key(folder: str, file_name: str) -> str:
+    return f'{folder}/{uuid.uuid4().hex}{Path(file_name).suffix.lower()}'
+
+
+def file_sha256(file) -> str:
+    """SHA-256 загруженного файла, читается по частям"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def save_upload(file) -> str:
+    """Сохранение загруженного файла по частям, без чтения целиком в память. Возвращает ключ файла"""
+    return get_storage().save(_new_key('input', file.name), file)
+
+
+def save_bytes(data: bytes, file_name: str) -> str:
+    """Сохранение результата обработки. Возвращает ключ файла"""
+    return get_storage().save(_new_key('output', file_name), ContentFile(data))
+
+
+def save_archive(entries, file_name: str) -> tuple[str, int]:
+    """
+        Упаковка файлов хранилища в zip архив. entries - пары (ключ файла, имя в архиве).
+        Архив собирается во временном файле, а не в памяти. Возвращает ключ архива и его размер
+    """
+    storage = get_storage()
+    used_names = set()
+    with tempfile.TemporaryFile() as tmp:
+        with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for key, name in entries:
+                arc_name = name
+                counter = 1
+                while arc_name in used_names:
+                    arc_name = f'{Path(name).stem} ({counter}){Path(name).suffix}'
+                    counter += 1
+                used_names.add(arc_name)
+                with storage.open(key, 'rb') as src, archive.open(arc_name, 'w') as dst:
+                    for chunk in iter(lambda: src.read(1024 * 1024), b''):
+                        dst.write(chunk)
+        size = tmp.tell()
+        tmp.seek(0)
+        key = storage.save(_new_key('output', file_name), File(tmp, name=file_name))
+    return key, size
+
+
+def read_bytes(key: str) -> bytes:
+    with get_storage().open(key, 'rb') as f:
+        return f.read()
+
+
+def delete(key: str) -> None:
+    storage = get_storage()
+    if storage.exists(key):
+        storage.delete(key)
+
+
+def cleanup(max_age: int, keep=()) -> int:
+    """
+        Удаление входных файлов и результатов старше max_age секунд, кроме ключей keep.
+        Возвращает количество удалённых файлов
+    """
+    storage = get_storage()
+    border = timezone.now() - timedelta(seconds=max_age)
+    keep = set(keep)
+    removed = 0
+    for folder in ('input', 'output'):
+        try:
+            _, names = storage.listdir(folder)
+        except FileNotFoundError:
+            continue
+        for name in names:
+            key = f'{folder}/{name}'
+            if key in keep or storage.get_modified_time(key) > border:
+                continue
+            storage.delete(key)
+            removed += 1
+    return removed
@@ -7,19 +7,22 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.template.loader import render_to_string
 from django.views.decorators.csrf import csrf_exempt
+from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
 from users.models import CustomUser
 
 from rest_framework.authentication import SessionAuthentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django.contrib.auth.decorators import login_required
 from django.utils.dateparse import parse_date
-from .sevices import create_in_memory_uploaded_file
 
 from .task import process_single_file_task
+from .sevices import get_task_state, task_event_stream, create_batch, get_batch_state, batch_event_stream
 from celery.result import AsyncResult
 from .utils.logging import logger
-
-import base64
+from .utils import task_files
+from .utils.downloads import task_file_response
+from .assortment_store import replace_assortment
 
 
 @login_required(login_url='/users/account/login/')
@@ -77,52 +80,111 @@ def api_upload_file(request, upload_type):
             'success': False,
             'error': {'files': 'Файлы не выбраны'},
         }, status=status.HTTP_400_BAD_REQUEST)
-    task_result = []
-    for file in files_list:
-        _, file_bytes = create_in_memory_uploaded_file(file)
-        file_bytes_b64 = base64.b64encode(file_bytes).decode('utf-8')
-        task = process_single_file_task.delay(file_bytes_b64, file.name, upload_type)
-        task_result.append({'filename': file.name, 'task_id': task.id})
+    archive = str(request.data.get('archive', '')).lower() in ('1', 'true', 'on')
+    try:
+        batch = create_batch(files_list, upload_type, archive=archive, data=request.data)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'error': str(e),
+        }, status=status.HTTP_400_BAD_REQUEST)
     return Response({
         'success': True,
         'message': 'Обработка файлов начата',
-        'tasks': task_result
+        'batch_id': batch['batch_id'],
+        'tasks': batch['tasks'],
+        'archive_task_id': batch['archive_task_id'],
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@parser_classes([MultiPartParser, FormParser])
+@authentication_classes([SessionAuthentication])
+@permission_classes([IsAdminUser])
+def api_upload_assortment(request):
+    """Загрузка справочника ассортимента, заменяет текущий справочник. Только для администраторов"""
+    file = request.FILES.get('file')
+    if not file:
+        return Response({
+            'success': False,
+            'error': {'file': 'Файл не выбран'},
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        upload = replace_assortment(file.read(), file.name)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'error': str(e),
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        'success': True,
+        'message': f'Справочник ассортимента загружен: {upload.items} позиций',
+        'items': upload.items,
+        'uploaded_at': upload.uploaded_at,
     }, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 def api_get_task_result(request, task_id):
     """Получение результата задачи"""
-    task = AsyncResult(task_id, app=process_single_file_task.app)
+    response, status_code = get_task_state(task_id)
+    return Response(response, status=status_code)
 
-    if task.status == 'PENDING':
-        response = {
-            'state': task.state,
-            'status': 'Ожидание обработки',
-        }
-        return Response(response, status=status.HTTP_202_ACCEPTED)
 
-    elif task.state == 'SUCCESS':
-        result = task.result
-        response = {
-            'state': task.state,
-            'success': result['success'],
-            'meta': result['meta'],
-            'file_content': result['file_content']
-        }
-        return Response(response, status=status.HTTP_200_OK)
-    elif task.state == 'FAILURE':
-        response = {
-            'state': task.state,
-            'error': str(task.info)
-        }
-        return Response(response, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    else:
-        response = {
+@api_view(['GET'])
+def api_get_batch_status(request, batch_id):
+    """Сводный статус пакетной обработки"""
+    batch_state = get_batch_state(batch_id)
+    if batch_state is None:
+        return Response({
+            'success': False,
+            'error': 'Пакет не найден'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return Response(batch_state, status=status.HTTP_200_OK)
+
+
+async def api_task_events(request, task_id):
+    """
+        Server-Sent Events с состоянием задачи.
+        Подписывается на канал прогресса задачи в Redis и пересылает события браузеру
+        до завершения задачи, вместо периодического опроса api_get_task_result.
+    """
+    response = StreamingHttpResponse(task_event_stream(task_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def api_batch_events(request, batch_id):
+    """Server-Sent Events со сводным состоянием пакета. Неизвестный или истёкший пакет - 404 без открытия потока"""
+    if await sync_to_async(get_batch_state)(batch_id) is None:
+        return JsonResponse({'success': False, 'error': 'Пакет не найден'}, status=status.HTTP_404_NOT_FOUND)
+    response = StreamingHttpResponse(batch_event_stream(batch_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api_view(['GET'])
+def api_get_task_file(request, task_id):
+    """Скачивание результата задачи (поддерживает Range и ETag)"""
+    task = AsyncResult(task_id, app=process_single_file_task.app)
+    if task.state != 'SUCCESS':
+        return Response({
+            'success': False,
             'state': task.state,
-            'error': str(task.info)
-        }
-        return Response(response, status=status.HTTP_400_BAD_REQUEST)
+            'error': 'Результат задачи не готов'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    result = task.result
+    file_key = result.get('file_key')
+    if not file_key or not task_files.get_storage().exists(file_key):
+        return Response({'success': False, 'error': 'Файл не найден'},
+                        status=status.HTTP_404_NOT_FOUND)
+
+    file_name = result['meta'].get('filename') or file_key
+    etag = f'"{task_id}-{result.get("size", "")}"'
+    return task_file_response(request, file_key, file_name, etag)
 
 
 @api_view(['GET'])
@@ -132,7 +194,8 @@ def api_get_form(request, form_type):
     urls_types = {
         'multiplicity': 'Определение кратности',
         'price': 'Обработка прайс-листов',
-        'goodsmove': 'Оптимизация ежедневных перемещений товаров'
+        'goodsmove': 'Оптимизация ежедневных перемещений товаров',
+        'universal': 'Перемещение излишков между складами'
     }
 
     upload_type = urls_types.get(form_type)
@@ -379,34 +379,77 @@ async function handleFormSubmit(form, type) {
 }
 
 
+// Скачивание файла по ссылке, браузер забирает его напрямую с сервера
+function downloadFile(url, filename) {
+    if (!url) {
+        showError(`Файл ${filename}: отсутствует ссылка на результат`);
+        return;
+    }
+    const link = document.createElement('a');
+    link.href = url;
+    link.download = filename;
+    document.body.appendChild(link);
+    link.click();
+    link.remove();
+}
+
+function isFinished(status) {
+    return ['SUCCESS', 'FAILURE', 'REVOKED'].includes(status.state);
+}
+
+// Обработчик перехватывает ошибки файла: задача завершается успешно, а meta.success = false
+function isProcessed(task) {
+    return task.state === 'SUCCESS' && Boolean(task.meta?.success);
+}
+
 // Обработка задач Celery
-async function checkTaskStatus(taskId){
-    console.log('Проверка статуса задачи:', taskId);
-    const response = await fetch(`/api/task/${taskId}/result/`);
-    const responseJson = await response.json();
-    console.log('Статус задачи:', responseJson);
-    return responseJson;
+// Ожидание пакета по событиям сервера (SSE), при недоступности потока - опрос статуса пакета
+function waitForBatch(batchId) {
+    console.log('Ожидание завершения пакета:', batchId);
+    const statusUrl = `/api/batch/${batchId}/status/`;
+    if (!window.EventSource) {
+        return pollStatus(statusUrl);
+    }
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`/api/batch/${batchId}/events/`);
+        let finished = false;
+        let notified = false;
+
+        source.onmessage = (event) => {
+            const status = JSON.parse(event.data);
+            console.log('Status: ', status)
+            // Сводное состояние пакета содержит batch_id, события отдельных задач - task_id
+            if (status.batch_id && isFinished(status)) {
+                finished = true;
+                source.close();
+                resolve(status);
+            } else if (!notified) {
+                notified = true;
+                showSuccess('Обработка файлов выполняется...')
+            }
+        };
+
+        source.onerror = () => {
+            if (finished) return;
+            finished = true;
+            source.close();
+            console.log('Поток событий недоступен, переход на опрос статуса');
+            pollStatus(statusUrl).then(resolve, reject);
+        };
+    });
 }
 
-async function waitForTask(taskId) {
-    console.log('Ожидание завершения задачи:', taskId);
+async function pollStatus(statusUrl) {
     while (true) {
-        const status = await checkTaskStatus(taskId);
-        if (status.state === 'SUCCESS') {
-            console.log('Задача завершена:', status.meta);
-            return {
-                success: status.success,
-                filename: status.meta?.filename || 'unknown.xlsx',
-                file_content: status.file_content, // ← напрямую из ответа
-                ...(status.meta || {}) // ← подстраховка: если что-то есть в meta
-            };
-        } else if (status.state == 'FAILURE') {
-            throw new Error(status.error || 'Ошибка выполнения задачи')
-            console.log('Ошибка выполнения задачи:', status.error);
-        } else if (status.state === 'PENDING') {
-            showSuccess('Обработка файла выполняется...')
+        const response = await fetch(statusUrl);
+        const status = await response.json();
+        console.log('Статус пакета:', status);
+        if (!response.ok) {
+            throw new Error(status.error || 'Ошибка получения статуса')
+        }
+        if (isFinished(status)) {
+            return status;
         }
-
         await new Promise(resolve => setTimeout(resolve, 2000));
     }
 }
@@ -459,22 +502,10 @@ async function handleMultiFormSubmit(e,form, type) {
         if (!uploadData.success){
             throw new Error(uploadData.error || 'Ошибка загрузки файлов');
             }
-        const tasks = uploadData.tasks;
-        console.log('Строка 462 tasks: ',tasks)
-
-        const result = await Promise.all(
-            tasks.map(async ({filename, task_id}) => {
-            try{
-                const result = await waitForTask(task_id);
-                console.log('Строка 468 result: ',result)
-                return { success: true, filename, ...result };
-            } catch (error){
-                return { success: false, filename, error: error.message };
-                }
-            })
-            );
-        const successful = result.filter(r => r.success);
-        const failed = result.filter(r => !r.success);
+        const batch = await waitForBatch(uploadData.batch_id);
+        console.log('Результат пакета:', batch)
+        const successful = batch.tasks.filter(isProcessed);
+        const failed = batch.tasks.filter(t => !isProcessed(t));
 
         if (failed.length > 0) {
             showError(`Не удалось обработать ${failed.length} файл(ов): ` +
@@ -482,32 +513,14 @@ async function handleMultiFormSubmit(e,form, type) {
                 );
         }
 
-        // Скачиваем успешные файлы
-        successful.forEach(result => {
-            console.log('Info: ', result)
-
-            const { filename, file_content } = result;
-
-            // Проверка base64
-            if (!file_content) {
-                showError(`Файл ${filename}: отсутствует содержимое`);
-                return;
-            }
-
-            const byteChars = atob(file_content);
-            const byteNumbers = new Array(byteChars.length);
-            for (let i = 0; i < byteChars.length; i++) {
-                byteNumbers[i] = byteChars.charCodeAt(i);
-            }
-            const byteArray = new Uint8Array(byteNumbers);
-            const blob = new Blob([byteArray], { type: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' });
-
-            const link = document.createElement('a');
-            link.href = URL.createObjectURL(blob);
-            link.download = filename;
-            link.click();
-            URL.revokeObjectURL(link.href);
-        });
+        // Скачиваем архив пакета, если он запрошен и собран, иначе каждый файл отдельно
+        if (batch.archive && batch.archive.state === 'SUCCESS') {
+            downloadFile(batch.archive.file_url, batch.archive.meta?.filename || 'batch.zip');
+        } else {
+            successful.forEach(task => {
+                downloadFile(task.file_url, task.meta?.filename || task.filename);
+            });
+        }
 
         showSuccess(`Обработано: ${successful.length}, Ошибок: ${failed.length}`);
         const selectedFilesList = document.getElementById('selectedFilesList');